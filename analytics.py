@@ -0,0 +1,448 @@
+import os
+import warnings
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import cache, wraps
+
+import numpy as np
+import pandas as pd
+
+import sketches
+from kernels import AGGREGATIONS, crosstab, group_count, group_index, group_mean, group_nunique, group_sum
+
+# ---------------------------
+# Аналітика звітів без Streamlit
+# ---------------------------
+# Кожен звіт - функція, що приймає відфільтровану таблицю відділу (apply_filters)
+# та фільтр і повертає словник готових до побудови графіків таблиць і показників.
+# Сторінки лише відмальовують результат, тож розрахунки можна тестувати та
+# профілювати без запуску Streamlit. Групування за вимірами з невеликою
+# кількістю значень рахуються ядрами kernels.py на NumPy замість groupby.
+
+DATE = "Дата"
+EMPLOYEE = "ПІБ"
+EQUIPMENT = "Тип обладнання"
+PRODUCT = "Тип продукту"
+TIME = "Час на операцію"
+PRODUCTIVITY = "Продуктивність за годину"
+VOLUME = "Об'єм_число"
+OPERATIONS = "Кількість операцій"
+
+# Тривалість планової зміни обладнання
+SHIFT_MINUTES = 480  # 8 годин * 60 хвилин
+
+# Агрегати тренду за періодами
+WORKING_DAYS = "Дні роботи обладнання"
+TOTAL_MINUTES = "Загальний час роботи (хв)"
+
+# Рушій обчислення звітів: "pandas" (типово) або "polars" - ті самі звіти на
+# ліниво обчислюваних таблицях Polars (polars_backend.py, потрібен пакет polars)
+BACKEND_ENV = "ANALYTICS_BACKEND"
+
+# Частота періодів для тренду завантаження ('W-MON' - тижні, що закінчуються в понеділок)
+PERIOD_FREQ = {"День": "D", "Тиждень": "W-MON", "Місяць": "M"}
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """
+    Фільтр бічної панелі: період start..end (дати включно) та вибрані значення.
+    products/equipment - кортежі вибраних значень, None - усі; employee - None для всіх.
+    """
+    start: object = None
+    end: object = None
+    products: tuple = None
+    equipment: tuple = None
+    employee: str = None
+
+
+def count_working_days(start, end):
+    """Кількість робочих днів (понеділок-п'ятниця) між двома датами включно."""
+    if start > end:
+        return 0
+    return int(np.busday_count(start, end + timedelta(days=1)))
+
+
+# ---------------------------
+# Фільтри
+# ---------------------------
+def filter_period(df, start, end):
+    """Рядки з датою в межах start..end; якщо start пізніше за end - порожня таблиця."""
+    if start > end:
+        return df.iloc[0:0]
+    return df[(df[DATE] >= pd.to_datetime(start)) & (df[DATE] <= pd.to_datetime(end))]
+
+
+def filter_values(df, column, selected):
+    """Рядки, де column має одне з вибраних значень (selected=None - без фільтра)."""
+    if selected is None:
+        return df
+    return df[df[column].isin(selected)]
+
+
+def filter_options(df, column):
+    """Відсортований список значень колонки для віджетів фільтрів."""
+    if column not in df.columns:
+        return []
+    return sorted(df[column].dropna().unique().tolist())
+
+
+def apply_filters(df, spec):
+    """Послідовно застосовує період, продукти, обладнання та співробітника."""
+    if spec.start is not None and spec.end is not None:
+        df = filter_period(df, spec.start, spec.end)
+    df = filter_values(df, PRODUCT, spec.products)
+    df = filter_values(df, EQUIPMENT, spec.equipment)
+    if spec.employee is not None:
+        df = df[df[EMPLOYEE] == spec.employee]
+    return df
+
+
+# ---------------------------
+# Рушій обчислення
+# ---------------------------
+@cache
+def _polars_reports():
+    try:
+        import polars_backend
+    except ImportError:
+        warnings.warn(f"{BACKEND_ENV}=polars, але пакет polars не встановлено - звіти рахує pandas")
+        return {}
+    return polars_backend.REPORTS
+
+
+def backend_report(report):
+    """
+    Звіт, який рушій з ANALYTICS_BACKEND може виконати власною реалізацією з тією
+    самою сигнатурою та результатом; інакше виконується report.
+    """
+    @wraps(report)
+    def run(*args, **kwargs):
+        if os.environ.get(BACKEND_ENV) == "polars":
+            implementation = _polars_reports().get(report.__name__)
+            if implementation is not None:
+                return implementation(*args, **kwargs)
+        return report(*args, **kwargs)
+    return run
+
+
+# ---------------------------
+# Допоміжні агрегації
+# ---------------------------
+def _present(df, columns):
+    return [column for column in columns if column in df.columns]
+
+
+def _count_with(df, keys, agg, count=OPERATIONS):
+    """
+    Кількість рядків (колонка count) за ключами та агрегації agg
+    ({колонка: "sum" | "mean" | "min" | "max" | "nunique"}) наявних колонок.
+    """
+    groups = group_index(df, keys)
+    result = groups.keys
+    result[count] = group_count(groups)
+    for column, how in agg.items():
+        if column in df.columns:
+            result[column] = AGGREGATIONS[how](groups, df[column])
+    return result
+
+
+def _daily(df):
+    # Ключ групування - дата без часу, з назвою колонки "Дата"
+    return df[DATE].dt.date.rename(DATE)
+
+
+def _distinct_days(df, groups):
+    """Кількість різних днів роботи в кожній групі groups (kernels.group_index)."""
+    return group_nunique(groups, df[DATE].dt.normalize())
+
+
+def summary(df, metrics):
+    """
+    Загальні KPI: кількість операцій, середні значення метрик (0, якщо даних немає)
+    та кількість операцій на співробітника.
+    """
+    total = len(df)
+    result = {OPERATIONS: total}
+    for column in metrics:
+        result[column] = df[column].mean() if total > 0 and column in df.columns else 0
+    employees = df[EMPLOYEE].nunique() if total > 0 and EMPLOYEE in df.columns else 0
+    result["Операцій на співробітника"] = total / employees if employees > 0 else 0
+    return result
+
+
+# ---------------------------
+# Звіти
+# ---------------------------
+def overview_trends(df, metrics):
+    """
+    Загальний огляд: trend - операції та середні метрики за датами,
+    products/equipment - кількість операцій за типами продукту та обладнання.
+    """
+    return {
+        "trend": _count_with(df, DATE, {column: "mean" for column in metrics}),
+        "products": _count_with(df, PRODUCT, {}, count="Кількість"),
+        "equipment": _count_with(df, EQUIPMENT, {}, count="Кількість"),
+    }
+
+
+@backend_report
+def operator_stats(df, metrics):
+    """Кількість операцій та середні метрики за операторами."""
+    return _count_with(df, EMPLOYEE, {column: "mean" for column in metrics})
+
+
+@backend_report
+def equipment_utilization(df, spec, metrics=()):
+    """
+    Завантаження обладнання за період spec: stats - дні та години роботи проти
+    планових (зміна SHIFT_MINUTES у робочі дні), performance - середні metrics
+    за обладнанням, daily - кількість операцій за днями (дата x обладнання).
+    """
+    working_days = count_working_days(spec.start, spec.end)
+    expected_minutes = working_days * SHIFT_MINUTES
+
+    groups = group_index(df, EQUIPMENT)
+    distinct_days = _distinct_days(df, groups)
+    operations = group_count(groups)
+    total_minutes = group_sum(groups, df[TIME]) if TIME in df.columns else np.zeros(groups.size, dtype=np.int64)
+
+    stats = pd.DataFrame({
+        EQUIPMENT: groups.keys[EQUIPMENT],
+        "Реальні дні роботи": distinct_days,
+        "Планові дні роботи": working_days,
+        "Завантаженість (дні), %": distinct_days / working_days * 100 if working_days > 0 else 0.0,
+        "Фактичні години": total_minutes / 60,
+        "Планові години": expected_minutes / 60,
+        "Завантаженість (години), %": (
+            total_minutes / expected_minutes * 100 if expected_minutes > 0 else 0.0
+        ),
+        OPERATIONS: operations,
+        "Операцій на день": operations / distinct_days,
+    })
+
+    means = _present(df, metrics)
+    performance = None
+    if means:
+        performance = groups.keys.copy()
+        for column in means:
+            performance[column] = group_mean(groups, df[column])
+    return {
+        "working_days": working_days,
+        "stats": stats,
+        "performance": performance,
+        "daily": crosstab(df, _daily(df), EQUIPMENT).astype(float),
+    }
+
+
+def production_extremes(df, details=(EMPLOYEE, EQUIPMENT)):
+    """
+    Найшвидша та найповільніша операція кожного типу продукту (у порядку появи
+    продуктів): Тип продукту, Категорія, Час на операцію, Дата та колонки details.
+    """
+    columns = [PRODUCT, TIME, DATE] + _present(df, details)
+    rows = df[columns].dropna(subset=[PRODUCT, TIME]).reset_index(drop=True)
+    grouped = rows.groupby(PRODUCT, sort=False)[TIME]
+
+    parts = []
+    for category, positions in (("Найшвидша", grouped.idxmin()), ("Найповільніша", grouped.idxmax())):
+        part = rows.loc[positions.to_numpy()].reset_index(drop=True)
+        part.insert(1, "Категорія", category)
+        parts.append(part)
+    # Чергуємо: найшвидша, найповільніша для кожного продукту
+    extremes = pd.concat(parts).sort_index(kind="stable").reset_index(drop=True)
+    for column in details:
+        if column not in extremes.columns:
+            extremes[column] = 0 if column == PRODUCTIVITY else ""
+    return extremes
+
+
+def productivity(df, spec, details=(EMPLOYEE, EQUIPMENT)):
+    """
+    Продуктивність за період spec: days/working_days - календарні та робочі дні,
+    daily - операції, середня продуктивність, сумарні час та об'єм за днями,
+    products - те саме за типами продукту (час - середній), extremes - production_extremes.
+    """
+    return {
+        "days": (spec.end - spec.start).days + 1,
+        "working_days": count_working_days(spec.start, spec.end),
+        "daily": _count_with(df, _daily(df), {PRODUCTIVITY: "mean", TIME: "sum", VOLUME: "sum"}),
+        "products": _count_with(df, PRODUCT, {PRODUCTIVITY: "mean", TIME: "mean", VOLUME: "sum"}),
+        "extremes": production_extremes(df, details) if TIME in df.columns else None,
+    }
+
+
+def time_deviation(df):
+    """
+    Відхилення часу операцій: середнє, межі ±2σ (нижня не менша за нуль),
+    найшвидша та найповільніша операція. None, якщо часу немає.
+    """
+    times = df[TIME].dropna() if TIME in df.columns else pd.Series(dtype=float)
+    if times.empty:
+        return None
+    mean, std = times.mean(), times.std()
+    return {
+        "mean": mean,
+        "upper": mean + 2 * std,
+        "lower": max(mean - 2 * std, 0),
+        "fastest": df.loc[times.idxmin()],
+        "slowest": df.loc[times.idxmax()],
+    }
+
+
+def _daily_mean(df, column):
+    groups = group_index(df, _daily(df))
+    daily = groups.keys
+    daily[column] = group_mean(groups, df[column])
+    return daily
+
+
+@backend_report
+def quality_report(df, spec, column, by=(PRODUCT, EQUIPMENT)):
+    """
+    Якість (column - "Відсоток втрат" або "Відсоток браку"): mean/max/min,
+    daily - середнє за днями, by - {вимір: операції та середнє column}, відсортовані
+    за спаданням column; deviation - time_deviation, якщо вибрано рівно один продукт.
+    """
+    values = df[column]
+    deviation = None
+    if spec.products is not None and len(spec.products) == 1:
+        deviation = time_deviation(df[df[PRODUCT] == spec.products[0]])
+    return {
+        "mean": values.mean(),
+        "max": values.max(),
+        "min": values.min(),
+        "daily": _daily_mean(df, column),
+        "by": {
+            dimension: _count_with(df, dimension, {column: "mean"}).sort_values(column, ascending=False)
+            for dimension in by
+        },
+        "deviation": deviation,
+    }
+
+
+def daily_sketches(df, column):
+    """Скетчі розподілу column за днями та типами продукту (sketches.build)."""
+    return sketches.build(df, [DATE, PRODUCT], column)
+
+
+def distribution(df, column, by=PRODUCT):
+    """
+    Розподіл column за by для боксплоту: (stats, outliers) з sketches.box_stats -
+    квартилі, вуса та не більше sketches.TAIL викидів з кожного боку групи.
+    """
+    return sketches.box_stats(sketches.build(df, by, column))
+
+
+@backend_report
+def period_groups(df, interval):
+    """
+    Агрегати тренду за періодами interval ("День", "Тиждень", "Місяць") та обладнанням:
+    операції, дні роботи, сумарний час і, якщо є, середня продуктивність.
+    """
+    periods = df[DATE].dt.to_period(PERIOD_FREQ[interval]).rename("Період")
+    index = group_index(df, [periods, EQUIPMENT])
+
+    groups = index.keys
+    groups[OPERATIONS] = group_count(index)
+    groups[WORKING_DAYS] = _distinct_days(df, index)
+    groups[TOTAL_MINUTES] = group_sum(index, df[TIME]) if TIME in df.columns else 0.0
+    if PRODUCTIVITY in df.columns:
+        groups[PRODUCTIVITY] = group_mean(index, df[PRODUCTIVITY])
+    return groups
+
+
+def period_stats(groups):
+    """
+    Тренд завантаження обладнання з агрегатів period_groups: operations - кількість
+    операцій (період x обладнання), stats - фактичні та планові дні й хвилини роботи
+    і, якщо є продуктивність, виробіток (шт).
+    """
+    keys = groups["Період"]
+    operations = groups[["Період", EQUIPMENT, OPERATIONS]].copy()
+    operations[DATE] = keys.dt.to_timestamp()
+
+    starts = keys.dt.start_time.to_numpy().astype("datetime64[D]")
+    ends = keys.dt.end_time.to_numpy().astype("datetime64[D]")
+    working_days = np.busday_count(starts, ends + np.timedelta64(1, "D"))
+    expected_minutes = working_days * SHIFT_MINUTES
+
+    distinct_days = groups[WORKING_DAYS].to_numpy()
+    total_minutes = groups[TOTAL_MINUTES].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        day_util = np.where(working_days > 0, distinct_days / working_days * 100, 0.0)
+        minutes_util = np.where(expected_minutes > 0, total_minutes / expected_minutes * 100, 0.0)
+
+    stats = pd.DataFrame({
+        "Період": keys,
+        DATE: keys.dt.start_time,
+        EQUIPMENT: groups[EQUIPMENT],
+        "Робочі дні у періоді": working_days,
+        WORKING_DAYS: distinct_days,
+        "Завантаженість (дні), %": day_util,
+        TOTAL_MINUTES: total_minutes,
+        "Плановий час роботи (хв)": expected_minutes,
+        "Завантаженість (час), %": minutes_util,
+        OPERATIONS: groups[OPERATIONS],
+    })
+    # Виробіток = середня продуктивність за годину * години роботи
+    if PRODUCTIVITY in groups.columns:
+        stats["Виробіток (шт)"] = groups[PRODUCTIVITY].to_numpy() * (total_minutes / 60)
+    return {"operations": operations, "stats": stats}
+
+
+def period_trends(df, interval):
+    """Тренд завантаження обладнання за періодами interval (див. period_stats)."""
+    return period_stats(period_groups(df, interval))
+
+
+# ---------------------------
+# Джерело даних звітів
+# ---------------------------
+class FrameSource:
+    """
+    Дані відділу в пам'яті для сторінок: межі дат, рядки за період, значення
+    фільтрів і тренди. Те саме вміє warehouse.WarehouseSource, що виконує
+    фільтри та групування в SQLite, не завантажуючи всю історію.
+    """
+
+    def __init__(self, df, sketches=None):
+        self.df = df
+        # {колонка: daily_sketches}, побудовані один раз для ревізії даних
+        self.sketches = sketches or {}
+
+    @property
+    def empty(self):
+        return self.df.empty
+
+    def date_range(self):
+        """Перша та остання дата (NaT, якщо дат немає)."""
+        if DATE not in self.df.columns:
+            return pd.NaT, pd.NaT
+        return self.df[DATE].min(), self.df[DATE].max()
+
+    def period(self, start, end):
+        """Рядки за період start..end (див. filter_period)."""
+        return filter_period(self.df, start, end)
+
+    def options(self, column, spec):
+        """Значення column серед рядків, що проходять фільтр spec."""
+        return filter_options(apply_filters(self.df, spec), column)
+
+    def period_trends(self, spec, interval):
+        """period_trends для рядків, що проходять фільтр spec."""
+        return period_trends(apply_filters(self.df, spec), interval)
+
+    def distribution(self, column, spec):
+        """
+        distribution column за типами продукту для рядків, що проходять фільтр spec.
+        Без фільтрів обладнання та співробітника зливаються готові денні скетчі,
+        а рядки не перебираються.
+        """
+        table = self.sketches.get(column)
+        if table is None or spec.equipment is not None or spec.employee is not None:
+            return distribution(apply_filters(self.df, spec), column)
+        days = apply_filters(table.keys, FilterSpec(spec.start, spec.end, products=spec.products))
+        selected = np.zeros(table.size, dtype=bool)
+        selected[days.index] = True
+        return sketches.box_stats(sketches.merge(table, selected, PRODUCT))
@@ -4,8 +4,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 import calendar
 from datetime import datetime, date, timedelta
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import analytics
+import charts
+from analytics import FilterSpec
+from page_data import fragment, load_department_source, select_plants
+
+# Метрики відділу, що усереднюються у звітах
+METRICS = ("Час на операцію", "Відсоток втрат")
 
 # ---------------------------
 # Налаштування сторінки
@@ -16,119 +21,16 @@ st.set_page_config(
     layout="wide",
 )
 
-# ---------------------------
-# Налаштування підключення до Google Sheets
-# ---------------------------
-SHEET_ID = "1cbQtfwOR32_J7sIGuZnqmEINKrc1hqcAwAZVmOADPMA"
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["gcp_service_account"], scopes=SCOPES
-)
-service = build("sheets", "v4", credentials=credentials)
-
-# ---------------------------
-# Функція для пошуку колонки з відсотками помилок
-# ---------------------------
-def find_percentage_column(columns, target_type="втрат"):
-    """
-    Шукає колонку з назвою "Відсоток втрат" або "Відсоток браку" (ігноруючи пробіли та регістр).
-    """
-    target_map = {
-        "втрат": ["відсотоквтрат", "втрат", "відсотоквтрат%", "втрат%"],
-        "браку": ["відсотокбраку", "браку", "відсотокбраку%", "браку%"]
-    }
-    
-    targets = target_map.get(target_type, target_map["втрат"])
-    
-    for col in columns:
-        col_normalized = col.strip().lower().replace(" ", "").replace("%", "")
-        if col_normalized in targets:
-            return col
-    return None
-
-# ---------------------------
-# Общая функция для преобразования числовых колонок
-# ---------------------------
-def convert_numeric_columns(df, columns):
-    """
-    Преобразует строковые колонки в числовые, заменяя запятые на точки.
-    """
-    for col in columns:
-        if col in df.columns:
-            if df[col].dtype == object:  # Если колонка строковая
-                df[col] = df[col].astype(str).str.replace(",", ".")
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-            else:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-    return df
-
 # ---------------------------
 # Функция загрузки данных из Google Sheets по указанному листу
 # ---------------------------
-@st.cache_data
-def load_data(sheet_name):
-    try:
-        sheet = service.spreadsheets()
-        result = sheet.values().get(spreadsheetId=SHEET_ID, range=sheet_name).execute()
-        values = result.get("values", [])
-        if not values:
-            st.error("Помилка завантаження даних з Google Sheets!")
-            return pd.DataFrame()
-        
-        # Создаем DataFrame
-        df = pd.DataFrame(values[1:], columns=values[0])
-        df.columns = df.columns.str.strip()
-        
-        # Применяем переименование колонок, чтобы унифицировать имена
-        column_mapping = {
-            "Тип обладнання": "Тип обладнання",
-            "Тип продукта": "Тип продукту",
-            "Номер заказа": "Номер замовлення",
-            "Время на операцию": "Час на операцію",
-            "Процент брака": "Відсоток браку"
-        }
-        
-        for old_col, new_col in column_mapping.items():
-            if old_col in df.columns and new_col not in df.columns:
-                df.rename(columns={old_col: new_col}, inplace=True)
-        
-        # Обработка даты
-        if "Дата" in df.columns:
-            df["Дата"] = pd.to_datetime(df["Дата"], format="%d.%m.%Y", errors="coerce")
-        elif all(col in df.columns for col in ["День", "Місяць", "Рік"]):
-            # Если в данных дата разбита на составляющие части, создаем колонку Дата
-            df["Дата"] = pd.to_datetime(
-                df["День"].astype(str) + "." + df["Місяць"].astype(str) + "." + df["Рік"].astype(str),
-                format="%d.%m.%Y", errors="coerce"
-            )
-        
-        # Обработка числовых колонок
-        numeric_cols = ["Час на операцію", "Продуктивність за годину", "Кількість операторів"]
-        df = convert_numeric_columns(df, numeric_cols)
-        
-        # Поиск и обработка колонки с процентами ошибок (может называться "Відсоток втрат" или "Відсоток браку")
-        loss_col = find_percentage_column(df.columns, "втрат")
-        if loss_col:
-            df = convert_numeric_columns(df, [loss_col])
-            if "Відсоток втрат" not in df.columns:
-                df["Відсоток втрат"] = df[loss_col]
-        
-        defect_col = find_percentage_column(df.columns, "браку")
-        if defect_col:
-            df = convert_numeric_columns(df, [defect_col])
-            if "Відсоток браку" not in df.columns:
-                df["Відсоток браку"] = df[defect_col]
-        
-        # Обработка объема (если есть)
-        if "Об'єм" in df.columns:
-            # Извлекаем числовое значение из строки (например, "50мл" -> 50)
-            df["Об'єм_число"] = df["Об'єм"].str.extract(r'(\d+(?:\.\d+)?)').astype(float)
-        
-        return df
-    except Exception as e:
-        st.error(f"Помилка завантаження даних: {str(e)}")
-        return pd.DataFrame()
+def load_data(department_key, plants=None):
+    source = load_department_source(department_key, plants)
+    if source is None:
+        return analytics.FrameSource(pd.DataFrame())
+    if source.empty:
+        st.error("Помилка завантаження даних з Google Sheets!")
+    return source
 
 # ---------------------------
 # Функция для пресет-периода
@@ -160,24 +62,98 @@ def get_preset_dates(preset):
     return start, end
 
 # ---------------------------
-# Функция для подсчёта рабочих дней (понедельник-пятница)
+# Дивіантність варок продукту
 # ---------------------------
-def count_working_days(start, end):
-    num = 0
-    current = start
-    while current <= end:
-        if current.weekday() < 5:
-            num += 1
-        current += timedelta(days=1)
-    return num
+@fragment
+def show_deviant_batches(filtered_df, default_product=None):
+    # Выбор продукта перезапускает только этот блок (см. page_data.fragment)
+    products = analytics.filter_options(filtered_df, "Тип продукту")
+    if not products:
+        return
+    product_deviant = st.selectbox(
+        "Продукт для аналізу дивіантності",
+        options=products,
+        index=products.index(default_product) if default_product in products else 0,
+    )
+    st.subheader(f"Дивіантність варок для продукту: {product_deviant}")
+    
+    product_df = filtered_df[filtered_df["Тип продукту"] == product_deviant]
+    deviation = analytics.time_deviation(product_df)
+    if deviation is not None:
+        fastest = deviation["fastest"]
+        slowest = deviation["slowest"]
+        # Среднее и границы ±2σ (нижняя - не меньше нуля)
+        mean_time = deviation["mean"]
+        upper_limit = deviation["upper"]
+        lower_limit = deviation["lower"]
+
+        # При большом числе варок - плотность и выделенные варки за пределами ±2σ
+        outside_limits = ~product_df["Час на операцію"].between(lower_limit, upper_limit)
+        fig_scatter = charts.scatter_figure(
+            product_df,
+            x="Дата",
+            y="Час на операцію",
+            highlight=outside_limits,
+            hover_data=["ПІБ", "Тип обладнання"],
+            title=f"Порівняння варок за часом для продукту: {product_deviant}",
+            labels={"Час на операцію": "Час операції (хв)"},
+            color_discrete_sequence=["#3498DB"]
+        )
+
+        # Добавляем полосы для стандартных отклонений
+        fig_scatter.add_hline(
+            y=mean_time, 
+            line_dash="solid", 
+            line_color="#2C3E50",
+            line_width=2,
+            annotation_text=f"Середній час: {mean_time:.1f} хв",
+            annotation_position="top right"
+        )
+        fig_scatter.add_hline(
+            y=upper_limit, 
+            line_dash="dot", 
+            line_color="#E74C3C",
+            annotation_text="+2σ",
+            annotation_position="top right"
+        )
+        fig_scatter.add_hline(
+            y=lower_limit, 
+            line_dash="dot", 
+            line_color="#2ECC71",
+            annotation_text="-2σ",
+            annotation_position="top right"
+        )
+
+        fig_scatter.add_scatter(
+            x=[fastest["Дата"]],
+            y=[fastest["Час на операцію"]],
+            mode="markers",
+            marker=dict(size=15, color="#2ECC71", symbol="star-triangle-up"),
+            name="Найшвидша варка"
+        )
+
+        fig_scatter.add_scatter(
+            x=[slowest["Дата"]],
+            y=[slowest["Час на операцію"]],
+            mode="markers",
+            marker=dict(size=15, color="#E74C3C", symbol="star-triangle-down"),
+            name="Найповільніша варка"
+        )
+
+        fig_scatter.update_layout(
+            plot_bgcolor='rgba(240,240,240,0.8)',
+            xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
+            yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
+            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+        )
+        charts.show(fig_scatter)
 
 # ---------------------------
 # Загрузка данных
 # ---------------------------
-sheet_name = "варка"
-df = load_data(sheet_name)
+source = load_data("варка", select_plants())
 
-if df.empty:
+if source.empty:
     st.warning("Дані відсутні або не завантажені.")
 else:
     # ---------------------------
@@ -205,9 +181,10 @@ else:
         start_date, end_date = get_preset_dates(selected_preset)
         st.sidebar.write(f"Період: {start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}")
     else:
-        if pd.notnull(df["Дата"].min()) and pd.notnull(df["Дата"].max()):
-            min_date = df["Дата"].min().date()
-            max_date = df["Дата"].max().date()
+        first_date, last_date = source.date_range()
+        if pd.notnull(first_date) and pd.notnull(last_date):
+            min_date = first_date.date()
+            max_date = last_date.date()
         else:
             min_date = max_date = date.today()
         date_cols = st.sidebar.columns(2)
@@ -216,42 +193,47 @@ else:
     
     if start_date > end_date:
         st.sidebar.error("Начало періоду не може бути пізніше, ніж кінець.")
-        filtered_df = pd.DataFrame()
-    else:
-        filtered_df = df[(df["Дата"] >= pd.to_datetime(start_date)) & (df["Дата"] <= pd.to_datetime(end_date))]
+    filtered_df = source.period(start_date, end_date)
     
     # Дополнительные фильтры
     st.sidebar.markdown("---")
+    selected_products = selected_equipments = None
+    selected_employee = None
     
     # Фильтр по продукту (если имеются данные)
-    unique_products = sorted(filtered_df["Тип продукту"].dropna().unique().tolist())
+    unique_products = analytics.filter_options(filtered_df, "Тип продукту")
     if unique_products:
         all_products = ["Усі"] + unique_products
-        selected_products = st.sidebar.multiselect("Оберіть продукт", options=all_products, default=["Усі"])
-        if "Усі" not in selected_products:
-            filtered_df = filtered_df[filtered_df["Тип продукту"].isin(selected_products)]
+        selected = st.sidebar.multiselect("Оберіть продукт", options=all_products, default=["Усі"])
+        if "Усі" not in selected:
+            selected_products = tuple(selected)
+            filtered_df = analytics.filter_values(filtered_df, "Тип продукту", selected_products)
     else:
         st.sidebar.info("Немає доступних продуктів за вибраний період.")
     
     # Фильтр по оборудованию (если имеются данные)
-    unique_equipments = sorted(filtered_df["Тип обладнання"].dropna().unique().tolist())
+    unique_equipments = analytics.filter_options(filtered_df, "Тип обладнання")
     if unique_equipments:
         all_equipments = ["Усі"] + unique_equipments
-        selected_equipments = st.sidebar.multiselect("Оберіть обладнання", options=all_equipments, default=["Усі"])
-        if "Усі" not in selected_equipments:
-            filtered_df = filtered_df[filtered_df["Тип обладнання"].isin(selected_equipments)]
+        selected = st.sidebar.multiselect("Оберіть обладнання", options=all_equipments, default=["Усі"])
+        if "Усі" not in selected:
+            selected_equipments = tuple(selected)
+            filtered_df = analytics.filter_values(filtered_df, "Тип обладнання", selected_equipments)
     else:
         st.sidebar.info("Немає доступного обладнання за вибраний період.")
     
     # Фильтр по співробітнику (если имеются данные)
-    unique_employees = sorted(filtered_df["ПІБ"].dropna().unique().tolist())
+    unique_employees = analytics.filter_options(filtered_df, "ПІБ")
     if unique_employees:
-        selected_employee = st.sidebar.selectbox("Оберіть співробітника", options=["Усі"] + unique_employees)
-        if selected_employee != "Усі":
+        selected = st.sidebar.selectbox("Оберіть співробітника", options=["Усі"] + unique_employees)
+        if selected != "Усі":
+            selected_employee = selected
             filtered_df = filtered_df[filtered_df["ПІБ"] == selected_employee]
     else:
         st.sidebar.info("Немає даних про співробітників за вибраний період.")
     
+    spec = FilterSpec(start_date, end_date, selected_products, selected_equipments, selected_employee)
+    
     # ---------------------------
     # Контент в зависимости от выбранного отчета
     # ---------------------------
@@ -261,11 +243,11 @@ else:
     st.markdown("---")
     
     # Общие KPI для всех отчетов
-    total_batches = len(filtered_df)
-    avg_loss = filtered_df["Відсоток втрат"].mean() if total_batches > 0 and "Відсоток втрат" in filtered_df.columns else 0
-    avg_time = filtered_df["Час на операцію"].mean() if total_batches > 0 and "Час на операцію" in filtered_df.columns else 0
-    unique_emp_count = filtered_df["ПІБ"].nunique() if total_batches > 0 and "ПІБ" in filtered_df.columns else 0
-    avg_ops_per_employee = total_batches / unique_emp_count if unique_emp_count > 0 else 0
+    kpi = analytics.summary(filtered_df, METRICS)
+    total_batches = kpi["Кількість операцій"]
+    avg_loss = kpi["Відсоток втрат"]
+    avg_time = kpi["Час на операцію"]
+    avg_ops_per_employee = kpi["Операцій на співробітника"]
     
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Кількість операцій", total_batches)
@@ -278,24 +260,9 @@ else:
         st.subheader("Загальний огляд виробництва")
         
         # График трендов по дням
+        overview = analytics.overview_trends(filtered_df, METRICS)
         if not filtered_df.empty:
-            # Формируем словарь агрегаций только для колонок, которые существуют
-            agg_dict = {}
-            if "Час на операцію" in filtered_df.columns:
-                agg_dict["Час на операцію"] = "mean"
-            if "Відсоток втрат" in filtered_df.columns:
-                agg_dict["Відсоток втрат"] = "mean"
-            
-            # Для подсчета количества операций используем size()
-            trend_count = filtered_df.groupby("Дата").size().reset_index(name="Кількість операцій")
-            
-            # Если есть другие метрики, добавляем их
-            if agg_dict:
-                trend_metrics = filtered_df.groupby("Дата", as_index=False).agg(agg_dict)
-                # Объединяем результаты
-                trend_data = pd.merge(trend_count, trend_metrics, on="Дата", how="left")
-            else:
-                trend_data = trend_count
+            trend_data = overview["trend"]
                 
             tabs = st.tabs(["Кількість операцій", "Час на операцію", "Втрати"])
             
@@ -321,7 +288,7 @@ else:
                     xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig1, use_container_width=True)
+                charts.show(fig1)
             
             with tabs[1]:
                 if "Час на операцію" in trend_data.columns:
@@ -338,7 +305,7 @@ else:
                         xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                         yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                     )
-                    st.plotly_chart(fig2, use_container_width=True)
+                    charts.show(fig2)
                 else:
                     st.warning("Немає даних про час операцій.")
             
@@ -357,7 +324,7 @@ else:
                         xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                         yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                     )
-                    st.plotly_chart(fig3, use_container_width=True)
+                    charts.show(fig3)
                 else:
                     st.warning("Немає даних про відсоток втрат.")
         else:
@@ -369,7 +336,7 @@ else:
         with cols[0]:
             st.subheader("Розподіл по типу продукту")
             if "Тип продукту" in filtered_df.columns and not filtered_df.empty:
-                prod_count = filtered_df.groupby("Тип продукту").size().reset_index(name="Кількість")
+                prod_count = overview["products"]
                 fig_prod = px.pie(
                     prod_count,
                     names="Тип продукту",
@@ -380,14 +347,14 @@ else:
                 )
                 fig_prod.update_traces(textposition='inside', textinfo='percent+label')
                 fig_prod.update_layout(legend=dict(orientation="h", y=-0.2))
-                st.plotly_chart(fig_prod, use_container_width=True)
+                charts.show(fig_prod)
             else:
                 st.warning("Немає даних про типи продуктів.")
         
         with cols[1]:
             st.subheader("Розподіл по обладнанню")
             if "Тип обладнання" in filtered_df.columns and not filtered_df.empty:
-                eq_count = filtered_df.groupby("Тип обладнання").size().reset_index(name="Кількість")
+                eq_count = overview["equipment"]
                 fig_eq = px.pie(
                     eq_count,
                     names="Тип обладнання",
@@ -398,7 +365,7 @@ else:
                 )
                 fig_eq.update_traces(textposition='inside', textinfo='percent+label')
                 fig_eq.update_layout(legend=dict(orientation="h", y=-0.2))
-                st.plotly_chart(fig_eq, use_container_width=True)
+                charts.show(fig_eq)
             else:
                 st.warning("Немає даних про типи обладнання.")
                 
@@ -407,24 +374,7 @@ else:
         
         if not filtered_df.empty and "ПІБ" in filtered_df.columns:
             # Агрегация данных по операторам
-            # Проверяем наличие колонок перед агрегацией
-            agg_dict = {}
-            
-            # Используем size() для подсчета количества записей
-            operator_count = filtered_df.groupby("ПІБ").size().reset_index(name="Кількість операцій")
-            
-            # Агрегируем остальные числовые показатели, если они есть
-            if "Час на операцію" in filtered_df.columns:
-                agg_dict["Час на операцію"] = "mean"
-            if "Відсоток втрат" in filtered_df.columns:
-                agg_dict["Відсоток втрат"] = "mean"
-            
-            if agg_dict:
-                operator_metrics = filtered_df.groupby("ПІБ", as_index=False).agg(agg_dict)
-                # Объединяем результаты
-                operator_stats = pd.merge(operator_count, operator_metrics, on="ПІБ", how="left")
-            else:
-                operator_stats = operator_count
+            operator_stats = analytics.operator_stats(filtered_df, METRICS)
             
             # Визуализация эффективности операторов
             st.subheader("Кількість операцій по операторам")
@@ -448,7 +398,7 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_count, use_container_width=True)
+            charts.show(fig_count)
             
             # Время на операцию
             if "Час на операцію" in operator_stats.columns:
@@ -474,7 +424,7 @@ else:
                     xaxis=dict(showgrid=False),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig_time, use_container_width=True)
+                charts.show(fig_time)
             
             # Процент потерь
             if "Відсоток втрат" in operator_stats.columns:
@@ -500,7 +450,7 @@ else:
                     xaxis=dict(showgrid=False),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig_loss, use_container_width=True)
+                charts.show(fig_loss)
             
             # Таблица для сводки
             st.subheader("Зведена таблиця показників операторів")
@@ -533,50 +483,20 @@ else:
         st.subheader("Аналіз завантаження обладнання")
         
         if "Тип обладнання" in filtered_df.columns and not filtered_df.empty:
-            # Расчет ожидаемых рабочих дней
-            working_days = count_working_days(start_date, end_date)
-            expected_minutes = working_days * 480  # 8 часов * 60 минут
-            
-            # Общая статистика по оборудованию
-            equipment_stats = []
-            
-            for equip, group in filtered_df.groupby("Тип обладнання"):
-                distinct_days = group["Дата"].dt.date.nunique()
-                total_minutes = group["Час на операцію"].sum() if "Час на операцію" in group.columns else 0
-                operations_count = len(group)
-                
-                day_util_pct = (distinct_days / working_days) * 100 if working_days > 0 else 0
-                minutes_util_pct = (total_minutes / expected_minutes) * 100 if expected_minutes > 0 else 0
-                
-                equipment_stats.append({
-                    "Тип обладнання": equip,
-                    "Реальні дні роботи": distinct_days,
-                    "Планові дні роботи": working_days,
-                    "Завантаженість (дні), %": f"{day_util_pct:.1f}%",
-                    "Фактичні години": total_minutes / 60,
-                    "Планові години": expected_minutes / 60,
-                    "Завантаженість (години), %": f"{minutes_util_pct:.1f}%",
-                    "Кількість операцій": operations_count,
-                    "Операцій на день": operations_count / distinct_days if distinct_days > 0 else 0
-                })
-            
-            equipment_df = pd.DataFrame(equipment_stats)
+            # Расчет загрузки относительно плановых смен в рабочие дни
+            utilization = analytics.equipment_utilization(filtered_df, spec)
+            equipment_df = utilization["stats"]
             
-            # Отображение полной таблицы
-            st.dataframe(equipment_df)
+            # Отображение полной таблицы (проценты - строками "12.3%")
+            percent_columns = ["Завантаженість (дні), %", "Завантаженість (години), %"]
+            st.dataframe(equipment_df.assign(**{
+                column: equipment_df[column].map("{:.1f}%".format) for column in percent_columns
+            }))
             
             # Визуализация загрузки оборудования по дням
-            equipment_df_sorted = equipment_df.copy()
-            try:
-                equipment_df_sorted["Завантаженість (дні), %"] = equipment_df_sorted["Завантаженість (дні), %"].str.rstrip("%").astype(float)
-            except Exception:
-                # Если преобразование не удалось, используем оригинальные значения
-                st.warning("Помилка при перетворенні відсотків завантаженості в числа")
-                # Создаем числовую колонку напрямую из day_util_pct
-                equipment_df_sorted["Завантаженість (дні), %_num"] = [float(str(e).rstrip("%")) if isinstance(e, str) else e for e in equipment_df_sorted["Завантаженість (дні), %"]]
-                equipment_df_sorted = equipment_df_sorted.sort_values("Завантаженість (дні), %_num", ascending=False)
-            else:
-                equipment_df_sorted = equipment_df_sorted.sort_values("Завантаженість (дні), %", ascending=False)
+            equipment_df_sorted = equipment_df.assign(**{
+                "Завантаженість (дні), %": equipment_df["Завантаженість (дні), %"].round(1)
+            }).sort_values("Завантаженість (дні), %", ascending=False)
             
             fig_days = px.bar(
                 equipment_df_sorted,
@@ -595,12 +515,11 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)', range=[0, 110])
             )
-            st.plotly_chart(fig_days, use_container_width=True)
+            charts.show(fig_days)
             
             # Тепловая карта оборудования по дням
             if not filtered_df.empty:
-                eq_daily = filtered_df.groupby([filtered_df["Дата"].dt.date, "Тип обладнання"]).size().reset_index(name="Операцій")
-                eq_daily_pivot = eq_daily.pivot(index="Дата", columns="Тип обладнання", values="Операцій").fillna(0)
+                eq_daily_pivot = utilization["daily"]
 
                 # Преобразование в формат для heatmap
                 dates = eq_daily_pivot.index.tolist()
@@ -625,7 +544,7 @@ else:
                     plot_bgcolor='rgba(240,240,240,0.8)',
                 )
                 
-                st.plotly_chart(fig_heatmap, use_container_width=True)
+                charts.show(fig_heatmap)
         else:
             st.warning("Немає даних для аналізу завантаження обладнання.")
             
@@ -634,8 +553,9 @@ else:
         
         if not filtered_df.empty:
             # Расчет временных показателей
-            days_in_period = (end_date - start_date).days + 1
-            working_days = count_working_days(start_date, end_date)
+            production = analytics.productivity(filtered_df, spec)
+            days_in_period = production["days"]
+            working_days = production["working_days"]
             
             # Расчет производительности
             productivity_per_day = total_batches / days_in_period if days_in_period > 0 else 0
@@ -647,7 +567,7 @@ else:
             col3.metric("Продуктивність у робочі дні", f"{productivity_per_working_day:.1f} операцій/день")
             
             # Анализ производительности по дням
-            daily_data = filtered_df.groupby(filtered_df["Дата"].dt.date).size().reset_index(name="Кількість операцій")
+            daily_data = production["daily"]
             
             # Визуализация продуктивности по дням
             fig_daily = px.bar(
@@ -675,10 +595,10 @@ else:
                 xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_daily, use_container_width=True)
+            charts.show(fig_daily)
             
             # Анализ продуктивности по продуктам
-            product_ops = filtered_df.groupby("Тип продукту").size().reset_index(name="Кількість операцій")
+            product_ops = production["products"]
             product_ops_sorted = product_ops.sort_values("Кількість операцій", ascending=False)
             
             fig_prod = px.bar(
@@ -712,13 +632,13 @@ else:
                 height=500,  # Увеличиваем высоту для лучшей читаемости
                 margin=dict(b=100)  # Увеличиваем нижний отступ для меток
             )
-            st.plotly_chart(fig_prod, use_container_width=True)
+            charts.show(fig_prod)
             
             # Время операций - если доступно
             if "Час на операцію" in filtered_df.columns:
                 st.subheader("Аналіз часу операцій")
                 
-                product_time = filtered_df.groupby("Тип продукту", as_index=False)["Час на операцію"].mean()
+                product_time = production["products"][["Тип продукту", "Час на операцію"]]
                 product_time_sorted = product_time.sort_values("Час на операцію")
                 
                 fig_time = px.bar(
@@ -752,7 +672,7 @@ else:
                     height=500,  # Увеличиваем высоту для лучшей читаемости
                     margin=dict(b=100)  # Увеличиваем нижний отступ для меток
                 )
-                st.plotly_chart(fig_time, use_container_width=True)
+                charts.show(fig_time)
                 
                 # Гистограмма распределения времени операций
                 fig_hist = px.histogram(
@@ -769,31 +689,13 @@ else:
                     xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig_hist, use_container_width=True)
+                charts.show(fig_hist)
                 
                 # Новый отчет: Самые быстрые и медленные варки по типам продукта
                 st.subheader("Найшвидші та найповільніші варки за типами продукту")
                 
-                # Создаем DataFrame для хранения минимального и максимального времени операции
-                product_time_minmax = pd.DataFrame()
-                
-                # Для каждого типа продукта находим минимальное и максимальное время
-                for product_type in filtered_df["Тип продукту"].unique():
-                    product_data = filtered_df[filtered_df["Тип продукту"] == product_type]
-                    if len(product_data) > 0:
-                        # Получаем данные для самой быстрой и самой медленной варки
-                        fastest = product_data.loc[product_data["Час на операцію"].idxmin()]
-                        slowest = product_data.loc[product_data["Час на операцію"].idxmax()]
-                        
-                        # Добавляем данные в DataFrame
-                        product_time_minmax = pd.concat([product_time_minmax, pd.DataFrame({
-                            "Тип продукту": [product_type, product_type],
-                            "Категорія": ["Найшвидша", "Найповільніша"],
-                            "Час на операцію": [fastest["Час на операцію"], slowest["Час на операцію"]],
-                            "Дата": [fastest["Дата"], slowest["Дата"]],
-                            "ПІБ": [fastest["ПІБ"], slowest["ПІБ"]] if "ПІБ" in fastest else ["", ""],
-                            "Тип обладнання": [fastest["Тип обладнання"], slowest["Тип обладнання"]] if "Тип обладнання" in fastest else ["", ""]
-                        })])
+                # Минимальное и максимальное время операции по каждому типу продукта
+                product_time_minmax = production["extremes"]
                 
                 # Если есть данные, строим визуализацию
                 if len(product_time_minmax) > 0:
@@ -836,7 +738,7 @@ else:
                         height=500,  # Увеличиваем высоту для лучшей читаемости
                         margin=dict(b=100)  # Увеличиваем нижний отступ для меток
                     )
-                    st.plotly_chart(fig_minmax, use_container_width=True)
+                    charts.show(fig_minmax)
                     
                     # Таблица с деталями
                     st.subheader("Деталі найшвидших та найповільніших варок")
@@ -849,9 +751,10 @@ else:
         
         if "Відсоток втрат" in filtered_df.columns and not filtered_df.empty:
             # Статистика по потерям
-            avg_loss = filtered_df["Відсоток втрат"].mean()
-            max_loss = filtered_df["Відсоток втрат"].max()
-            min_loss = filtered_df["Відсоток втрат"].min()
+            quality = analytics.quality_report(filtered_df, spec, "Відсоток втрат")
+            avg_loss = quality["mean"]
+            max_loss = quality["max"]
+            min_loss = quality["min"]
             
             col1, col2, col3 = st.columns(3)
             col1.metric("Середній відсоток втрат", f"{avg_loss:.2f}%")
@@ -859,7 +762,7 @@ else:
             col3.metric("Мінімальний відсоток втрат", f"{min_loss:.2f}%")
             
             # Анализ потерь по дням
-            daily_loss = filtered_df.groupby(filtered_df["Дата"].dt.date)["Відсоток втрат"].mean().reset_index()
+            daily_loss = quality["daily"]
             
             fig_daily = px.line(
                 daily_loss,
@@ -886,11 +789,10 @@ else:
                 xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_daily, use_container_width=True)
+            charts.show(fig_daily)
             
             # Анализ втрат по продуктам
-            product_loss = filtered_df.groupby("Тип продукту", as_index=False)["Відсоток втрат"].mean()
-            product_loss_sorted = product_loss.sort_values("Відсоток втрат", ascending=False)
+            product_loss_sorted = quality["by"]["Тип продукту"]
             
             fig_prod = px.bar(
                 product_loss_sorted,
@@ -931,11 +833,10 @@ else:
                 height=500,  # Увеличиваем высоту для лучшей читаемости
                 margin=dict(b=100)  # Увеличиваем нижний отступ для меток
             )
-            st.plotly_chart(fig_prod, use_container_width=True)
+            charts.show(fig_prod)
             
             # Анализ втрат по оборудованию
-            equip_loss = filtered_df.groupby("Тип обладнання", as_index=False)["Відсоток втрат"].mean()
-            equip_loss_sorted = equip_loss.sort_values("Відсоток втрат", ascending=False)
+            equip_loss_sorted = quality["by"]["Тип обладнання"]
             
             fig_equip = px.bar(
                 equip_loss_sorted,
@@ -976,22 +877,18 @@ else:
                 height=500,  # Увеличиваем высоту для лучшей читаемости
                 margin=dict(b=100)  # Увеличиваем нижний отступ для меток
             )
-            st.plotly_chart(fig_equip, use_container_width=True)
+            charts.show(fig_equip)
             
-            # Боксплот распределения втрат по типам продукции
-            fig_box = px.box(
-                filtered_df,
-                x="Тип продукту",
-                y="Відсоток втрат",
-                color="Тип продукту",
-                title="Розподіл відсотка втрат за типами продукції",
-                points="all"
+            # Боксплот распределения втрат по типам продукции: квартили из скетчей и выбросы
+            box_stats, box_outliers = source.distribution("Відсоток втрат", spec)
+            fig_box = charts.box_figure(
+                box_stats, box_outliers, "Тип продукту", "Розподіл відсотка втрат за типами продукції"
             )
             
             # Улучшаем отображение длинных названий продуктов
             max_label_length = 15  # Максимальная длина метки
             product_labels = {}
-            for i, product in enumerate(filtered_df["Тип продукту"].unique()):
+            for i, product in enumerate(box_stats["Тип продукту"]):
                 if len(product) > max_label_length:
                     short_name = product[:max_label_length] + "..."
                     product_labels[product] = short_name
@@ -1003,86 +900,16 @@ else:
                 xaxis=dict(
                     showgrid=False,
                     tickmode='array',
-                    tickvals=list(range(len(filtered_df["Тип продукту"].unique()))),
-                    ticktext=[product_labels.get(p, p) for p in filtered_df["Тип продукту"].unique()],
+                    tickvals=list(range(len(box_stats))),
+                    ticktext=[product_labels.get(p, p) for p in box_stats["Тип продукту"]],
                 ),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                 height=500,  # Увеличиваем высоту для лучшей читаемости
                 margin=dict(b=100)  # Увеличиваем нижний отступ для меток
             )
-            st.plotly_chart(fig_box, use_container_width=True)
+            charts.show(fig_box)
             
-            # Дивіантність варок для конкретного продукта (если выбран)
-            if "Усі" not in selected_products and len(selected_products) == 1:
-                product_deviant = selected_products[0]
-                st.subheader(f"Дивіантність варок для продукту: {product_deviant}")
-                
-                product_df = filtered_df[filtered_df["Тип продукту"] == product_deviant]
-                if not product_df.empty and "Час на операцію" in product_df.columns:
-                    fastest = product_df.loc[product_df["Час на операцію"].idxmin()]
-                    slowest = product_df.loc[product_df["Час на операцію"].idxmax()]
-                    # Расчет средней и стандартного отклонения
-                    mean_time = product_df["Час на операцію"].mean()
-                    std_time = product_df["Час на операцію"].std()
-                    upper_limit = mean_time + 2 * std_time
-                    lower_limit = max(mean_time - 2 * std_time, 0)  # Не меньше нуля
-                
-                    fig_scatter = px.scatter(
-                        product_df,
-                        x="Дата",
-                        y="Час на операцію",
-                        hover_data=["ПІБ", "Тип обладнання"],
-                        title=f"Порівняння варок за часом для продукту: {product_deviant}",
-                        labels={"Час на операцію": "Час операції (хв)"},
-                        color_discrete_sequence=["#3498DB"]
-                    )
-                
-                    # Добавляем полосы для стандартных отклонений
-                    fig_scatter.add_hline(
-                        y=mean_time, 
-                        line_dash="solid", 
-                        line_color="#2C3E50",
-                        line_width=2,
-                        annotation_text=f"Середній час: {mean_time:.1f} хв",
-                        annotation_position="top right"
-                    )
-                    fig_scatter.add_hline(
-                        y=upper_limit, 
-                        line_dash="dot", 
-                        line_color="#E74C3C",
-                        annotation_text="+2σ",
-                        annotation_position="top right"
-                    )
-                    fig_scatter.add_hline(
-                        y=lower_limit, 
-                        line_dash="dot", 
-                        line_color="#2ECC71",
-                        annotation_text="-2σ",
-                        annotation_position="top right"
-                    )
-                    
-                    fig_scatter.add_scatter(
-                        x=[fastest["Дата"]],
-                        y=[fastest["Час на операцію"]],
-                        mode="markers",
-                        marker=dict(size=15, color="#2ECC71", symbol="star-triangle-up"),
-                        name="Найшвидша варка"
-                    )
-                    
-                    fig_scatter.add_scatter(
-                        x=[slowest["Дата"]],
-                        y=[slowest["Час на операцію"]],
-                        mode="markers",
-                        marker=dict(size=15, color="#E74C3C", symbol="star-triangle-down"),
-                        name="Найповільніша варка"
-                    )
-                    
-                    fig_scatter.update_layout(
-                        plot_bgcolor='rgba(240,240,240,0.8)',
-                        xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
-                        yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
-                        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
-                    )
-                    st.plotly_chart(fig_scatter, use_container_width=True)
+            # Дивіантність варок: свій вибір продукту, перезапускається окремо від звіту
+            show_deviant_batches(filtered_df, spec.products[0] if spec.products and len(spec.products) == 1 else None)
         else:
             st.warning("Немає даних для аналізу якості та втрат.")
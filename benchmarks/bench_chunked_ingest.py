@@ -0,0 +1,63 @@
+"""
+Порівняння способів завантаження великого листа через фейковий Sheets API:
+один запит, блоки з розбором у потоках і блоки з розбором у процесах.
+
+Запуск:
+    python benchmarks/bench_chunked_ingest.py --rows 200000
+
+Фейковий сервер працює в окремому процесі, щоб його серіалізація JSON
+не конкурувала за GIL з клієнтом. Прискорення від процесів можливе лише
+на машині з кількома ядрами - кількість ядер виводиться разом з результатами.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--chunk-rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from google.auth.credentials import AnonymousCredentials
+
+    import data_loader
+    from fake_sheets_server import start_in_process
+    from generate_production_data import generate_sheet
+    from sheets_client import SheetsClient, TokenBucket
+
+    server, endpoint = start_in_process({"ФАСОВКА": generate_sheet("ФАСОВКА", args.rows)})
+
+    client = SheetsClient(AnonymousCredentials(), api_endpoint=endpoint, rate_limiter=TokenBucket(60000))
+    variants = [
+        ("один запит", dict(chunk_rows=args.rows + 1, parse_in_processes=False)),
+        ("блоки, розбір у потоках", dict(chunk_rows=args.chunk_rows, parse_in_processes=False)),
+        ("блоки, розбір у процесах", dict(chunk_rows=args.chunk_rows, parse_in_processes=True)),
+    ]
+
+    # Пул процесів запускається один раз на процес Streamlit - не враховуємо його старт
+    data_loader.MAX_PARSE_PROCESSES = max(2, os.cpu_count() or 1)
+    pool = data_loader._get_parse_pool()
+    pool.submit(int).result()
+
+    print(f"Рядків: {args.rows}, блок: {args.chunk_rows}, ядер: {os.cpu_count()}")
+    for name, kwargs in variants:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            df, _ = data_loader.load_sheet(client, "bench", "ФАСОВКА", column_span="A:M", **kwargs)
+            timings.append(time.perf_counter() - started)
+        print(f"{name:<28} {min(timings):7.2f} с  ({len(df)} рядків)")
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
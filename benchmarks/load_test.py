@@ -0,0 +1,315 @@
+"""
+Навантажувальний тест: N одночасних сесій перемикають періоди, звіти та фільтри.
+
+Запуск:
+    python benchmarks/load_test.py --sessions 1 4 8 16 --clicks 20 --rows 10000
+    python benchmarks/load_test.py --sessions 8 --think 0   # без пауз - межа пропускної здатності
+
+Для кожного N піднімається свіжий сервер `streamlit run app.py` з даними з фейкового
+Sheets API (tools/fake_sheets_server.py). Сесії - websocket-клієнти, що говорять з
+сервером тим самим протоколом BackMsg/ForwardMsg, що й браузер, тож кеші, пул
+завантаження заводів і GIL спільні, як у продакшені. Сесії розподіляються між
+сторінками по черзі; кожен "клік" - випадкове значення випадкового віджета
+(radio, selectbox, multiselect) і перезапуск сторінки.
+
+Звіт: перцентилі часу перезапуску (від надсилання до script_finished), пропускна
+здатність, CPU сервера на сесію та приріст RSS на сесію. CPU і пам'ять процесу
+читаються з /proc, тож тест працює лише на Linux. Результати зберігаються в
+benchmarks/results/load-<час>-<коміт>.json.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+from run_benchmarks import RESULTS_DIR, ROOT, environment
+
+# Віджети, які "клацає" сесія
+CLICKABLE = ("radio", "selectbox", "multiselect")
+ALL_OPTION = "Усі"
+PERCENTILES = (50, 90, 95, 99)
+STARTUP_TIMEOUT = 60  # секунди
+RERUN_TIMEOUT = 600   # секунди
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_streamlit(sheets_endpoint):
+    """Запускає `streamlit run app.py` на вільному порту; повертає (процес, порт)."""
+    port = free_port()
+    env = dict(os.environ, SHEETS_API_ENDPOINT=sheets_endpoint)
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "app.py"),
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.fileWatcherType", "none",
+            "--browser.gatherUsageStats", "false",
+        ],
+        env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.read() == b"ok":
+                    return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"streamlit не запустився за {STARTUP_TIMEOUT} с")
+
+
+def process_usage(pid):
+    """CPU (секунди user+system) та RSS (МБ) процесу з /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    return cpu, rss_kb / 1024
+
+
+class Session:
+    """Одна вкладка браузера: websocket, стан віджетів і сторінка, яку вона переглядає."""
+
+    def __init__(self, port, rng):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.rng = rng
+        self.page_hash = ""
+        self.pages = {}
+        self.widgets = {}   # label -> (тип, id, варіанти)
+        self.choices = {}   # label -> вибране значення (рядок або список для multiselect)
+        self.errors = 0
+        self.connection = None
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, max_message_size=1 << 30)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+    def _widget_states(self):
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.page_script_hash = self.page_hash
+        for label, value in self.choices.items():
+            if label not in self.widgets:
+                continue
+            kind, widget_id, options = self.widgets[label]
+            state = WidgetState(id=widget_id)
+            if kind == "multiselect":
+                state.int_array_value.data.extend(options.index(v) for v in value if v in options)
+            elif value in options:
+                state.int_value = options.index(value)
+            else:
+                continue
+            client_state.widget_states.widgets.append(state)
+        return message
+
+    async def rerun(self):
+        """Перезапускає сторінку з поточним станом віджетів; повертає час до script_finished."""
+        started = time.perf_counter()
+        await self.connection.write_message(self._widget_states().SerializeToString(), binary=True)
+        widgets = {}
+        while True:
+            data = await asyncio.wait_for(self.connection.read_message(), RERUN_TIMEOUT)
+            if data is None:
+                raise ConnectionError("сервер закрив з'єднання")
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            kind = message.WhichOneof("type")
+            if kind == "new_session":
+                self.pages = {page.page_name: page.page_script_hash for page in message.new_session.app_pages}
+            elif kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                element = message.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    self.errors += 1
+                elif element_type in CLICKABLE:
+                    widget = getattr(element, element_type)
+                    widgets[widget.label] = (element_type, widget.id, list(widget.options))
+            elif kind == "script_finished":
+                status = message.script_finished
+                if status == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if status != ForwardMsg.FINISHED_SUCCESSFULLY:
+                    self.errors += 1
+                self.widgets = widgets
+                return time.perf_counter() - started
+
+    async def open_page(self, page_name):
+        """Перший запуск (головна сторінка), далі перехід на page_name."""
+        await self.rerun()
+        if page_name in self.pages and self.pages[page_name] != self.page_hash:
+            self.page_hash = self.pages[page_name]
+            self.choices = {}
+            await self.rerun()
+
+    def click(self):
+        """Випадкове значення випадкового віджета сторінки."""
+        label = self.rng.choice(sorted(self.widgets))
+        kind, _, options = self.widgets[label]
+        if kind == "multiselect":
+            values = [option for option in options if option != ALL_OPTION]
+            if ALL_OPTION in options and (not values or self.rng.random() < 0.5):
+                self.choices[label] = [ALL_OPTION]
+            else:
+                self.choices[label] = self.rng.sample(values, min(len(values), self.rng.randint(1, 2)))
+        else:
+            self.choices[label] = self.rng.choice(options)
+
+
+async def discover_pages(port):
+    session = Session(port, random.Random(0))
+    await session.connect()
+    try:
+        await session.rerun()
+        return list(session.pages)
+    finally:
+        session.close()
+
+
+async def warm_up(port, pages):
+    """Одна сесія відкриває всі сторінки: дані завантажуються в кеш до вимірювань."""
+    session = Session(port, random.Random(0))
+    await session.connect()
+    try:
+        for page in pages:
+            await session.open_page(page)
+    finally:
+        session.close()
+
+
+async def run_session(session, page, clicks, think, start_event, latencies):
+    await session.connect()
+    await session.open_page(page)
+    await start_event.wait()
+    for _ in range(clicks):
+        if think > 0:
+            await asyncio.sleep(session.rng.uniform(0, 2 * think))
+        if not session.widgets:
+            break
+        session.click()
+        latencies.append(await session.rerun())
+
+
+async def load_round(port, pid, sessions, clicks, think, seed):
+    pages = await discover_pages(port)
+    await warm_up(port, pages)
+    cpu_before, rss_before = process_usage(pid)
+
+    start_event = asyncio.Event()
+    latencies = []
+    clients = [Session(port, random.Random(seed + i)) for i in range(sessions)]
+    tasks = [
+        asyncio.create_task(run_session(client, pages[i % len(pages)], clicks, think, start_event, latencies))
+        for i, client in enumerate(clients)
+    ]
+    # Чекаємо, доки всі сесії відкриють свої сторінки, і стартуємо кліки одночасно
+    while sum(1 for client in clients if client.widgets) < sessions and not any(t.done() for t in tasks):
+        await asyncio.sleep(0.05)
+    cpu_started, _ = process_usage(pid)
+    started = time.perf_counter()
+    start_event.set()
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for client in clients:
+            client.close()
+    elapsed = time.perf_counter() - started
+    cpu_after, rss_after = process_usage(pid)
+
+    result = {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": sum(client.errors for client in clients),
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0,
+        "cpu_per_session": (cpu_after - cpu_started) / sessions,
+        "cpu_utilization": (cpu_after - cpu_started) / elapsed if elapsed > 0 else 0,
+        "open_cpu_per_session": (cpu_started - cpu_before) / sessions,
+        "rss_baseline_mb": rss_before,
+        "rss_mb": rss_after,
+        "rss_per_session_mb": (rss_after - rss_before) / sessions,
+    }
+    if latencies:
+        for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+            result[f"p{p}"] = float(value)
+        result["max"] = max(latencies)
+    return result
+
+
+def print_result(result):
+    latency = "  ".join(f"p{p} {result.get(f'p{p}', float('nan')):6.2f}" for p in PERCENTILES)
+    print(
+        f"{result['sessions']:>4} сесій  {result['reruns']:>5} перезапусків  помилок {result['errors']:<3} "
+        f"{latency}  max {result.get('max', float('nan')):6.2f} с  {result['throughput']:6.2f}/с  "
+        f"CPU {result['cpu_per_session']:6.2f} с/сесію ({result['cpu_utilization'] * 100:4.0f}%)  "
+        f"RSS {result['rss_baseline_mb']:.0f} МБ +{result['rss_per_session_mb']:.1f} МБ/сесію",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8, 16], help="кількість одночасних сесій")
+    parser.add_argument("--clicks", type=int, default=20, help="перезапусків на сесію")
+    parser.add_argument("--think", type=float, default=1.0, help="середня пауза між кліками, секунди")
+    parser.add_argument("--rows", type=int, default=10000, help="рядків на лист")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="куди зберегти результати (типово benchmarks/results/)")
+    args = parser.parse_args()
+
+    from fake_sheets_server import start_in_process
+    from generate_production_data import generate_sheets
+
+    sheets_server, endpoint = start_in_process(generate_sheets(args.rows, seed=args.seed))
+    results = []
+    try:
+        for sessions in args.sessions:
+            # Свіжий сервер для кожного N, щоб пам'ять попередніх сесій не змішувалась
+            process, port = start_streamlit(endpoint)
+            try:
+                result = asyncio.run(load_round(port, process.pid, sessions, args.clicks, args.think, args.seed))
+            finally:
+                process.terminate()
+                process.wait()
+            results.append(result)
+            print_result(result)
+    finally:
+        sheets_server.terminate()
+
+    report = {
+        "environment": environment(),
+        "parameters": {"clicks": args.clicks, "think": args.think, "rows": args.rows, "seed": args.seed},
+        "results": results,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}-{report['environment']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультати: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Набір бенчмарків на синтетичних даних: завантаження, фільтрація, кожен звіт кожної сторінки.
+
+Запуск:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000
+    python benchmarks/run_benchmarks.py --only ingest filter --sizes 1000000
+    python benchmarks/run_benchmarks.py --only groupby --sizes 100000 1000000
+    python benchmarks/run_benchmarks.py --only backends --sizes 1000000   # pandas проти Polars
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<попередній>.json
+
+Дані генерує tools/generate_production_data.py, сторінки працюють з фейковим
+Sheets API (tools/fake_sheets_server.py) в окремому процесі через streamlit AppTest.
+Сторінки вимірюються за період "Користувацький" (весь журнал) - найважчий випадок.
+Результати зберігаються в benchmarks/results/<час>-<коміт>.json для порівняння між комітами.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+PAGES = {
+    "app.py": "Тип звіту",
+    "pages/facovka_dashboard.py": "Тип звіту",
+    "pages/equipment_loading_trends.py": None,
+}
+
+
+def best_of(repeat, func):
+    """Мінімальний час виконання func за repeat спроб (секунди)."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_ingest(size, endpoint, repeat):
+    from google.auth.credentials import AnonymousCredentials
+
+    from data_loader import load_fact_table
+    from departments import DEPARTMENTS
+    from sheets_client import SheetsClient, TokenBucket
+
+    client = SheetsClient(AnonymousCredentials(), api_endpoint=endpoint, rate_limiter=TokenBucket(60000))
+    return {f"ingest/{size}": best_of(repeat, lambda: load_fact_table(client, "bench", DEPARTMENTS))}
+
+
+def bench_filter(size, repeat):
+    """Ланцюжок фільтрів бічної панелі app.py: період, продукти, обладнання, співробітник."""
+    import analytics
+    from generate_production_data import generate_frame
+
+    df = generate_frame("варка", size)
+    start, end = df["Дата"].quantile(0.25).date(), df["Дата"].quantile(0.75).date()
+    products = tuple(sorted(df["Тип продукту"].unique())[:5])
+    equipment = tuple(sorted(df["Тип обладнання"].unique())[:3])
+    employee = sorted(df["ПІБ"].unique())[0]
+
+    def run():
+        # Як на сторінці: варіанти кожного фільтра - з результату попереднього
+        filtered = analytics.filter_period(df, start, end)
+        analytics.filter_options(filtered, "Тип продукту")
+        filtered = analytics.filter_values(filtered, "Тип продукту", products)
+        analytics.filter_options(filtered, "Тип обладнання")
+        filtered = analytics.filter_values(filtered, "Тип обладнання", equipment)
+        analytics.filter_options(filtered, "ПІБ")
+        return filtered[filtered["ПІБ"] == employee]
+
+    return {f"filter/{size}": best_of(repeat, run)}
+
+
+def bench_groupby(size, repeat):
+    """
+    Групування звітів: pandas groupby проти ядер kernels.py на тих самих вимірах
+    (оператори, дні x обладнання, тижні x обладнання). "оператори (категорії)" - ті
+    самі агрегати, коли ПІБ уже закодовано словником (category).
+    """
+    import pandas as pd
+
+    import kernels
+    from generate_production_data import generate_frame
+
+    df = generate_frame("ФАСОВКА", size)
+    metrics = ["Час на операцію", "Продуктивність за годину", "Відсоток браку"]
+    days = df["Дата"].dt.date.rename("Дата")
+    weeks = df["Дата"].dt.to_period("W-MON").rename("Період")
+    normalized = df["Дата"].dt.normalize()
+    encoded = df.assign(**{"ПІБ": df["ПІБ"].astype("category")})
+
+    def operators_pandas(frame=df):
+        grouped = frame.groupby("ПІБ", observed=True)
+        return grouped.size(), grouped[metrics].mean()
+
+    def operators_kernels(frame=df):
+        groups = kernels.group_index(frame, "ПІБ")
+        return kernels.group_count(groups), [kernels.group_mean(groups, frame[column]) for column in metrics]
+
+    def weeks_pandas():
+        grouped = df.groupby([weeks, "Тип обладнання"])
+        return (grouped.size(), normalized.groupby([weeks, df["Тип обладнання"]]).nunique(),
+                grouped["Час на операцію"].sum(), grouped["Продуктивність за годину"].mean())
+
+    def weeks_kernels():
+        groups = kernels.group_index(df, [weeks, "Тип обладнання"])
+        return (kernels.group_count(groups), kernels.group_nunique(groups, normalized),
+                kernels.group_sum(groups, df["Час на операцію"]),
+                kernels.group_mean(groups, df["Продуктивність за годину"]))
+
+    shapes = {
+        "оператори": (operators_pandas, operators_kernels),
+        "оператори (категорії)": (lambda: operators_pandas(encoded), lambda: operators_kernels(encoded)),
+        "дні x обладнання": (
+            lambda: df.groupby([days, "Тип обладнання"]).size().unstack(fill_value=0),
+            lambda: kernels.crosstab(df, days, "Тип обладнання"),
+        ),
+        "тижні x обладнання": (weeks_pandas, weeks_kernels),
+    }
+    results = {}
+    for shape, (with_pandas, with_kernels) in shapes.items():
+        results[f"groupby/{shape}/pandas/{size}"] = best_of(repeat, with_pandas)
+        results[f"groupby/{shape}/kernels/{size}"] = best_of(repeat, with_kernels)
+    pd.testing.assert_frame_equal(shapes["дні x обладнання"][1](), shapes["дні x обладнання"][0]())
+    return results
+
+
+def bench_backends(size, repeat):
+    """Звіти analytics з групуваннями: рушій pandas проти Polars (якщо встановлено)."""
+    from datetime import date
+
+    import analytics
+
+    try:
+        import polars_backend
+    except ImportError:
+        print("polars не встановлено - бенчмарк рушіїв пропущено")
+        return {}
+    from generate_production_data import generate_frame
+
+    df = generate_frame("ФАСОВКА", size)
+    metrics = ("Час на операцію", "Продуктивність за годину", "Відсоток браку")
+    spec = analytics.FilterSpec(df["Дата"].min().date(), date.today())
+    reports = {
+        "оператори": lambda backend: backend.operator_stats(df, metrics),
+        "завантаження обладнання": lambda backend: backend.equipment_utilization(df, spec, metrics),
+        "якість": lambda backend: backend.quality_report(df, spec, "Відсоток браку"),
+        "тренд за тижнями": lambda backend: backend.period_groups(df, "Тиждень"),
+    }
+    results = {}
+    for report, run in reports.items():
+        # analytics без ANALYTICS_BACKEND - рушій pandas
+        results[f"backend/{report}/pandas/{size}"] = best_of(repeat, lambda: run(analytics))
+        results[f"backend/{report}/polars/{size}"] = best_of(repeat, lambda: run(polars_backend))
+    return results
+
+
+def bench_pages(size, endpoint, repeat):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["SHEETS_API_ENDPOINT"] = endpoint
+    # Клієнт і дані попереднього розміру прив'язані до іншого сервера
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+    results = {}
+    for page, report_label in PAGES.items():
+        at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+        # Перший запуск заповнює кеш даних - його не вимірюємо
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].value}")
+        if at.sidebar.radio and "Користувацький" in at.sidebar.radio[0].options:
+            at.sidebar.radio[0].set_value("Користувацький")
+
+        reports = [None]
+        if report_label:
+            report = next(s for s in at.sidebar.selectbox if s.label == report_label)
+            reports = report.options
+        for name in reports:
+            def run():
+                if name is not None:
+                    next(s for s in at.sidebar.selectbox if s.label == report_label).set_value(name)
+                at.run()
+            elapsed = best_of(repeat, run)
+            if at.exception:
+                raise RuntimeError(f"{page} / {name}: {at.exception[0].value}")
+            results[f"page/{page}/{name or 'сторінка'}/{size}"] = elapsed
+    return results
+
+
+def environment():
+    import numpy
+    import pandas
+    import streamlit
+
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+
+def compare(old_path, new):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\nПорівняння з {old['environment']['commit']} ({old_path}):")
+    for name, seconds in new["results"].items():
+        before = old["results"].get(name)
+        if before is None:
+            print(f"{name:<70} {seconds:9.3f} с  (новий)")
+        else:
+            print(f"{name:<70} {before:9.3f} -> {seconds:9.3f} с  x{before / seconds:5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="кількість рядків на лист")
+    parser.add_argument("--only", nargs="+", choices=["ingest", "filter", "groupby", "backends", "pages"],
+                        default=["ingest", "filter", "groupby", "backends", "pages"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", help="JSON з попереднього запуску")
+    parser.add_argument("--out", help="куди зберегти результати (типово benchmarks/results/)")
+    args = parser.parse_args()
+
+    from fake_sheets_server import start_in_process
+    from generate_production_data import generate_sheets
+
+    results = {}
+    for size in args.sizes:
+        if "filter" in args.only:
+            results.update(bench_filter(size, args.repeat))
+        if "groupby" in args.only:
+            results.update(bench_groupby(size, args.repeat))
+        if "backends" in args.only:
+            results.update(bench_backends(size, args.repeat))
+        if "ingest" in args.only or "pages" in args.only:
+            server, endpoint = start_in_process(generate_sheets(size))
+            try:
+                if "ingest" in args.only:
+                    results.update(bench_ingest(size, endpoint, args.repeat))
+                if "pages" in args.only:
+                    results.update(bench_pages(size, endpoint, args.repeat))
+            finally:
+                server.terminate()
+        for name, seconds in results.items():
+            if name.endswith(f"/{size}"):
+                print(f"{name:<70} {seconds:9.3f} с")
+                for candidate in ("/kernels/", "/polars/"):
+                    if candidate in name:
+                        baseline = results[name.replace(candidate, "/pandas/")]
+                        print(f"{'':<70} x{baseline / seconds:8.2f} швидше за pandas")
+
+    report = {"environment": environment(), "results": results}
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['environment']['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультати: {out}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
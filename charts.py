@@ -0,0 +1,262 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+# ---------------------------
+# Графіки з готових агрегатів
+# ---------------------------
+# Plotly Express отримує всі рядки й передає їх у браузер; тут фігури будуються
+# з уже порахованих статистик, тож розмір графіка не залежить від кількості рядків.
+
+# Діаграми розсіювання: до SVG_POINTS точок - SVG-маркери, до WEBGL_POINTS -
+# Scattergl (WebGL), більше - щільність (2D-гістограма, порахована на сервері)
+# і не більше HIGHLIGHT_POINTS виділених точок поверх неї
+SVG_POINTS = 2_000
+WEBGL_POINTS = 50_000
+DENSITY_BINS = 60
+HIGHLIGHT_POINTS = 500
+
+# Підписи значень на лініях: не більше LABEL_POINTS на графік
+LABEL_POINTS = 120
+
+# Числа в даних графіків округлюються до SIGNIFICANT_DIGITS значущих цифр
+# найбільшого значення масиву
+SIGNIFICANT_DIGITS = 4
+# Масиви трас, які стискає compact
+DATA_ATTRIBUTES = ("x", "y", "z", "text", "base", "values", "customdata", "marker.size", "marker.color")
+# Якщо змінна задана, під кожним графіком показується його розмір у браузері
+PAYLOAD_ENV = "SHOW_CHART_PAYLOAD"
+
+
+def box_figure(stats, outliers, x, title):
+    """
+    Боксплот за статистиками analytics.distribution: бокс для кожного значення x
+    (кольори та легенда - як у px.box(color=x)) і точки-викиди поверх нього.
+    """
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, value in enumerate(stats[x]):
+        row = stats.iloc[i]
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Box(
+            name=value, x=[value], legendgroup=value, marker_color=color,
+            q1=[row["q1"]], median=[row["median"]], q3=[row["q3"]], mean=[row["mean"]],
+            lowerfence=[row["lowerfence"]], upperfence=[row["upperfence"]],
+        ))
+        points = outliers.loc[outliers[x] == value, "value"]
+        if not points.empty:
+            fig.add_trace(go.Scatter(
+                x=[value] * len(points), y=points.to_numpy(), mode="markers", name=value,
+                legendgroup=value, showlegend=False, marker=dict(color=color, size=5, opacity=0.6),
+            ))
+    fig.update_layout(title=title, legend_title_text=x, boxmode="overlay")
+    return fig
+
+
+def value_labels(fig, max_labels=LABEL_POINTS):
+    """
+    Підписує значення y точок ліній fig текстом самих трас (без layout.annotations).
+    Якщо точок більше max_labels, на кожній лінії підписується кожна k-та точка
+    та її максимум, тож підписи не налазять один на одного.
+    """
+    traces = [trace for trace in fig.data if trace.y is not None]
+    step = max(1, -(-sum(len(trace.y) for trace in traces) // max_labels))
+    for trace in traces:
+        values = np.asarray(trace.y, dtype=float)
+        keep = np.zeros(len(values), dtype=bool)
+        keep[::step] = True
+        if not np.isnan(values).all():
+            keep[np.nanargmax(values)] = True
+        keep &= ~np.isnan(values)
+        text = np.full(len(values), "", dtype=object)
+        text[keep] = np.round(values[keep]).astype(np.int64).astype(str)
+        trace.update(
+            text=text, mode=f"{trace.mode or 'lines'}+text", textposition="top center", textfont=dict(size=10)
+        )
+    return fig
+
+
+def scatter_mode(rows):
+    """Спосіб відмальовки діаграми розсіювання з rows точок: "svg", "webgl" або "density"."""
+    if rows <= SVG_POINTS:
+        return "svg"
+    return "webgl" if rows <= WEBGL_POINTS else "density"
+
+
+def _numeric(values):
+    # Дати бінуються як наносекунди
+    return values.to_numpy().view("int64") if values.dtype.kind == "M" else values.to_numpy(dtype=float)
+
+
+def _from_numeric(values, like):
+    return values.astype("int64").astype(like.dtype) if like.dtype.kind == "M" else values
+
+
+def _robust_distance(values):
+    """Відстань від медіани в міжквартильних розмахах."""
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    return np.abs(values - median) / ((q3 - q1) or 1.0)
+
+
+def scatter_figure(df, x, y, title, highlight=None, hover_data=(), labels=None, **px_args):
+    """
+    Діаграма розсіювання x-y, що лишається легкою за будь-якої кількості рядків
+    (див. scatter_mode). У режимах svg і webgl - px.scatter з px_args (color, size...).
+    У режимі density - теплокарта кількості точок на сітці DENSITY_BINS x DENSITY_BINS
+    та рядки highlight (булева маска; типово - далі 2 IQR від медіани по x чи y,
+    тобто приблизно за вусами боксплоту) окремими точками з hover_data, не більше
+    HIGHLIGHT_POINTS найвіддаленіших від медіани.
+    """
+    labels = labels or {}
+    mode = scatter_mode(len(df))
+    if mode != "density":
+        return px.scatter(df, x=x, y=y, title=title, hover_data=list(hover_data), labels=labels,
+                          render_mode="webgl" if mode == "webgl" else "svg", **px_args)
+
+    rows = df[[x, y, *hover_data]].dropna(subset=[x, y])
+    xs, ys = _numeric(rows[x]), _numeric(rows[y])
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=DENSITY_BINS)
+    x_centers = _from_numeric((x_edges[:-1] + x_edges[1:]) / 2, rows[x])
+    y_centers = _from_numeric((y_edges[:-1] + y_edges[1:]) / 2, rows[y])
+    fig = go.Figure(go.Heatmap(
+        x=x_centers, y=y_centers, z=np.where(counts > 0, counts, np.nan).T,
+        colorscale="Blues", colorbar=dict(title="Точок"), name="Щільність",
+        hovertemplate="Точок: %{z}<extra></extra>",
+    ))
+
+    distance = np.maximum(_robust_distance(xs.astype(float)), _robust_distance(ys.astype(float)))
+    if highlight is None:
+        selected = distance > 2
+    else:
+        selected = highlight.reindex(rows.index, fill_value=False).to_numpy(dtype=bool)
+    order = np.argsort(-distance[selected], kind="stable")[:HIGHLIGHT_POINTS]
+    points = rows[selected].iloc[order]
+    fig.add_trace(go.Scattergl(
+        x=points[x], y=points[y], mode="markers", name=f"Виділені точки ({len(points)} з {int(selected.sum())})",
+        customdata=points[list(hover_data)], marker=dict(color="#E74C3C", size=6),
+        hovertemplate="<br>".join(
+            [f"{labels.get(x, x)}: %{{x}}", f"{labels.get(y, y)}: %{{y}}"]
+            + [f"{column}: %{{customdata[{i}]}}" for i, column in enumerate(hover_data)]
+        ) + "<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f"{title} ({len(rows)} точок, щільність)", xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y),
+        legend=dict(orientation="h"),
+    )
+    return fig
+
+
+# ---------------------------
+# Компактні дані графіків
+# ---------------------------
+def _compact_numbers(values):
+    """Округлення до SIGNIFICANT_DIGITS значущих цифр; цілі числа - найменшим цілим типом."""
+    values = values.astype(float)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return values
+    largest = np.abs(values[finite]).max()
+    decimals = SIGNIFICANT_DIGITS - 1 - int(np.floor(np.log10(largest))) if largest else 0
+    values = np.round(values, max(decimals, 0))
+    if not finite.all() or not np.array_equal(values, np.trunc(values)):
+        return values
+    integers = values.astype(np.int64)
+    return integers.astype(np.result_type(np.min_scalar_type(integers.min()), np.min_scalar_type(integers.max())))
+
+
+def _compact_dates(values):
+    """Дати без часу - "РРРР-ММ-ДД", інакше - з точністю до хвилини."""
+    values = pd.to_datetime(values).to_numpy()
+    valid = ~np.isnat(values)
+    whole_days = np.array_equal(values[valid], values[valid].astype("datetime64[D]"))
+    return np.where(valid, np.datetime_as_string(values, unit="D" if whole_days else "m"), None)
+
+
+def _compact_array(values):
+    """Стислий еквівалент масиву траси або None, якщо стискати нічого."""
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind == "O":
+        inferred = pd.api.types.infer_dtype(values, skipna=True)
+        if inferred in ("integer", "floating", "mixed-integer-float", "decimal"):
+            kind = "f"
+        elif inferred in ("datetime", "datetime64"):
+            kind = "M"
+    if kind in "fiu":
+        return _compact_numbers(values)
+    if kind == "M":
+        return _compact_dates(values)
+    return None
+
+
+def _compact_customdata(trace):
+    """
+    Колонки customdata стискаються окремо; рядки, однакові для всіх точок траси,
+    переносяться в hovertemplate текстом, а не повторюються в кожній точці.
+    """
+    data = np.asarray(trace.customdata, dtype=object)
+    if data.ndim != 2:
+        return
+    template = trace.hovertemplate
+    columns, kept = [], {}
+    for i in range(data.shape[1]):
+        column = data[:, i]
+        compacted = _compact_array(column)
+        constant = compacted is None and len(column) and all(value == column[0] for value in column)
+        if template and constant and isinstance(column[0], str) and f"%{{customdata[{i}]" in template:
+            template = template.replace(f"%{{customdata[{i}]}}", column[0])
+            continue
+        kept[i] = len(columns)
+        columns.append(column if compacted is None else compacted)
+    if template:
+        for old, new in kept.items():
+            template = template.replace(f"%{{customdata[{old}]", f"%{{__customdata[{new}]")
+        template = template.replace("%{__customdata[", "%{customdata[")
+    trace.update(
+        customdata=np.column_stack(columns).astype(object) if columns else None,
+        hovertemplate=template,
+    )
+
+
+def compact(fig):
+    """
+    Зменшує дані fig, що передаються в браузер: числа округлюються до
+    SIGNIFICANT_DIGITS значущих цифр (цілі - без ".0"), дати - без зайвих нулів
+    часу, однакові для всієї траси рядки customdata - в hovertemplate.
+    """
+    for trace in fig.data:
+        for attribute in DATA_ATTRIBUTES:
+            if attribute == "customdata":
+                if trace["customdata"] is not None:
+                    _compact_customdata(trace)
+                continue
+            try:
+                values = trace[attribute]
+            except (KeyError, ValueError):
+                continue
+            if values is None or isinstance(values, (str, int, float)) or not len(values):
+                continue
+            compacted = _compact_array(values)
+            if compacted is not None:
+                # Plotly не замінює масив рівним йому за значеннями, навіть іншого типу
+                trace[attribute] = None
+                trace[attribute] = compacted
+    return fig
+
+
+def payload_bytes(fig):
+    """Розмір специфікації fig, яку st.plotly_chart передає в браузер (байти)."""
+    return len(pio.to_json(fig, validate=False).encode())
+
+
+def show(fig):
+    """st.plotly_chart на всю ширину зі стисненими даними (див. compact)."""
+    compact(fig)
+    st.plotly_chart(fig, use_container_width=True)
+    if os.environ.get(PAYLOAD_ENV):
+        st.caption(f"Дані графіка: {payload_bytes(fig) / 1024:.1f} КБ")
@@ -0,0 +1,439 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from departments import DEPARTMENT_COLUMN, QUALITY_COLUMNS, Department
+from plants import PLANT_COLUMN
+
+# ---------------------------
+# Параметри запиту до Google Sheets
+# ---------------------------
+# Сирі значення замість відформатованих рядків: числа приходять як числа,
+# дати - як серійні номери, тож локаль таблиці не впливає на розбір.
+TYPED_VALUE_PARAMS = {
+    "valueRenderOption": "UNFORMATTED_VALUE",
+    "dateTimeRenderOption": "SERIAL_NUMBER",
+}
+
+# Початок відліку серійних дат Google Sheets
+SERIAL_DATE_ORIGIN = pd.Timestamp("1899-12-30")
+# Допустимий діапазон серійних номерів дат (1900-2099 роки); числа поза ним,
+# наприклад 20240305, введене в комірку як число, - не дати
+MIN_DATE_SERIAL = (pd.Timestamp("1900-01-01") - SERIAL_DATE_ORIGIN).days
+MAX_DATE_SERIAL = (pd.Timestamp("2099-12-31") - SERIAL_DATE_ORIGIN).days
+
+# Уніфікація назв колонок
+COLUMN_MAPPING = {
+    "Тип продукта": "Тип продукту",
+    "Номер заказа": "Номер замовлення",
+    "Время на операцию": "Час на операцію",
+    "Процент брака": "Відсоток браку",
+}
+
+# Скільки секунд сторінки кешують свіжо завантажені дані
+DATA_TTL = 600
+
+# Розмір блоку рядків для паралельного завантаження великих листів
+CHUNK_ROWS = 20000
+MAX_FETCH_WORKERS = 8
+# Розбір блоків у процесах: build_frame значною мірою тримає GIL, тому потоки
+# не розпаралелюють його між ядрами
+MAX_PARSE_PROCESSES = os.cpu_count() or 1
+
+NUMERIC_COLUMNS = ["Час на операцію", "Продуктивність за годину", "Кількість операторів"]
+TEXT_COLUMNS = ["ПІБ", "Тип обладнання", "Тип продукту"]
+
+
+def sheet_range(sheet_name, first_row=None, last_row=None, span=None):
+    """
+    Повертає A1-діапазон листа, обмежений діапазоном колонок span ("A:M")
+    та, якщо задано, рядками first_row..last_row (нумерація з 1).
+    """
+    if first_row is None:
+        return f"'{sheet_name}'!{span}" if span else f"'{sheet_name}'"
+    if span:
+        first_col, last_col = span.split(":")
+        return f"'{sheet_name}'!{first_col}{first_row}:{last_col}{last_row}"
+    return f"'{sheet_name}'!{first_row}:{last_row}"
+
+
+def column_index(letters):
+    """Номер колонки за її літерами, з 0 ("A" -> 0, "M" -> 12)."""
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+# ---------------------------
+# Функція для пошуку колонки з відсотками помилок
+# ---------------------------
+def find_percentage_column(columns, target_type="втрат"):
+    """
+    Шукає колонку з назвою "Відсоток втрат" або "Відсоток браку" (ігноруючи пробіли та регістр).
+    """
+    target_map = {
+        "втрат": ["відсотоквтрат", "втрат", "відсотоквтрат%", "втрат%"],
+        "браку": ["відсотокбраку", "браку", "відсотокбраку%", "браку%"]
+    }
+
+    targets = target_map.get(target_type, target_map["втрат"])
+
+    for col in columns:
+        col_normalized = col.strip().lower().replace(" ", "").replace("%", "")
+        if col_normalized in targets:
+            return col
+    return None
+
+
+# ---------------------------
+# Перетворення сирих значень у типізовані колонки
+# ---------------------------
+def to_numeric_column(series):
+    """
+    Перетворює колонку сирих значень у float64. Числа беруться як є;
+    лише комірки, збережені в таблиці як текст (наприклад "12,5"), розбираються як рядки.
+    """
+    numeric = pd.to_numeric(series, errors="coerce")
+    # Непорожні комірки, які не розібралися як числа, - це текст
+    text_mask = (numeric.isna() & series.notna()).to_numpy()
+    if text_mask.any():
+        numeric[text_mask] = pd.to_numeric(
+            series[text_mask].astype(str).str.strip().str.replace(",", ".", regex=False), errors="coerce"
+        )
+    return numeric.astype("float64")
+
+
+def serial_to_datetime(series):
+    """
+    Перетворює серійні номери дат Google Sheets у datetime64.
+    Комірки з датою, збереженою як текст "дд.мм.рррр", розбираються окремо.
+    """
+    serial = pd.to_numeric(series, errors="coerce")
+    days = np.floor(serial)
+    days = days.where(days.between(MIN_DATE_SERIAL, MAX_DATE_SERIAL))
+    result = SERIAL_DATE_ORIGIN + pd.to_timedelta(days, unit="D")
+    text_mask = (serial.isna() & series.notna()).to_numpy()
+    if text_mask.any():
+        result[text_mask] = pd.to_datetime(series[text_mask].astype(str), format="%d.%m.%Y", errors="coerce")
+    return result
+
+
+def parts_to_datetime(day, month, year):
+    """Збирає дату з числових колонок День/Місяць/Рік без проміжних рядків."""
+    parts = pd.DataFrame({
+        "year": to_numeric_column(year),
+        "month": to_numeric_column(month),
+        "day": to_numeric_column(day),
+    })
+    # Лише скінченні цілі значення: "inf" не приводиться до int64, 5.7 не є днем,
+    # а надто великі числа переповнюють int64 при складанні дати
+    values = parts.to_numpy()
+    valid = pd.Series(
+        (np.isfinite(values) & (np.floor(values) == values) & (np.abs(values) < 1e6)).all(axis=1),
+        index=parts.index,
+    )
+    result = pd.Series(pd.NaT, index=parts.index, dtype="datetime64[ns]")
+    if valid.any():
+        result[valid] = pd.to_datetime(parts[valid].astype("int64"), errors="coerce")
+    return result
+
+
+def _as_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def to_text_column(series):
+    """
+    Приводить значення колонки-довідника до рядків (числові назви приходять як числа).
+    Перетворюється лише кожне унікальне значення, а не кожен рядок.
+    """
+    codes, uniques = pd.factorize(series)
+    texts = np.array([_as_text(v) for v in uniques] + [None], dtype=object)
+    # Код -1 (порожня комірка) вказує на останній елемент - None
+    return pd.Series(texts[codes], index=series.index)
+
+
+def build_frame(header, rows, numeric_columns=NUMERIC_COLUMNS, quality_types=tuple(QUALITY_COLUMNS)):
+    """
+    Будує DataFrame з рядків відповіді values().get, отриманої з TYPED_VALUE_PARAMS:
+    уніфікує назви колонок, створює колонку "Дата" та числові колонки
+    (numeric_columns і колонки відсотків для quality_types).
+    """
+    header = [str(col).strip() for col in header]
+    width = len(header)
+    # API не повертає порожні комірки в кінці рядка - pandas сам доповнює короткі рядки,
+    # а зайві комірки праворуч від заголовка відкидаються
+    df = pd.DataFrame(rows)
+    df = df.reindex(columns=range(width)) if df.shape[1] < width else df.iloc[:, :width]
+    df.columns = header
+    # Повністю порожні рядки (пропуски в таблиці) не несуть даних
+    df = df.dropna(how="all").reset_index(drop=True)
+
+    for old_col, new_col in COLUMN_MAPPING.items():
+        if old_col in df.columns and new_col not in df.columns:
+            df.rename(columns={old_col: new_col}, inplace=True)
+
+    # Обробка дати
+    if "Дата" in df.columns:
+        df["Дата"] = serial_to_datetime(df["Дата"])
+    elif all(col in df.columns for col in ["День", "Місяць", "Рік"]):
+        df["Дата"] = parts_to_datetime(df["День"], df["Місяць"], df["Рік"])
+
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = to_text_column(df[col])
+
+    # Обробка числових колонок
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = to_numeric_column(df[col])
+
+    # Колонка з відсотками може називатися по-різному
+    for target_type in quality_types:
+        canonical = QUALITY_COLUMNS[target_type]
+        percent_col = find_percentage_column(df.columns, target_type)
+        if percent_col:
+            df[percent_col] = to_numeric_column(df[percent_col])
+            if canonical not in df.columns:
+                df[canonical] = df[percent_col]
+
+    # Числове значення об'єму (наприклад, "50мл" -> 50)
+    if "Об'єм" in df.columns:
+        volume = df["Об'єм"]
+        df["Об'єм_число"] = pd.to_numeric(volume, errors="coerce").astype("float64")
+        text_mask = (df["Об'єм_число"].isna() & volume.notna()).to_numpy()
+        if text_mask.any():
+            df.loc[text_mask, "Об'єм_число"] = (
+                volume[text_mask].astype(str).str.replace(",", ".", regex=False)
+                .str.extract(r'(\d+(?:\.\d+)?)', expand=False).astype(float)
+            )
+
+    return df
+
+
+# ---------------------------
+# Завантаження листа блоками
+# ---------------------------
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def _get_parse_pool():
+    """Спільний для процесу пул процесів для розбору блоків (None, якщо ядро одне)."""
+    global _parse_pool
+    if MAX_PARSE_PROCESSES < 2:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn: fork багатопотокового сервера Streamlit небезпечний
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=MAX_PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
+
+
+def sheet_header(department, values):
+    """Заголовок листа з урахуванням назв колонок, заданих у реєстрі відділів."""
+    header = list(values)
+    first_col = column_index(department.columns.split(":")[0]) if department.columns else 0
+    for letters, label in department.column_labels.items():
+        index = column_index(letters) - first_col
+        if 0 <= index < len(header):
+            header[index] = label
+        elif index >= len(header):
+            header.extend([""] * (index - len(header)) + [label])
+    return header
+
+
+def load_sheets(client, spreadsheet_id, departments, chunk_rows=CHUNK_ROWS, max_workers=MAX_FETCH_WORKERS,
+                parse_in_processes=True):
+    """
+    Завантажує листи кількох відділів однієї таблиці блоками по chunk_rows рядків.
+    Розміри сіток усіх листів беруться одним запитом метаданих, перші блоки
+    (із заголовками) всіх листів - одним values:batchGet, тож кількість
+    звернень до API не залежить від кількості невеликих листів. Решта блоків
+    завантажується паралельно в пулі потоків, а кожен отриманий блок одразу
+    розбирається в пулі процесів.
+    Повертає ({ключ відділу: DataFrame}, snapshot_time): snapshot_time - час
+    найстаршого знімка, якщо частину даних узято зі знімка, інакше None.
+    """
+    # Діапазон за межами сітки API відхиляє з помилкою 400, тож спершу дізнаємося її розміри
+    row_counts, metadata_snapshot = client.get_row_counts(spreadsheet_id)
+    snapshot_times = [metadata_snapshot]
+
+    # Кінець даних визначаємо за розміром сітки: порожні рядки в кінці блоку
+    # API обрізає, тож короткий блок ще не означає кінця листа
+    blocks = {}
+    for department in departments:
+        row_count = row_counts.get(department.sheet, 0)
+        blocks[department.key] = [
+            sheet_range(department.sheet, first_row, min(first_row + chunk_rows - 1, row_count), department.columns)
+            for first_row in range(1, row_count + 1, chunk_rows)
+        ]
+
+    first_blocks = [department for department in departments if blocks[department.key]]
+    values = {}
+    if first_blocks:
+        result = client.batch_get_values(
+            spreadsheet_id, [blocks[d.key][0] for d in first_blocks], **TYPED_VALUE_PARAMS
+        )
+        snapshot_times.append(result.get("snapshot_time"))
+        for department, value_range in zip(first_blocks, result.get("valueRanges", [])):
+            values[department.key] = value_range.get("values", [])
+
+    headers = {d.key: sheet_header(d, values[d.key][0]) for d in first_blocks if values.get(d.key)}
+    tasks = [(d, block) for d in departments if d.key in headers for block in blocks[d.key][1:]]
+    parse_pool = _get_parse_pool() if parse_in_processes and tasks else None
+
+    def build(department, rows):
+        args = (headers[department.key], rows, department.metrics or NUMERIC_COLUMNS,
+                (department.quality,) if department.quality else tuple(QUALITY_COLUMNS))
+        if parse_pool is None:
+            return build_frame(*args)
+        return parse_pool.submit(build_frame, *args).result()
+
+    def fetch_and_build(task):
+        department, range_name = task
+        result = client.get_values(spreadsheet_id, range_name, **TYPED_VALUE_PARAMS)
+        return build(department, result.get("values", [])), result.get("snapshot_time")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        first_frames = {d.key: pool.submit(build, d, values[d.key][1:]) for d in departments if d.key in headers}
+        rest = list(pool.map(fetch_and_build, tasks))
+        frames = {key: [future.result()] for key, future in first_frames.items()}
+
+    for (department, _), (frame, snapshot_time) in zip(tasks, rest):
+        frames[department.key].append(frame)
+        snapshot_times.append(snapshot_time)
+
+    result = {}
+    for department in departments:
+        parts = frames.get(department.key)
+        if not parts:
+            result[department.key] = pd.DataFrame()
+            continue
+        parts = [frame for frame in parts if not frame.empty] or parts[:1]
+        result[department.key] = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+    stale = [t for t in snapshot_times if t is not None]
+    return result, min(stale) if stale else None
+
+
+def load_sheet(client, spreadsheet_id, sheet_name, column_span=None, **kwargs):
+    """Завантажує один лист (див. load_sheets). Повертає (DataFrame, snapshot_time)."""
+    department = Department(key=sheet_name, title=sheet_name, sheet=sheet_name, columns=column_span)
+    frames, snapshot_time = load_sheets(client, spreadsheet_id, [department], **kwargs)
+    return frames[sheet_name], snapshot_time
+
+
+# ---------------------------
+# Загальна таблиця фактів усіх відділів і заводів
+# ---------------------------
+def load_fact_table(client, spreadsheet_id, departments, **kwargs):
+    """
+    Завантажує всі відділи реєстру однієї таблиці в одну таблицю фактів
+    (рядок - операція) з колонкою DEPARTMENT_COLUMN. Рядки кожного відділу
+    лежать підряд: attrs["partitions"] - {відділ: (початок, кінець)},
+    attrs["department_columns"] - {відділ: колонки відділу}.
+    Повертає (DataFrame, snapshot_time).
+    """
+    frames, snapshot_time = load_sheets(client, spreadsheet_id, departments, **kwargs)
+    titles = [d.title for d in departments]
+    parts = []
+    partitions = {}
+    department_columns = {}
+    start = 0
+    for department in departments:
+        frame = frames[department.key]
+        department_columns[department.title] = list(frame.columns)
+        partitions[department.title] = (start, start + len(frame))
+        start += len(frame)
+        if not frame.empty:
+            frame.insert(0, DEPARTMENT_COLUMN, pd.Categorical([department.title] * len(frame), categories=titles))
+            parts.append(frame)
+
+    fact = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        {DEPARTMENT_COLUMN: pd.Categorical([], categories=titles)}
+    )
+    fact.attrs["partitions"] = partitions
+    fact.attrs["department_columns"] = department_columns
+    return fact, snapshot_time
+
+
+def merge_plant_tables(tables):
+    """
+    Об'єднує таблиці фактів заводів ({назва заводу: DataFrame}) в одну з колонкою
+    PLANT_COLUMN. Рядки впорядковані за заводом і відділом, тож attrs["partitions"]
+    ({(завод, відділ): (початок, кінець)}) є індексом для швидкої вибірки.
+    """
+    plants = list(tables)
+    parts = []
+    partitions = {}
+    department_columns = {}
+    offset = 0
+    for plant, fact in tables.items():
+        for department, (start, stop) in fact.attrs.get("partitions", {}).items():
+            partitions[(plant, department)] = (offset + start, offset + stop)
+        for department, columns in fact.attrs.get("department_columns", {}).items():
+            department_columns[(plant, department)] = columns
+        offset += len(fact)
+        if not fact.empty:
+            fact = fact.copy(deep=False)
+            fact.insert(0, PLANT_COLUMN, pd.Categorical([plant] * len(fact), categories=plants))
+            parts.append(fact)
+
+    merged = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        {PLANT_COLUMN: pd.Categorical([], categories=plants)}
+    )
+    merged.attrs["partitions"] = partitions
+    merged.attrs["department_columns"] = department_columns
+    return merged
+
+
+def department_frame(fact, department, plants=None):
+    """
+    Рядки та колонки одного відділу з об'єднаної таблиці фактів для заводів plants
+    (усіх, якщо None). Колонка PLANT_COLUMN додається, лише якщо заводів кілька.
+    Порожній DataFrame, якщо даних немає.
+    """
+    partitions = fact.attrs.get("partitions", {})
+    department_columns = fact.attrs.get("department_columns", {})
+    keys = [
+        key for key, (start, stop) in partitions.items()
+        if key[1] == department.title and (plants is None or key[0] in plants) and stop > start
+    ]
+    if not keys:
+        return pd.DataFrame()
+
+    # Колонки відділу в порядку першої появи серед заводів
+    columns = []
+    for key in keys:
+        columns.extend(col for col in department_columns.get(key, []) if col not in columns)
+    if len({plant for plant, _ in keys}) > 1:
+        columns.insert(0, PLANT_COLUMN)
+
+    positions = np.concatenate([np.arange(*partitions[key]) for key in keys])
+    return fact.iloc[positions, fact.columns.get_indexer(columns)].reset_index(drop=True)
+
+
+def freeze_frame(df):
+    """
+    Робить масиви колонок df лише для читання й повертає df. Таблиці, спільні для
+    всіх сесій процесу, не копіюються, тож запис у них на місці (df.loc[...] = ...)
+    має падати, а не тихо змінювати дані інших сесій.
+    """
+    for values in df._mgr.arrays:
+        # Дати та категорії зберігають дані в ndarray всередині ExtensionArray
+        values = getattr(values, "_ndarray", values)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return df
@@ -0,0 +1,171 @@
+"""
+Локальне сховище даних відділів у файлах Arrow IPC, спільне для кількох
+процесів Streamlit на одному хості.
+
+Один процес-оновлювач завантажує таблиці заводів із Google Sheets і записує
+кожну ревізію окремим каталогом:
+
+    <сховище>/<ID таблиці>/CURRENT                  - назва поточної ревізії
+    <сховище>/<ID таблиці>/<ревізія>/<відділ>.arrow  - таблиця відділу
+
+Процеси дашборда із заданою змінною DATA_STORE_DIR не звертаються до Google,
+а відображають файли поточної ревізії в пам'ять лише для читання: числові
+колонки та дати всі процеси читають з однієї копії в кеші сторінок ОС.
+Текстові колонки стають рядками Python у кожному процесі.
+
+Запуск оновлювача (кожні DATA_TTL секунд):
+    python data_store.py --store /var/lib/dashboard-data
+    DATA_STORE_DIR=/var/lib/dashboard-data streamlit run app.py
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import ipc
+
+from data_loader import DATA_TTL, load_sheets, to_text_column
+
+# Каталог сховища для процесів дашборда; якщо не задано, дані беруться з Google Sheets
+STORE_DIR_ENV = "DATA_STORE_DIR"
+CURRENT_FILE = "CURRENT"
+# Скільки ревізій лишати: процеси, що ще читають попередню, не втрачають файли
+KEEP_REVISIONS = 2
+# Після скількох секунд без нової ревізії сторінки попереджають про застарілі дані
+MAX_REVISION_AGE = 3 * DATA_TTL
+
+
+def store_dir():
+    """Каталог сховища з DATA_STORE_DIR або None, якщо сховище не використовується."""
+    return os.environ.get(STORE_DIR_ENV) or None
+
+
+def revision_time(revision):
+    """Час завантаження ревізії (секунди epoch): назва ревізії - мілісекунди."""
+    return int(revision) / 1000
+
+
+def _table_dir(root, spreadsheet_id):
+    return os.path.join(root, spreadsheet_id)
+
+
+def _to_arrow(frame):
+    columns = {}
+    for name, series in frame.items():
+        if series.dtype.kind == "M":
+            # NaT зберігається як значення, а не null - колонка читається без копіювання
+            columns[name] = pa.array(series.to_numpy().view("int64")).view(pa.timestamp("ns"))
+        elif series.dtype == object:
+            # Колонки зі змішаними числами й текстом (номери замовлень, об'єм) зберігаються текстом
+            if pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+                series = to_text_column(series)
+            columns[name] = pa.array(series.to_numpy(), type=pa.string(), from_pandas=True)
+        else:
+            columns[name] = pa.array(series.to_numpy())
+    return pa.table(columns)
+
+
+def write_revision(root, spreadsheet_id, frames, revision=None, keep=KEEP_REVISIONS):
+    """
+    Записує таблиці відділів ({ключ відділу: DataFrame}) нової ревізії та
+    атомарно робить її поточною. Старі ревізії понад keep видаляються.
+    Повертає назву ревізії.
+    """
+    revision = revision or str(int(time.time() * 1000))
+    table_dir = _table_dir(root, spreadsheet_id)
+    os.makedirs(table_dir, exist_ok=True)
+
+    # Ревізія з'являється в сховищі лише повністю записаною
+    staging = tempfile.mkdtemp(prefix=".tmp-", dir=table_dir)
+    for key, frame in frames.items():
+        table = _to_arrow(frame)
+        with pa.OSFile(os.path.join(staging, f"{key}.arrow"), "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.chmod(staging, 0o755)
+    os.rename(staging, os.path.join(table_dir, revision))
+
+    current = os.path.join(table_dir, CURRENT_FILE)
+    with open(current + ".tmp", "w") as f:
+        f.write(revision)
+    os.replace(current + ".tmp", current)
+
+    revisions = sorted((name for name in os.listdir(table_dir) if name.isdigit()), key=int)
+    for old in revisions[:-keep]:
+        # Відображені в пам'ять файли лишаються доступними процесам, що їх уже відкрили
+        shutil.rmtree(os.path.join(table_dir, old), ignore_errors=True)
+    return revision
+
+
+def current_revision(root, spreadsheet_id):
+    """Назва поточної ревізії таблиці або None, якщо таблицю ще не записано."""
+    try:
+        with open(os.path.join(_table_dir(root, spreadsheet_id), CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_department(root, spreadsheet_id, revision, department):
+    """
+    Таблиця відділу department ревізії revision, відображена в пам'ять лише для
+    читання. attrs такі самі, як у таблиці фактів з load_fact_table з одним
+    відділом, тож її можна передати в merge_plant_tables.
+    """
+    path = os.path.join(_table_dir(root, spreadsheet_id), revision, f"{department.key}.arrow")
+    if os.path.exists(path):
+        # Файл лишається відкритим, доки живуть масиви DataFrame
+        frame = ipc.open_file(pa.memory_map(path)).read_all().to_pandas(split_blocks=True)
+    else:
+        frame = pd.DataFrame()
+    frame.attrs["partitions"] = {department.title: (0, len(frame))}
+    frame.attrs["department_columns"] = {department.title: list(frame.columns)}
+    return frame
+
+
+def refresh(root, plants, departments, client):
+    """
+    Завантажує таблиці всіх заводів і записує нові ревізії. Якщо Google Sheets
+    недоступний (дані зі знімка) або завод повернув помилку, його поточна
+    ревізія лишається без змін.
+    """
+    for plant in plants:
+        try:
+            frames, snapshot_time = load_sheets(client, plant.spreadsheet_id, departments)
+        except Exception as e:
+            print(f"{plant.title}: помилка завантаження: {e}", file=sys.stderr)
+            continue
+        if snapshot_time is not None:
+            print(f"{plant.title}: Google Sheets недоступний, ревізія не оновлена", file=sys.stderr)
+            continue
+        revision = write_revision(root, plant.spreadsheet_id, frames)
+        print(f"{plant.title}: ревізія {revision}", flush=True)
+
+
+def main():
+    from departments import DEPARTMENTS
+    from plants import PLANTS
+    from sheets_client import get_sheets_client
+
+    parser = argparse.ArgumentParser(description="Оновлювач локального сховища даних відділів")
+    parser.add_argument("--store", default=store_dir(), help=f"каталог сховища (типово ${STORE_DIR_ENV})")
+    parser.add_argument("--interval", type=float, default=DATA_TTL, help="секунд між оновленнями")
+    parser.add_argument("--once", action="store_true", help="оновити один раз і вийти")
+    args = parser.parse_args()
+    if not args.store:
+        parser.error(f"вкажіть --store або {STORE_DIR_ENV}")
+
+    client = get_sheets_client()
+    while True:
+        refresh(args.store, PLANTS, DEPARTMENTS, client)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+import os
+from dataclasses import dataclass, field
+
+# ---------------------------
+# Реєстр відділів виробництва
+# ---------------------------
+# Кожен відділ - окремий лист таблиці. Щоб додати відділ, достатньо описати
+# його лист у departments.json: завантажувач і сторінки беруть список звідси.
+DEPARTMENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "departments.json")
+
+# Колонка-вимір з назвою відділу в загальній таблиці фактів
+DEPARTMENT_COLUMN = "Відділ"
+
+# Що відстежує відділ: втрати (варка) чи брак (фасовка)
+QUALITY_COLUMNS = {
+    "втрат": "Відсоток втрат",
+    "браку": "Відсоток браку",
+}
+
+
+@dataclass(frozen=True)
+class Department:
+    """
+    Опис листа відділу:
+    key - ідентифікатор у коді, title - назва в інтерфейсі, sheet - назва листа,
+    columns - діапазон колонок ("A:M"; None - весь лист),
+    column_labels - назви, що замінюють заголовок колонки ({"B": "Позиція"}),
+    metrics - числові колонки, quality - "втрат" або "браку".
+    """
+    key: str
+    title: str
+    sheet: str
+    columns: str = None
+    column_labels: dict = field(default_factory=dict)
+    metrics: tuple = ()
+    quality: str = None
+
+    @property
+    def quality_column(self):
+        return QUALITY_COLUMNS.get(self.quality)
+
+
+def load_registry(path=DEPARTMENTS_FILE):
+    """Читає реєстр відділів з JSON-файлу та перевіряє його."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    departments = []
+    for entry in config["departments"]:
+        department = Department(**{**entry, "metrics": tuple(entry.get("metrics", []))})
+        if department.quality is not None and department.quality not in QUALITY_COLUMNS:
+            raise ValueError(f"Невідомий тип якості '{department.quality}' для відділу {department.key}")
+        departments.append(department)
+
+    keys = [d.key for d in departments]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Ключі відділів у реєстрі повторюються")
+    return departments
+
+
+DEPARTMENTS = load_registry()
+
+
+def get_department(key, departments=DEPARTMENTS):
+    """Повертає відділ за ключем."""
+    for department in departments:
+        if department.key == key:
+            return department
+    raise KeyError(key)
@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------
+# Групування на NumPy для звітів
+# ---------------------------
+# Виміри звітів (обладнання, продукти, співробітники, дні, періоди) мають
+# невелику кількість значень. Ключ групи кодується числом (змішана система
+# числення з кодів вимірів), а агрегати рахуються одним np.bincount або
+# np.minimum.at замість hash-групування pandas. Групи та порядок ті самі, що
+# в df.groupby(keys) для не категоріальних ключів: лише наявні комбінації,
+# відсортовані за ключами, рядки з порожнім ключем пропускаються.
+
+# Якщо комбінацій ключів більше, наявні групи шукаються сортуванням (np.unique)
+MAX_DENSE_GROUPS = 1 << 20
+
+
+@dataclass(frozen=True)
+class GroupIndex:
+    """
+    codes - номер групи кожного рядка (-1 - рядок з порожнім ключем),
+    keys - значення ключів кожної групи (як у groupby(...).size().reset_index()).
+    """
+    codes: np.ndarray
+    keys: pd.DataFrame
+
+    @property
+    def size(self):
+        return len(self.keys)
+
+    @cached_property
+    def complete(self):
+        """Чи всі рядки належать якійсь групі (немає порожніх ключів)."""
+        return bool(len(self.codes)) and self.codes.min() >= 0
+
+    @cached_property
+    def counts(self):
+        """Кількість рядків у кожній групі."""
+        codes = self.codes if self.complete else self.codes[self.codes >= 0]
+        return np.bincount(codes, minlength=self.size)
+
+
+def _key_series(df, key):
+    return df[key] if isinstance(key, str) else key
+
+
+def group_index(df, keys):
+    """
+    Групи рядків df за keys: назва колонки, Series або їх список (як у df.groupby).
+    """
+    keys = [_key_series(df, key) for key in (keys if isinstance(keys, list) else [keys])]
+    factorized = [pd.factorize(key, sort=True) for key in keys]
+    if len(keys) == 1:
+        # factorize повертає лише наявні значення - коди вже є номерами груп
+        codes, uniques = factorized[0]
+        return GroupIndex(codes.astype(np.int64, copy=False), pd.DataFrame({keys[0].name: uniques}))
+
+    valid = np.ones(len(df), dtype=bool)
+    combined = np.zeros(len(df), dtype=np.int64)
+    space = 1
+    for codes, uniques in factorized:
+        valid &= codes >= 0
+        combined = combined * len(uniques) + codes
+        space *= len(uniques)
+
+    if space <= MAX_DENSE_GROUPS:
+        present = np.flatnonzero(np.bincount(combined[valid], minlength=space))
+        remap = np.full(space, -1, dtype=np.int64)
+        remap[present] = np.arange(len(present))
+        inverse = remap[combined[valid]]
+    else:
+        present, inverse = np.unique(combined[valid], return_inverse=True)
+    group_codes = np.full(len(df), -1, dtype=np.int64)
+    group_codes[valid] = inverse
+
+    # Розкладаємо номер комбінації назад на коди кожного ключа
+    columns = {}
+    rest = present
+    for key, (_, uniques) in zip(reversed(keys), reversed(factorized)):
+        columns[key.name] = uniques.take(rest % len(uniques))
+        rest = rest // len(uniques)
+    frame = pd.DataFrame({key.name: columns[key.name] for key in keys})
+    return GroupIndex(group_codes, frame)
+
+
+def _valid_values(groups, values):
+    values = pd.Series(values).to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(values)
+    if groups.complete and not missing.any():
+        return groups.codes, values
+    mask = (groups.codes >= 0) & ~missing
+    return groups.codes[mask], values[mask]
+
+
+def group_count(groups):
+    """Кількість рядків у кожній групі (groupby.size)."""
+    return groups.counts
+
+
+def group_sum(groups, values):
+    """Сума значень без NaN у кожній групі (0 для групи без значень)."""
+    values = pd.Series(values)
+    codes, weights = _valid_values(groups, values)
+    result = np.bincount(codes, weights=weights, minlength=groups.size)
+    # bincount без значень повертає цілі - тип результату як у pandas
+    return result.astype(values.dtype if values.dtype.kind in "iu" else np.float64, copy=False)
+
+
+def group_mean(groups, values):
+    """Середнє значень без NaN у кожній групі (NaN для групи без значень)."""
+    codes, weights = _valid_values(groups, values)
+    # Без пропусків кількість значень у групі - кількість її рядків
+    counts = groups.counts if codes is groups.codes else np.bincount(codes, minlength=groups.size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.bincount(codes, weights=weights, minlength=groups.size) / counts
+
+
+def _extreme(groups, values, ufunc, initial):
+    codes, values = _valid_values(groups, values)
+    result = np.full(groups.size, initial)
+    ufunc.at(result, codes, values)
+    result[np.bincount(codes, minlength=groups.size) == 0] = np.nan
+    return result
+
+
+def group_min(groups, values):
+    """Мінімум значень без NaN у кожній групі (NaN для групи без значень)."""
+    return _extreme(groups, values, np.minimum, np.inf)
+
+
+def group_max(groups, values):
+    """Максимум значень без NaN у кожній групі (NaN для групи без значень)."""
+    return _extreme(groups, values, np.maximum, -np.inf)
+
+
+def group_nunique(groups, values):
+    """Кількість різних непорожніх значень у кожній групі (groupby.nunique)."""
+    value_codes, uniques = pd.factorize(values)
+    mask = (groups.codes >= 0) & (value_codes >= 0)
+    pairs = groups.codes[mask] * max(len(uniques), 1) + value_codes[mask]
+    if groups.size * len(uniques) <= MAX_DENSE_GROUPS:
+        pairs = np.flatnonzero(np.bincount(pairs, minlength=groups.size * len(uniques)))
+    else:
+        pairs = np.unique(pairs)
+    return np.bincount(pairs // max(len(uniques), 1), minlength=groups.size)
+
+
+AGGREGATIONS = {
+    "sum": group_sum,
+    "mean": group_mean,
+    "min": group_min,
+    "max": group_max,
+    "nunique": group_nunique,
+}
+
+
+def crosstab(df, index, columns):
+    """
+    Кількість рядків для кожної пари значень index x columns (назви колонок або
+    Series), як df.groupby([index, columns]).size().unstack(fill_value=0).
+    """
+    groups = group_index(df, [index, columns])
+    rows, row_values = pd.factorize(groups.keys.iloc[:, 0], sort=True)
+    cols, col_values = pd.factorize(groups.keys.iloc[:, 1], sort=True)
+    table = np.zeros((len(row_values), len(col_values)), dtype=np.int64)
+    table[rows, cols] = group_count(groups)
+    return pd.DataFrame(
+        table,
+        index=pd.Index(row_values, name=groups.keys.columns[0]),
+        columns=pd.Index(col_values, name=groups.keys.columns[1]),
+    )
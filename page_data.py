@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import analytics
+import data_store
+import warehouse
+from data_loader import DATA_TTL, department_frame, freeze_frame, load_fact_table, merge_plant_tables
+from departments import DEPARTMENTS, get_department
+from plants import PLANTS
+from sheets_client import StaleDataError, get_sheets_client, snapshot_notice
+
+# Скільки секунд сторінка чекає на дані заводів; повільний завод
+# довантажується у фоні та з'явиться при наступному оновленні сторінки
+PLANT_WAIT = 60
+
+# Спільний для процесу пул: таблиці заводів завантажуються паралельно
+_plant_pool = ThreadPoolExecutor(max_workers=max(1, len(PLANTS)), thread_name_prefix="plant-fetch")
+
+
+# ---------------------------
+# Спільне для всіх сторінок завантаження даних відділів
+# ---------------------------
+# Таблиці кешуються через st.cache_resource, а не st.cache_data: st.cache_data
+# віддає кожному виклику копію (розпаковує pickle), і з кожною новою сесією
+# пам'ять росла б на розмір даних. Тут усі сесії та сторінки процесу
+# бачать один екземпляр, замкнений на запис (freeze_frame).
+@st.cache_resource(ttl=DATA_TTL)
+def fetch_fact_table(spreadsheet_id):
+    """
+    Таблиця фактів усіх відділів однієї таблиці (заводу); окремий кеш для кожної
+    таблиці. attrs["revision"] - час завантаження, за ним кешується об'єднана таблиця.
+    """
+    fact, snapshot_time = load_fact_table(get_sheets_client(), spreadsheet_id, DEPARTMENTS)
+    # Дані зі знімка не кешуємо, щоб після відновлення API одразу отримати свіжі
+    if snapshot_time is not None:
+        fact.attrs["revision"] = snapshot_time
+        raise StaleDataError(fact, snapshot_time)
+    fact.attrs["revision"] = time.time()
+    return freeze_frame(fact)
+
+
+@st.cache_resource(ttl=DATA_TTL)
+def merge_plants(revisions, _tables):
+    """Об'єднана таблиця заводів; перебудовується лише при зміні ревізії котрогось заводу."""
+    merged = merge_plant_tables(_tables)
+    merged.attrs["revisions"] = revisions
+    return freeze_frame(merged)
+
+
+@st.cache_resource(ttl=DATA_TTL)
+def shared_department_frame(revisions, department_key, plants, _fact):
+    """Таблиця відділу для заводів plants, одна на процес для кожної ревізії даних."""
+    frame = department_frame(_fact, get_department(department_key), plants)
+    frame.attrs["revisions"] = revisions
+    return freeze_frame(frame)
+
+
+@st.cache_resource(ttl=DATA_TTL)
+def department_sketches(revisions, department_key, plants, _df):
+    """
+    Денні скетчі колонки якості відділу (analytics.daily_sketches) для таблиці
+    _df ревізії revisions: будуються один раз при оновленні даних, а боксплоти
+    будь-якого періоду зливають їх замість перебору рядків.
+    """
+    column = get_department(department_key).quality_column
+    if column not in _df.columns or analytics.PRODUCT not in _df.columns:
+        return {}
+    return {column: analytics.daily_sketches(_df, column)}
+
+
+def select_plants():
+    """
+    Вибір заводів на бічній панелі (лише якщо їх у реєстрі кілька).
+    Повертає назви вибраних заводів.
+    """
+    titles = [plant.title for plant in PLANTS]
+    if len(titles) < 2:
+        return titles
+    return st.sidebar.multiselect("Завод", options=titles, default=titles) or titles
+
+
+def _fetch_in_pool(ctx, spreadsheet_id):
+    # st.cache_data у потоці пулу працює лише з контекстом сесії, що його викликала
+    add_script_run_ctx(threading.current_thread(), ctx)
+    return fetch_fact_table(spreadsheet_id)
+
+
+def load_plants_fact():
+    """
+    Завантажує таблиці всіх заводів паралельно та повертає об'єднану таблицю фактів.
+    Завод, що не відповів за PLANT_WAIT секунд або повернув помилку, пропускається
+    з попередженням і не блокує решту.
+    """
+    ctx = get_script_run_ctx()
+    futures = [(plant, _plant_pool.submit(_fetch_in_pool, ctx, plant.spreadsheet_id)) for plant in PLANTS]
+    deadline = time.monotonic() + PLANT_WAIT
+    prefix = len(PLANTS) > 1
+
+    tables = {}
+    for plant, future in futures:
+        label = f"{plant.title}: " if prefix else ""
+        try:
+            tables[plant.title] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except StaleDataError as stale:
+            st.warning(label + snapshot_notice(stale.fetched_at))
+            tables[plant.title] = stale.data
+        except FutureTimeoutError:
+            st.warning(f"{label}дані ще завантажуються і з'являться після оновлення сторінки.")
+        except Exception as e:
+            st.error(f"{label}Помилка завантаження даних: {str(e)}")
+
+    if not tables:
+        return None
+    revisions = tuple((title, fact.attrs.get("revision")) for title, fact in tables.items())
+    return merge_plants(revisions, tables)
+
+
+@st.cache_resource(ttl=DATA_TTL)
+def stored_department_frame(root, revisions, department_key):
+    """
+    Таблиця відділу з локального сховища для ревізій revisions
+    ((завод, ID таблиці, ревізія) вибраних заводів). Дані одного заводу
+    відображаються з файлу без копіювання; кількох - об'єднуються один раз на процес.
+    """
+    department = get_department(department_key)
+    tables = {
+        title: data_store.read_department(root, spreadsheet_id, revision, department)
+        for title, spreadsheet_id, revision in revisions
+    }
+    if len(tables) == 1:
+        frame = next(iter(tables.values()))
+        frame = frame if not frame.empty else pd.DataFrame()
+    else:
+        frame = department_frame(merge_plant_tables(tables), department)
+    frame.attrs["revisions"] = revisions
+    return freeze_frame(frame)
+
+
+def load_stored_department(root, department_key, plants=None):
+    """Як load_department_data, але з поточних ревізій локального сховища (data_store.py)."""
+    revisions = []
+    for plant in PLANTS:
+        if plants is not None and plant.title not in plants:
+            continue
+        revision = data_store.current_revision(root, plant.spreadsheet_id)
+        label = f"{plant.title}: " if len(PLANTS) > 1 else ""
+        if revision is None:
+            st.warning(f"{label}дані ще не записані у сховище.")
+            continue
+        if time.time() - data_store.revision_time(revision) > data_store.MAX_REVISION_AGE:
+            st.warning(label + snapshot_notice(data_store.revision_time(revision)))
+        revisions.append((plant.title, plant.spreadsheet_id, revision))
+
+    if not revisions:
+        return None
+    return stored_department_frame(root, tuple(revisions), department_key).copy(deep=False)
+
+
+def load_department_data(department_key, plants=None):
+    """
+    Повертає DataFrame відділу department_key для заводів plants (усіх, якщо None)
+    або None, якщо дані не вдалося завантажити. Попередження про знімок
+    та помилки показуються на сторінці. Якщо задано DATA_STORE_DIR, дані
+    беруться з локального сховища, а не з Google Sheets.
+
+    DataFrame - поверхнева копія спільної таблиці: колонки можна додавати
+    й замінювати, але масиви даних лише для читання.
+    """
+    root = data_store.store_dir()
+    if root:
+        return load_stored_department(root, department_key, plants)
+
+    fact = load_plants_fact()
+    if fact is None:
+        return None
+    plants = tuple(plants) if plants is not None else None
+    frame = shared_department_frame(fact.attrs["revisions"], department_key, plants, fact)
+    return frame.copy(deep=False)
+
+
+def load_department_source(department_key, plants=None):
+    """
+    Джерело даних відділу для сторінки: warehouse.WarehouseSource, якщо задано
+    WAREHOUSE_PATH (фільтри та групування в SQLite), інакше analytics.FrameSource
+    над load_department_data. None, якщо дані не вдалося завантажити.
+    """
+    path = warehouse.warehouse_path()
+    if not path:
+        df = load_department_data(department_key, plants)
+        if df is None:
+            return None
+        plants = tuple(plants) if plants is not None else None
+        sketches = department_sketches(df.attrs.get("revisions"), department_key, plants, df)
+        return analytics.FrameSource(df, sketches)
+
+    synced_at = warehouse.last_sync(path, plants) if os.path.exists(path) else None
+    if synced_at is None:
+        st.warning("Дані ще не синхронізовані у сховище.")
+        return None
+    if time.time() - synced_at > warehouse.MAX_SYNC_AGE:
+        st.warning(snapshot_notice(synced_at))
+    return warehouse.WarehouseSource(path, get_department(department_key), plants)
+
+
+def fragment(func):
+    """
+    Частина сторінки, що перезапускається окремо: зміна віджета всередині
+    func перезапускає лише func з аргументами останнього повного запуску, а не
+    весь скрипт (st.fragment, у Streamlit 1.33-1.36 - st.experimental_fragment).
+    У версіях без фрагментів (зафіксована в requirements.txt 1.31) func
+    виконується як звичайна функція під час повного перезапуску.
+    """
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator else func
@@ -4,89 +4,25 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 import calendar
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import analytics
+import charts
+from analytics import FilterSpec
+from page_data import load_department_source, select_plants
 
-# ---------------------------
-# Налаштування підключення до Google Sheets
-# ---------------------------
-SHEET_ID = "1cbQtfwOR32_J7sIGuZnqmEINKrc1hqcAwAZVmOADPMA"
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["gcp_service_account"], scopes=SCOPES
-)
-service = build("sheets", "v4", credentials=credentials)
-
-# ---------------------------
-# Функція для перетворення числових колонок
-# ---------------------------
-def convert_numeric_columns(df, columns):
-    """
-    Перетворює строкові колонки в числові, замінюючи коми на крапки.
-    """
-    for col in columns:
-        if col in df.columns:
-            if df[col].dtype == object:  # Якщо колонка строкова
-                df[col] = df[col].apply(lambda x: str(x).replace(",", ".") if isinstance(x, str) else x)
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    return df
+# Метрики відділу, що усереднюються у звітах
+METRICS = ("Час на операцію", "Продуктивність за годину", "Відсоток браку")
 
 # ---------------------------
 # Функція загрузки даних для відділу ФАСОВКА
 # ---------------------------
-@st.cache_data
-def load_facovka_data(sheet_name):
-    try:
-        # Отримуємо дані з вказаного листа
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID, range=sheet_name
-        ).execute()
-        values = result.get("values", [])
-        if not values:
-            st.error("Помилка завантаження даних!")
-            return pd.DataFrame()
-        
-        # Створюємо DataFrame, пропускаючи першу строку з заголовками
-        df = pd.DataFrame(values[1:], columns=values[0])
-        df.columns = df.columns.str.strip()
-        
-        # Для листа ФАСОВКА стовпці:
-        # A - Номер, B - Позиція (Entry Number), C - ПІБ, D - Тип обладнання, 
-        # E - Час на операцію, F - Продуктивність за годину, G - Відсоток браку,
-        # H - Кількість операторів, I - Тип продукту, J - Об'єм,
-        # K - День, L - Місяць, M - Рік
-    
-        # Переіменуємо стовпець B якщо він є
-        if len(df.columns) > 1 and df.columns[1] not in ["ПІБ", "Позиція"]:
-            df.rename(columns={df.columns[1]: "Позиція"}, inplace=True)
-    
-        # Створюємо стовпець "Дата" на основі K, L, M:
-        if set(["День", "Місяць", "Рік"]).issubset(df.columns):
-            try:
-                df["Дата"] = pd.to_datetime(
-                    df["День"].astype(str) + "." + df["Місяць"].astype(str) + "." + df["Рік"].astype(str),
-                    format="%d.%m.%Y", errors="coerce"
-                )
-            except Exception as e:
-                st.warning(f"Помилка при створенні стовпця 'Дата': {str(e)}")
-        
-        # Перетворюємо числові стовпці
-        numeric_cols = ["Час на операцію", "Продуктивність за годину", "Відсоток браку", "Кількість операторів"]
-        df = convert_numeric_columns(df, numeric_cols)
-        
-        # Конвертація об'єму якщо це можливо (видалити "мл")
-        if "Об'єм" in df.columns:
-            try:
-                # Улучшене регулярне вираз для вилучення чисел, в тому числі з десятковою точкою
-                df["Об'єм_число"] = df["Об'єм"].str.extract(r'(\d+(?:\.\d+)?)').astype(float)
-            except Exception:
-                st.warning("Не вдалося розпізнати числові значення об'єму")
-        
-        return df
-    except Exception as e:
-        st.error(f"Помилка завантаження даних: {str(e)}")
-        return pd.DataFrame()
+def load_facovka_data(department_key, plants=None):
+    # Джерело даних відділу: типізований DataFrame - "Дата" з K, L, M, числові стовпці, "Об'єм_число", колонка B - "Позиція"
+    source = load_department_source(department_key, plants)
+    if source is None:
+        return analytics.FrameSource(pd.DataFrame())
+    if source.empty:
+        st.error("Помилка завантаження даних!")
+    return source
 
 # ---------------------------
 # Функція для отримання дат за пресетами
@@ -124,23 +60,11 @@ def get_preset_dates(preset):
     return start_date, end_date
 
 # ---------------------------
-# Функція для підрахунку робочих днів (понеділок-п'ятниця)
+# Загрузка даних відділу ФАСОВКА
 # ---------------------------
-def count_working_days(start, end):
-    num = 0
-    current = start
-    while current <= end:
-        if current.weekday() < 5:
-            num += 1
-        current += timedelta(days=1)
-    return num
+facovka_source = load_facovka_data("фасовка", select_plants())
 
-# ---------------------------
-# Загрузка даних з листа "ФАСОВКА"
-# ---------------------------
-facovka_df = load_facovka_data("ФАСОВКА")
-
-if facovka_df.empty:
+if facovka_source.empty:
     st.warning("Дані відсутні або не завантажені.")
 else:
     # ---------------------------
@@ -167,9 +91,10 @@ else:
         start_date, end_date = get_preset_dates(selected_preset)
         st.sidebar.write(f"Період: {start_date.strftime('%d.%m.%Y')} - {end_date.strftime('%d.%m.%Y')}")
     else:
-        if pd.notnull(facovka_df["Дата"].min()) and pd.notnull(facovka_df["Дата"].max()):
-            min_date = facovka_df["Дата"].min().date()
-            max_date = facovka_df["Дата"].max().date()
+        first_date, last_date = facovka_source.date_range()
+        if pd.notnull(first_date) and pd.notnull(last_date):
+            min_date = first_date.date()
+            max_date = last_date.date()
         else:
             min_date = max_date = date.today()
         date_cols = st.sidebar.columns(2)
@@ -178,53 +103,57 @@ else:
     
     if start_date > end_date:
         st.sidebar.error("Початок періоду не може бути пізніше, ніж кінець.")
-        filtered_df = pd.DataFrame()
-    else:
-        filtered_df = facovka_df[(facovka_df["Дата"] >= pd.to_datetime(start_date)) & 
-                                (facovka_df["Дата"] <= pd.to_datetime(end_date))]
+    filtered_df = facovka_source.period(start_date, end_date)
     
     # Додаткові фільтри
     st.sidebar.markdown("---")
+    selected_products = selected_equipments = None
+    selected_employee = None
     
     # Фільтр по продукту (якщо є дані)
-    unique_products = sorted(filtered_df["Тип продукту"].dropna().unique().tolist())
+    unique_products = analytics.filter_options(filtered_df, "Тип продукту")
     if unique_products:
         all_products = ["Усі"] + unique_products
-        selected_products = st.sidebar.multiselect(
+        selected = st.sidebar.multiselect(
             "Оберіть продукт", 
             options=all_products, 
             default=["Усі"]
         )
-        if "Усі" not in selected_products:
-            filtered_df = filtered_df[filtered_df["Тип продукту"].isin(selected_products)]
+        if "Усі" not in selected:
+            selected_products = tuple(selected)
+            filtered_df = analytics.filter_values(filtered_df, "Тип продукту", selected_products)
     else:
         st.sidebar.info("Немає доступних продуктів за вибраний період.")
     
     # Фільтр по обладнанню
-    unique_equipments = sorted(filtered_df["Тип обладнання"].dropna().unique().tolist())
+    unique_equipments = analytics.filter_options(filtered_df, "Тип обладнання")
     if unique_equipments:
         all_equipments = ["Усі"] + unique_equipments
-        selected_equipments = st.sidebar.multiselect(
+        selected = st.sidebar.multiselect(
             "Оберіть обладнання", 
             options=all_equipments, 
             default=["Усі"]
         )
-        if "Усі" not in selected_equipments:
-            filtered_df = filtered_df[filtered_df["Тип обладнання"].isin(selected_equipments)]
+        if "Усі" not in selected:
+            selected_equipments = tuple(selected)
+            filtered_df = analytics.filter_values(filtered_df, "Тип обладнання", selected_equipments)
     else:
         st.sidebar.info("Немає доступного обладнання за вибраний період.")
     
     # Фільтр по співробітнику
-    unique_employees = sorted(filtered_df["ПІБ"].dropna().unique().tolist())
+    unique_employees = analytics.filter_options(filtered_df, "ПІБ")
     if unique_employees:
-        selected_employee = st.sidebar.selectbox(
+        selected = st.sidebar.selectbox(
             "Оберіть співробітника", 
             options=["Усі"] + unique_employees
         )
-        if selected_employee != "Усі":
+        if selected != "Усі":
+            selected_employee = selected
             filtered_df = filtered_df[filtered_df["ПІБ"] == selected_employee]
     else:
         st.sidebar.info("Немає даних про співробітників за вибраний період.")
+    
+    spec = FilterSpec(start_date, end_date, selected_products, selected_equipments, selected_employee)
         
     # ---------------------------
     # Контент в залежності від вибраного звіту
@@ -235,10 +164,11 @@ else:
     st.markdown("---")
     
     # Загальні KPI для всіх звітів
-    total_operations = len(filtered_df)
-    avg_time = filtered_df["Час на операцію"].mean() if "Час на операцію" in filtered_df.columns and total_operations > 0 else 0
-    avg_productivity = filtered_df["Продуктивність за годину"].mean() if "Продуктивність за годину" in filtered_df.columns and total_operations > 0 else 0
-    avg_defect = filtered_df["Відсоток браку"].mean() if "Відсоток браку" in filtered_df.columns and total_operations > 0 else 0
+    kpi = analytics.summary(filtered_df, METRICS)
+    total_operations = kpi["Кількість операцій"]
+    avg_time = kpi["Час на операцію"]
+    avg_productivity = kpi["Продуктивність за годину"]
+    avg_defect = kpi["Відсоток браку"]
     
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Кількість операцій", total_operations)
@@ -253,26 +183,9 @@ else:
         st.subheader("Огляд ключових показників")
         
         # Графік трендів по днях
+        overview = analytics.overview_trends(filtered_df, METRICS)
         if not filtered_df.empty:
-            # Формуємо словника агрегацій тільки для стовпців, які існують
-            agg_dict = {}
-            if "Час на операцію" in filtered_df.columns:
-                agg_dict["Час на операцію"] = "mean"
-            if "Продуктивність за годину" in filtered_df.columns:
-                agg_dict["Продуктивність за годину"] = "mean"
-            if "Відсоток браку" in filtered_df.columns:
-                agg_dict["Відсоток браку"] = "mean"
-            
-            # Для підрахунку кількості операцій використовуємо size()
-            trend_count = filtered_df.groupby("Дата").size().reset_index(name="Кількість операцій")
-            
-            # Якщо є інші метрики, додаємо їх
-            if agg_dict:
-                trend_metrics = filtered_df.groupby("Дата", as_index=False).agg(agg_dict)
-                # Об'єднуємо результати
-                trend_data = pd.merge(trend_count, trend_metrics, on="Дата", how="left")
-            else:
-                trend_data = trend_count
+            trend_data = overview["trend"]
             
             tabs = st.tabs(["Кількість операцій", "Час на операцію", "Продуктивність", "Брак"])
             
@@ -289,7 +202,7 @@ else:
                     xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig1, use_container_width=True)
+                charts.show(fig1)
             
             with tabs[1]:
                 fig2 = px.line(
@@ -305,7 +218,7 @@ else:
                     xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig2, use_container_width=True)
+                charts.show(fig2)
             
             with tabs[2]:
                 fig3 = px.line(
@@ -321,7 +234,7 @@ else:
                     xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig3, use_container_width=True)
+                charts.show(fig3)
             
             with tabs[3]:
                 fig4 = px.line(
@@ -337,7 +250,7 @@ else:
                     xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                     yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
                 )
-                st.plotly_chart(fig4, use_container_width=True)
+                charts.show(fig4)
         else:
             st.warning("Немає даних для відображення трендів.")
         
@@ -347,7 +260,7 @@ else:
         with cols[0]:
             st.subheader("Розподіл по типу продукту")
             if "Тип продукту" in filtered_df.columns:
-                prod_count = filtered_df.groupby("Тип продукту").size().reset_index(name="Кількість")
+                prod_count = overview["products"]
                 fig_prod = px.pie(
                     prod_count,
                     names="Тип продукту",
@@ -358,14 +271,14 @@ else:
                 )
                 fig_prod.update_traces(textposition='inside', textinfo='percent+label')
                 fig_prod.update_layout(legend=dict(orientation="h", y=-0.2))
-                st.plotly_chart(fig_prod, use_container_width=True)
+                charts.show(fig_prod)
             else:
                 st.warning("Немає даних про типи продуктів.")
         
         with cols[1]:
             st.subheader("Розподіл по обладнанню")
             if "Тип обладнання" in filtered_df.columns:
-                eq_count = filtered_df.groupby("Тип обладнання").size().reset_index(name="Кількість")
+                eq_count = overview["equipment"]
                 fig_eq = px.pie(
                     eq_count,
                     names="Тип обладнання",
@@ -376,7 +289,7 @@ else:
                 )
                 fig_eq.update_traces(textposition='inside', textinfo='percent+label')
                 fig_eq.update_layout(legend=dict(orientation="h", y=-0.2))
-                st.plotly_chart(fig_eq, use_container_width=True)
+                charts.show(fig_eq)
             else:
                 st.warning("Немає даних про типи обладнання.")
     
@@ -386,26 +299,7 @@ else:
         
         if not filtered_df.empty and "ПІБ" in filtered_df.columns:
             # Агрегація даних по операторам
-            # Перевіряємо наявність стовпців перед агрегацією
-            agg_dict = {}
-            
-            # Використовуємо size() для підрахунку кількості записів
-            operator_count = filtered_df.groupby("ПІБ").size().reset_index(name="Кількість операцій")
-            
-            # Агрегуємо інші числові показники, якщо вони є
-            if "Час на операцію" in filtered_df.columns:
-                agg_dict["Час на операцію"] = "mean"
-            if "Продуктивність за годину" in filtered_df.columns:
-                agg_dict["Продуктивність за годину"] = "mean"
-            if "Відсоток браку" in filtered_df.columns:
-                agg_dict["Відсоток браку"] = "mean"
-            
-            if agg_dict:
-                operator_metrics = filtered_df.groupby("ПІБ", as_index=False).agg(agg_dict)
-                # Об'єднуємо результати
-                operator_stats = pd.merge(operator_count, operator_metrics, on="ПІБ", how="left")
-            else:
-                operator_stats = operator_count
+            operator_stats = analytics.operator_stats(filtered_df, METRICS)
             
             # Сортування по продуктивності (якщо колонка є)
             if "Продуктивність за годину" in operator_stats.columns:
@@ -443,7 +337,7 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_prod, use_container_width=True)
+            charts.show(fig_prod)
             
             # Час на операцію
             operator_stats_time = operator_stats.sort_values("Час на операцію")
@@ -466,7 +360,7 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_time, use_container_width=True)
+            charts.show(fig_time)
             
             # Процент брака
             operator_stats_defect = operator_stats.sort_values("Відсоток браку")
@@ -489,7 +383,7 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_defect, use_container_width=True)
+            charts.show(fig_defect)
             
             # Таблиця для сводки
             st.subheader("Зведена таблиця показників операторів")
@@ -515,49 +409,20 @@ else:
         st.subheader("Аналіз завантаження обладнання")
         
         if "Тип обладнання" in filtered_df.columns and not filtered_df.empty:
-            # Розрахунок очікуваних робочих днів
-            working_days = count_working_days(start_date, end_date)
-            expected_minutes = working_days * 480  # 8 годин * 60 хвилин
+            # Розрахунок завантаження відносно планових змін у робочі дні
+            utilization = analytics.equipment_utilization(filtered_df, spec, METRICS)
+            equipment_df = utilization["stats"]
             
-            # Загальна статистика по обладнанню
-            equipment_stats = []
-            
-            for equip, group in filtered_df.groupby("Тип обладнання"):
-                distinct_days = group["Дата"].dt.date.nunique()
-                total_minutes = group["Час на операцію"].sum()
-                operations_count = len(group)
-                
-                day_util_pct = (distinct_days / working_days) * 100 if working_days > 0 else 0
-                minutes_util_pct = (total_minutes / expected_minutes) * 100 if expected_minutes > 0 else 0
-                
-                equipment_stats.append({
-                    "Тип обладнання": equip,
-                    "Реальні дні роботи": distinct_days,
-                    "Планові дні роботи": working_days,
-                    "Завантаженість (дні), %": f"{day_util_pct:.1f}%",
-                    "Фактичні години": total_minutes / 60,
-                    "Планові години": expected_minutes / 60,
-                    "Завантаженість (години), %": f"{minutes_util_pct:.1f}%",
-                    "Кількість операцій": operations_count,
-                    "Операцій на день": operations_count / distinct_days if distinct_days > 0 else 0
-                })
-            
-            equipment_df = pd.DataFrame(equipment_stats)
-            
-            # Відображення повної таблиці
-            st.dataframe(equipment_df)
+            # Відображення повної таблиці (відсотки - рядками "12.3%")
+            percent_columns = ["Завантаженість (дні), %", "Завантаженість (години), %"]
+            st.dataframe(equipment_df.assign(**{
+                column: equipment_df[column].map("{:.1f}%".format) for column in percent_columns
+            }))
             
             # Візуалізація завантаження обладнання по днях
-            equipment_df_sorted = equipment_df.copy()
-            try:
-                equipment_df_sorted["Завантаженість (дні), %"] = equipment_df_sorted["Завантаженість (дні), %"].str.rstrip("%").astype(float)
-            except Exception:
-                # Якщо перетворення не вдалося, використовуємо оригінальні значення
-                st.warning("Помилка при перетворенні відсотків завантаженості в числа")
-                # Створюємо числову колонку напрямую з day_util_pct
-                equipment_df_sorted["Завантаженість (дні), %"] = [float(e["Завантаженість (дні), %"].rstrip("%") if isinstance(e["Завантаженість (дні), %"], str) else e["Завантаженість (дні), %"]) for _, e in equipment_df.iterrows()]
-            
-            equipment_df_sorted = equipment_df_sorted.sort_values("Завантаженість (дні), %", ascending=False)
+            equipment_df_sorted = equipment_df.assign(**{
+                "Завантаженість (дні), %": equipment_df["Завантаженість (дні), %"].round(1)
+            }).sort_values("Завантаженість (дні), %", ascending=False)
             
             fig_days = px.bar(
                 equipment_df_sorted,
@@ -576,15 +441,10 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)', range=[0, 110])
             )
-            st.plotly_chart(fig_days, use_container_width=True)
+            charts.show(fig_days)
             
             # Аналіз продуктивності по типам обладнання
-            equip_perf = filtered_df.groupby("Тип обладнання", as_index=False).agg({
-                "Продуктивність за годину": "mean",
-                "Час на операцію": "mean",
-                "Відсоток браку": "mean"
-            })
-            
+            equip_perf = utilization["performance"]
             equip_perf_sorted = equip_perf.sort_values("Продуктивність за годину", ascending=False)
             fig_perf = px.bar(
                 equip_perf_sorted,
@@ -602,12 +462,11 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_perf, use_container_width=True)
+            charts.show(fig_perf)
             
             # Теплова карта обладнання по днях
             if not filtered_df.empty:
-                eq_daily = filtered_df.groupby([filtered_df["Дата"].dt.date, "Тип обладнання"]).size().reset_index(name="Операцій")
-                eq_daily_pivot = eq_daily.pivot(index="Дата", columns="Тип обладнання", values="Операцій").fillna(0)
+                eq_daily_pivot = utilization["daily"]
 
                 # Перетворення в формат для heatmap
                 dates = eq_daily_pivot.index.tolist()
@@ -632,7 +491,7 @@ else:
                     plot_bgcolor='rgba(240,240,240,0.8)',
                 )
                 
-                st.plotly_chart(fig_heatmap, use_container_width=True)
+                charts.show(fig_heatmap)
         else:
             st.warning("Немає даних для аналізу завантаження обладнання.")
     
@@ -646,8 +505,11 @@ else:
             avg_operators = filtered_df["Кількість операторів"].mean() if "Кількість операторів" in filtered_df.columns else 0
             
             # Розрахунок часових показників
-            days_in_period = (end_date - start_date).days + 1
-            working_days = count_working_days(start_date, end_date)
+            production = analytics.productivity(
+                filtered_df, spec, details=("ПІБ", "Тип обладнання", "Продуктивність за годину")
+            )
+            days_in_period = production["days"]
+            working_days = production["working_days"]
             
             # Розрахунок продуктивності
             daily_prod = total_volume / days_in_period if days_in_period > 0 else 0
@@ -659,25 +521,7 @@ else:
             col3.metric("Продуктивність у робочі дні", f"{working_day_prod:.1f} од/день")
             
             # Аналіз продуктивності по днях
-            # Формуємо словника агрегацій тільки для стовпців, які існують
-            agg_dict = {}
-            if "Продуктивність за годину" in filtered_df.columns:
-                agg_dict["Продуктивність за годину"] = "mean"
-            if "Час на операцію" in filtered_df.columns:
-                agg_dict["Час на операцію"] = "sum"
-            if "Об'єм_число" in filtered_df.columns:
-                agg_dict["Об'єм_число"] = "sum"
-            
-            # Для підрахунку кількості операцій використовуємо size()
-            daily_count = filtered_df.groupby(filtered_df["Дата"].dt.date).size().reset_index(name="Кількість операцій")
-            
-            # Якщо є інші метрики, додаємо їх
-            if agg_dict:
-                daily_metrics = filtered_df.groupby(filtered_df["Дата"].dt.date).agg(agg_dict).reset_index()
-                # Об'єднуємо результати
-                daily_data = pd.merge(daily_count, daily_metrics, on="Дата", how="left")
-            else:
-                daily_data = daily_count
+            daily_data = production["daily"]
             
             # Візуалізація продуктивності по днях
             fig_daily = px.bar(
@@ -707,28 +551,10 @@ else:
                 xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_daily, use_container_width=True)
+            charts.show(fig_daily)
             
             # Аналіз продуктивності по типам продукції
-            # Формуємо словника агрегацій тільки для стовпців, які існують
-            agg_dict = {}
-            if "Продуктивність за годину" in filtered_df.columns:
-                agg_dict["Продуктивність за годину"] = "mean"
-            if "Час на операцію" in filtered_df.columns:
-                agg_dict["Час на операцію"] = "mean"
-            if "Об'єм_число" in filtered_df.columns:
-                agg_dict["Об'єм_число"] = "sum"
-            
-            # Для підрахунку кількості операцій використовуємо size()
-            product_count = filtered_df.groupby("Тип продукту").size().reset_index(name="Кількість операцій")
-            
-            # Якщо є інші метрики, додаємо їх
-            if agg_dict:
-                product_metrics = filtered_df.groupby("Тип продукту", as_index=False).agg(agg_dict)
-                # Об'єднуємо результати
-                product_perf = pd.merge(product_count, product_metrics, on="Тип продукту", how="left")
-            else:
-                product_perf = product_count
+            product_perf = production["products"]
             
             # Сортування по продуктивності
             product_perf_sorted = product_perf.sort_values("Продуктивність за годину", ascending=False)
@@ -764,7 +590,7 @@ else:
                 height=500,  # Увеличуємо висоту для кращої читаності
                 margin=dict(b=100)  # Увеличуємо нижній відступ для міток
             )
-            st.plotly_chart(fig_prod_eff, use_container_width=True)
+            charts.show(fig_prod_eff)
             
             # Таблиця продуктивності по типам продукції
             st.subheader("Продуктивність за типами продукції")
@@ -775,27 +601,8 @@ else:
             if "Час на операцію" in filtered_df.columns:
                 st.subheader("Найшвидші та найповільніші фасовки за типами продукту")
                 
-                # Створюємо DataFrame для зберігання мінімального та максимального часу операції
-                product_time_minmax = pd.DataFrame()
-                
-                # Для кожного типу продукта знаходимо мінімальне та максимальне час
-                for product_type in filtered_df["Тип продукту"].unique():
-                    product_data = filtered_df[filtered_df["Тип продукту"] == product_type]
-                    if len(product_data) > 0:
-                        # Отримуємо дані для найшвидшої та найповільнішої фасовки
-                        fastest = product_data.loc[product_data["Час на операцію"].idxmin()]
-                        slowest = product_data.loc[product_data["Час на операцію"].idxmax()]
-                        
-                        # Додаємо дані в DataFrame
-                        product_time_minmax = pd.concat([product_time_minmax, pd.DataFrame({
-                            "Тип продукту": [product_type, product_type],
-                            "Категорія": ["Найшвидша", "Найповільніша"],
-                            "Час на операцію": [fastest["Час на операцію"], slowest["Час на операцію"]],
-                            "Дата": [fastest["Дата"], slowest["Дата"]],
-                            "ПІБ": [fastest["ПІБ"], slowest["ПІБ"]] if "ПІБ" in fastest else ["", ""],
-                            "Тип обладнання": [fastest["Тип обладнання"], slowest["Тип обладнання"]] if "Тип обладнання" in fastest else ["", ""],
-                            "Продуктивність за годину": [fastest["Продуктивність за годину"], slowest["Продуктивність за годину"]] if "Продуктивність за годину" in fastest else [0, 0]
-                        })])
+                # Мінімальний та максимальний час операції по кожному типу продукту
+                product_time_minmax = production["extremes"]
                 
                 # Якщо є дані, будуємо візуалізацію
                 if len(product_time_minmax) > 0:
@@ -838,7 +645,7 @@ else:
                         height=500,  # Увеличуємо висоту для кращої читаності
                         margin=dict(b=100)  # Увеличуємо нижній відступ для міток
                     )
-                    st.plotly_chart(fig_minmax, use_container_width=True)
+                    charts.show(fig_minmax)
                     
                     # Таблиця з деталями
                     st.subheader("Деталі найшвидших та найповільніших фасовок")
@@ -846,7 +653,8 @@ else:
             
             # Співвідношення часу операції до продуктивності
             st.subheader("Співвідношення часу операції до продуктивності")
-            fig_scatter = px.scatter(
+            # Понад charts.WEBGL_POINTS операцій - щільність і найвіддаленіші точки замість усіх маркерів
+            fig_scatter = charts.scatter_figure(
                 filtered_df,
                 x="Час на операцію",
                 y="Продуктивність за годину",
@@ -864,7 +672,7 @@ else:
                 xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_scatter, use_container_width=True)
+            charts.show(fig_scatter)
         else:
             st.warning("Немає даних для аналізу продуктивності виробництва.")
     
@@ -874,10 +682,12 @@ else:
         
         if "Відсоток браку" in filtered_df.columns and not filtered_df.empty:
             # Статистика по браку
-            total_operations = len(filtered_df)
-            avg_defect = filtered_df["Відсоток браку"].mean()
-            max_defect = filtered_df["Відсоток браку"].max()
-            min_defect = filtered_df["Відсоток браку"].min()
+            quality = analytics.quality_report(
+                filtered_df, spec, "Відсоток браку", by=("Тип продукту", "Тип обладнання", "ПІБ")
+            )
+            avg_defect = quality["mean"]
+            max_defect = quality["max"]
+            min_defect = quality["min"]
             
             col1, col2, col3 = st.columns(3)
             col1.metric("Середній відсоток браку", f"{avg_defect:.2f}%")
@@ -885,7 +695,7 @@ else:
             col3.metric("Мінімальний відсоток браку", f"{min_defect:.2f}%")
             
             # Аналіз браку по днях
-            daily_defect = filtered_df.groupby(filtered_df["Дата"].dt.date)["Відсоток браку"].mean().reset_index()
+            daily_defect = quality["daily"]
             
             fig_daily = px.line(
                 daily_defect,
@@ -912,18 +722,10 @@ else:
                 xaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)'),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_daily, use_container_width=True)
+            charts.show(fig_daily)
             
             # Аналіз браку по продуктам
-            # Підрахунок операцій з використанням size()
-            product_count = filtered_df.groupby("Тип продукту").size().reset_index(name="Кількість операцій")
-            
-            # Агрегуємо середній відсоток браку
-            product_defect_mean = filtered_df.groupby("Тип продукту", as_index=False)["Відсоток браку"].mean()
-            
-            # З'єднуємо результати
-            product_defect = pd.merge(product_count, product_defect_mean, on="Тип продукту", how="left")
-            product_defect_sorted = product_defect.sort_values("Відсоток браку", ascending=False)
+            product_defect_sorted = quality["by"]["Тип продукту"]
             
             fig_prod = px.bar(
                 product_defect_sorted,
@@ -948,18 +750,10 @@ else:
                 xaxis=dict(showgrid=False, tickangle=45),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_prod, use_container_width=True)
+            charts.show(fig_prod)
             
             # Аналіз браку по обладнанню
-            # Підрахунок операцій з використанням size()
-            equip_count = filtered_df.groupby("Тип обладнання").size().reset_index(name="Кількість операцій")
-            
-            # Агрегуємо середній відсоток браку
-            equip_defect_mean = filtered_df.groupby("Тип обладнання", as_index=False)["Відсоток браку"].mean()
-            
-            # З'єднуємо результати
-            equip_defect = pd.merge(equip_count, equip_defect_mean, on="Тип обладнання", how="left")
-            equip_defect_sorted = equip_defect.sort_values("Відсоток браку", ascending=False)
+            equip_defect_sorted = quality["by"]["Тип обладнання"]
             
             fig_equip = px.bar(
                 equip_defect_sorted,
@@ -984,18 +778,10 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_equip, use_container_width=True)
+            charts.show(fig_equip)
             
             # Аналіз браку по операторам
-            # Підрахунок операцій з використанням size()
-            operator_count = filtered_df.groupby("ПІБ").size().reset_index(name="Кількість операцій")
-            
-            # Агрегуємо середній відсоток браку
-            operator_defect_mean = filtered_df.groupby("ПІБ", as_index=False)["Відсоток браку"].mean()
-            
-            # З'єднуємо результати
-            operator_defect = pd.merge(operator_count, operator_defect_mean, on="ПІБ", how="left")
-            operator_defect_sorted = operator_defect.sort_values("Відсоток браку", ascending=False)
+            operator_defect_sorted = quality["by"]["ПІБ"]
             
             # Діаграма браку по операторам
             fig_operator = px.bar(
@@ -1021,16 +807,12 @@ else:
                 xaxis=dict(showgrid=False),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_operator, use_container_width=True)
+            charts.show(fig_operator)
             
-            # Боксплот розподілу браку по типам продукції
-            fig_box = px.box(
-                filtered_df,
-                x="Тип продукту",
-                y="Відсоток браку",
-                color="Тип продукту",
-                title="Розподіл відсотка браку за типами продукції",
-                points="all"
+            # Боксплот розподілу браку по типам продукції: квартилі зі скетчів і викиди
+            box_stats, box_outliers = facovka_source.distribution("Відсоток браку", spec)
+            fig_box = charts.box_figure(
+                box_stats, box_outliers, "Тип продукту", "Розподіл відсотка браку за типами продукції"
             )
             fig_box.update_layout(
                 xaxis_title="Тип продукту",
@@ -1039,6 +821,6 @@ else:
                 xaxis=dict(showgrid=False, tickangle=45),
                 yaxis=dict(showgrid=True, gridwidth=1, gridcolor='rgba(220,220,220,0.8)')
             )
-            st.plotly_chart(fig_box, use_container_width=True)
+            charts.show(fig_box)
         else:
             st.warning("Немає даних для аналізу якості та браку.")
\ No newline at end of file
@@ -0,0 +1,39 @@
+import json
+import os
+from dataclasses import dataclass
+
+# ---------------------------
+# Реєстр заводів (майданчиків)
+# ---------------------------
+# Кожен завод веде власну таблицю Google Sheets з однаковим набором листів
+# відділів (departments.json). Щоб додати завод, достатньо описати його в plants.json.
+PLANTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plants.json")
+
+# Колонка-вимір з назвою заводу в об'єднаній таблиці фактів
+PLANT_COLUMN = "Завод"
+
+
+@dataclass(frozen=True)
+class Plant:
+    """key - ідентифікатор у коді, title - назва в інтерфейсі, spreadsheet_id - ID таблиці."""
+    key: str
+    title: str
+    spreadsheet_id: str
+
+
+def load_registry(path=PLANTS_FILE):
+    """Читає реєстр заводів з JSON-файлу та перевіряє його."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    plants = [Plant(**entry) for entry in config["plants"]]
+    if not plants:
+        raise ValueError("Реєстр заводів порожній")
+    for attr in ("key", "title", "spreadsheet_id"):
+        values = [getattr(p, attr) for p in plants]
+        if len(set(values)) != len(values):
+            raise ValueError(f"Значення '{attr}' у реєстрі заводів повторюються")
+    return plants
+
+
+PLANTS = load_registry()
@@ -0,0 +1,190 @@
+"""
+Обчислення звітів analytics на Polars: групування виконуються ліниво
+(LazyFrame) і паралельно в пулі потоків Polars, а не в одному потоці pandas.
+
+Вмикається змінною ANALYTICS_BACKEND=polars (потрібен пакет polars). Функції
+мають ті самі сигнатури й повертають ті самі таблиці pandas, що й звіти в
+analytics.py: ті самі групи, порядок, назви колонок і типи. Звіти, яких тут
+немає, і розрахунки поза групуваннями (межі періодів, ±2σ, сортування
+результатів) виконуються кодом analytics.
+"""
+import numpy as np
+import pandas as pd
+import polars as pl
+
+import analytics
+from analytics import DATE, EQUIPMENT, OPERATIONS, PRODUCT, PRODUCTIVITY, TIME, TOTAL_MINUTES, WORKING_DAYS
+
+# Службові колонки ключів групування
+_DAY = "__день"
+_PERIOD = "__період"
+
+
+def _lazy(df, columns):
+    """Потрібні колонки df як LazyFrame (NaN числових колонок стають null)."""
+    columns = [DATE] + [column for column in dict.fromkeys(columns) if column in df.columns and column != DATE]
+    return pl.from_pandas(df[columns]).lazy()
+
+
+def _period_start(interval):
+    # Початок періоду pandas: тиждень "W-MON" закінчується в понеділок, тобто починається у вівторок
+    day = pl.col(DATE).dt.date()
+    if interval == "Тиждень":
+        return (day - pl.duration(days=1)).dt.truncate("1w") + pl.duration(days=1)
+    if interval == "Місяць":
+        return day.dt.truncate("1mo")
+    return day
+
+
+def _aggregate(frame, keys, aggregations):
+    """Групування без порожніх ключів, групи відсортовані за ключами (як groupby)."""
+    return (
+        frame.filter(pl.all_horizontal(pl.col(keys).is_not_null()))
+        .group_by(keys)
+        .agg(aggregations)
+        .sort(keys)
+    )
+
+
+def _mean_or_sum(column, how):
+    expression = pl.col(column).mean() if how == "mean" else pl.col(column).sum()
+    return expression.alias(column)
+
+
+def _distinct_days():
+    return pl.col(_DAY).drop_nulls().n_unique().cast(pl.Int64).alias(WORKING_DAYS)
+
+
+def _to_pandas(frame):
+    """Результат Polars як pandas: лічильники int64, дні - об'єкти date (як dt.date)."""
+    result = frame.to_pandas()
+    for column in result.columns:
+        if result[column].dtype.kind == "u":
+            result[column] = result[column].astype(np.int64)
+        elif column == _DAY:
+            result[column] = result[column].dt.date
+    return result
+
+
+def _count_with(df, key, agg, count=OPERATIONS):
+    """Як analytics._count_with для однієї колонки-ключа key."""
+    agg = {column: how for column, how in agg.items() if column in df.columns}
+    frame = _lazy(df, [key, *agg])
+    result = _aggregate(frame, [key], [pl.len().alias(count)] + [_mean_or_sum(c, how) for c, how in agg.items()])
+    return _to_pandas(result.collect())
+
+
+def _count_by_day(df, agg, count=OPERATIONS):
+    """Як analytics._count_with за днями (ключ "Дата" - дати без часу)."""
+    agg = {column: how for column, how in agg.items() if column in df.columns}
+    frame = _lazy(df, agg).with_columns(pl.col(DATE).dt.date().alias(_DAY))
+    result = _aggregate(frame, [_DAY], [pl.len().alias(count)] + [_mean_or_sum(c, how) for c, how in agg.items()])
+    return _to_pandas(result.collect()).rename(columns={_DAY: DATE})
+
+
+# ---------------------------
+# Звіти
+# ---------------------------
+def operator_stats(df, metrics):
+    """Кількість операцій та середні метрики за операторами."""
+    return _count_with(df, analytics.EMPLOYEE, {column: "mean" for column in metrics})
+
+
+def equipment_utilization(df, spec, metrics=()):
+    """Завантаження обладнання за період spec (див. analytics.equipment_utilization)."""
+    working_days = analytics.count_working_days(spec.start, spec.end)
+    expected_minutes = working_days * analytics.SHIFT_MINUTES
+    means = analytics._present(df, metrics)
+
+    frame = _lazy(df, [EQUIPMENT, TIME, *means]).with_columns(pl.col(DATE).dt.date().alias(_DAY))
+    aggregations = [pl.len().alias(OPERATIONS), _distinct_days()]
+    if TIME in df.columns:
+        aggregations.append(pl.col(TIME).sum().alias(TOTAL_MINUTES))
+    aggregations += [pl.col(column).mean() for column in means]
+    daily = _aggregate(frame, [_DAY, EQUIPMENT], [pl.len().alias(OPERATIONS)])
+    grouped, daily = pl.collect_all([_aggregate(frame, [EQUIPMENT], aggregations), daily])
+    grouped = _to_pandas(grouped)
+
+    distinct_days = grouped[WORKING_DAYS].to_numpy()
+    operations = grouped[OPERATIONS].to_numpy()
+    if TIME in df.columns:
+        total_minutes = grouped[TOTAL_MINUTES].to_numpy()
+    else:
+        total_minutes = np.zeros(len(grouped), dtype=np.int64)
+    stats = pd.DataFrame({
+        EQUIPMENT: grouped[EQUIPMENT],
+        "Реальні дні роботи": distinct_days,
+        "Планові дні роботи": working_days,
+        "Завантаженість (дні), %": distinct_days / working_days * 100 if working_days > 0 else 0.0,
+        "Фактичні години": total_minutes / 60,
+        "Планові години": expected_minutes / 60,
+        "Завантаженість (години), %": (
+            total_minutes / expected_minutes * 100 if expected_minutes > 0 else 0.0
+        ),
+        OPERATIONS: operations,
+        "Операцій на день": operations / distinct_days,
+    })
+
+    # Дні x обладнання; комбінацій без операцій немає - вони заповнюються нулями
+    days, rows = np.unique(daily[_DAY].to_numpy(), return_inverse=True)
+    machines, columns = np.unique(daily[EQUIPMENT].to_numpy(), return_inverse=True)
+    table = np.zeros((len(days), len(machines)))
+    table[rows, columns] = daily[OPERATIONS].to_numpy()
+    return {
+        "working_days": working_days,
+        "stats": stats,
+        "performance": grouped[[EQUIPMENT, *means]] if means else None,
+        "daily": pd.DataFrame(
+            table,
+            index=pd.Index(pd.DatetimeIndex(days).date, dtype=object, name=DATE),
+            columns=pd.Index(machines, dtype=object, name=EQUIPMENT),
+        ),
+    }
+
+
+def quality_report(df, spec, column, by=(PRODUCT, EQUIPMENT)):
+    """Якість за колонкою column (див. analytics.quality_report)."""
+    values = df[column]
+    deviation = None
+    if spec.products is not None and len(spec.products) == 1:
+        deviation = analytics.time_deviation(df[df[PRODUCT] == spec.products[0]])
+    daily = _count_by_day(df, {column: "mean"}).drop(columns=OPERATIONS)
+    return {
+        "mean": values.mean(),
+        "max": values.max(),
+        "min": values.min(),
+        "daily": daily,
+        "by": {
+            dimension: _count_with(df, dimension, {column: "mean"}).sort_values(column, ascending=False)
+            for dimension in by
+        },
+        "deviation": deviation,
+    }
+
+
+def period_groups(df, interval):
+    """Агрегати тренду за періодами та обладнанням (див. analytics.period_groups)."""
+    frame = _lazy(df, [EQUIPMENT, TIME, PRODUCTIVITY]).with_columns(
+        _period_start(interval).alias(_PERIOD), pl.col(DATE).dt.date().alias(_DAY)
+    )
+    aggregations = [pl.len().alias(OPERATIONS), _distinct_days()]
+    if TIME in df.columns:
+        aggregations.append(pl.col(TIME).sum().alias(TOTAL_MINUTES))
+    if PRODUCTIVITY in df.columns:
+        aggregations.append(pl.col(PRODUCTIVITY).mean())
+    groups = _to_pandas(_aggregate(frame, [_PERIOD, EQUIPMENT], aggregations).collect())
+
+    periods = pd.to_datetime(groups.pop(_PERIOD)).dt.to_period(analytics.PERIOD_FREQ[interval])
+    groups.insert(0, "Період", periods)
+    if TIME not in df.columns:
+        groups[TOTAL_MINUTES] = 0.0
+    columns = ["Період", EQUIPMENT, OPERATIONS, WORKING_DAYS, TOTAL_MINUTES]
+    return groups[columns + ([PRODUCTIVITY] if PRODUCTIVITY in df.columns else [])]
+
+
+REPORTS = {
+    "operator_stats": operator_stats,
+    "equipment_utilization": equipment_utilization,
+    "quality_report": quality_report,
+    "period_groups": period_groups,
+}
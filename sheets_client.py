@@ -0,0 +1,255 @@
+import copy
+import os
+import random
+import threading
+import time
+
+import google_auth_httplib2
+import httplib2
+import streamlit as st
+from google.auth.credentials import AnonymousCredentials
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+# ---------------------------
+# Налаштування клієнта Google Sheets
+# ---------------------------
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+
+# Квота Sheets API на читання: 60 запитів на хвилину на користувача (сервісний акаунт)
+READ_REQUESTS_PER_MINUTE = 60
+
+# Статуси, після яких запит має сенс повторити
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BASE_DELAY = 1.0   # секунди
+MAX_DELAY = 32.0   # секунди
+HTTP_TIMEOUT = 60  # секунди
+# Скільки часу після збою віддавати знімки без звернення до API
+UNAVAILABLE_COOLDOWN = 60  # секунди
+
+
+class SheetsUnavailableError(Exception):
+    """Sheets API недоступний, а збереженого знімка для запиту немає."""
+
+
+class StaleDataError(Exception):
+    """
+    Дані отримано зі знімка. Кидається з функцій під st.cache_data,
+    щоб застарілі дані не потрапили в кеш; сторінка показує їх з попередженням.
+    """
+
+    def __init__(self, data, fetched_at):
+        super().__init__(fetched_at)
+        self.data = data
+        self.fetched_at = fetched_at
+
+
+# ---------------------------
+# Обмежувач частоти запитів (token bucket)
+# ---------------------------
+class TokenBucket:
+    """
+    Потокобезпечний token bucket: не більше rate_per_minute запитів на хвилину
+    з допустимим сплеском до capacity запитів.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1, rate_per_minute // 6)
+        self._tokens = float(self.capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Блокує потік, доки не з'явиться вільний токен."""
+        with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                self._sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY):
+    """Експоненційна затримка з повним джитером (full jitter)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retry_after(error):
+    """Повертає значення заголовка Retry-After у секундах, якщо сервер його надіслав."""
+    try:
+        return float(error.resp.get("retry-after"))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+# ---------------------------
+# Клієнт Google Sheets з повторними спробами та знімками
+# ---------------------------
+class SheetsClient:
+    """
+    Обгортка над Sheets API v4: повторне використання з'єднань (окремий
+    httplib2.Http на потік), обмеження частоти запитів, повторні спроби з
+    експоненційною затримкою і повернення останнього вдалого знімка при збої.
+    """
+
+    def __init__(self, credentials, api_endpoint=None, rate_limiter=None,
+                 max_retries=MAX_RETRIES, timeout=HTTP_TIMEOUT, sleep=time.sleep, clock=time.monotonic):
+        self._credentials = credentials
+        self._timeout = timeout
+        self._sleep = sleep
+        self._local = threading.local()
+        self._snapshots = {}
+        self._snapshots_lock = threading.Lock()
+        self._clock = clock
+        self._unavailable_until = 0.0
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter or TokenBucket(READ_REQUESTS_PER_MINUTE)
+
+        client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+        self._service = build(
+            "sheets", "v4",
+            credentials=credentials,
+            client_options=client_options,
+            requestBuilder=self._build_request,
+            cache_discovery=False,
+        )
+
+    def _http(self):
+        """Повертає авторизований httplib2-клієнт поточного потоку (keep-alive з'єднання)."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self._credentials, http=httplib2.Http(timeout=self._timeout)
+            )
+            self._local.http = http
+        return http
+
+    def _build_request(self, http, *args, **kwargs):
+        # httplib2.Http не є потокобезпечним, тому кожен потік отримує власний
+        return HttpRequest(self._http(), *args, **kwargs)
+
+    def _execute(self, request):
+        """Виконує запит з урахуванням квоти та повторює його при тимчасових помилках."""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return request.execute()
+            except HttpError as e:
+                if e.resp.status not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                    raise
+                delay = _retry_after(e)
+                # Великий Retry-After не повинен блокувати виконання сторінки
+                delay = backoff_delay(attempt) if delay is None else min(delay, MAX_DELAY)
+            except (OSError, httplib2.HttpLib2Error):
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+            self._sleep(delay)
+
+    def get_values(self, spreadsheet_id, range_name, **params):
+        """
+        Повертає відповідь values().get. Якщо API недоступний, повертає копію
+        останньої вдалої відповіді з ключем "snapshot_time" (час її отримання).
+        """
+        request = self._service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id, range=range_name, **params
+        )
+        return self._fetch(("values", spreadsheet_id, range_name, tuple(sorted(params.items()))), request)
+
+    def batch_get_values(self, spreadsheet_id, ranges, **params):
+        """
+        Повертає відповідь values().batchGet - кілька діапазонів за один запит.
+        При недоступності API, як і get_values, повертає знімок з "snapshot_time".
+        """
+        ranges = list(ranges)
+        request = self._service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id, ranges=ranges, **params
+        )
+        return self._fetch(("batch", spreadsheet_id, tuple(ranges), tuple(sorted(params.items()))), request)
+
+    def get_row_counts(self, spreadsheet_id):
+        """
+        Повертає {назва листа: кількість рядків сітки} для всіх листів таблиці
+        одним запитом метаданих та час знімка (None, якщо дані свіжі).
+        """
+        request = self._service.spreadsheets().get(
+            spreadsheetId=spreadsheet_id,
+            fields="sheets.properties(title,gridProperties.rowCount)",
+        )
+        metadata = self._fetch(("metadata", spreadsheet_id), request)
+        row_counts = {}
+        for sheet in metadata.get("sheets", []):
+            properties = sheet.get("properties", {})
+            row_counts[properties.get("title")] = properties.get("gridProperties", {}).get("rowCount", 0)
+        return row_counts, metadata.get("snapshot_time")
+
+    def get_row_count(self, spreadsheet_id, sheet_name):
+        """Повертає кількість рядків сітки листа (верхня межа кількості записів)."""
+        row_counts, _ = self.get_row_counts(spreadsheet_id)
+        return row_counts.get(sheet_name, 0)
+
+    def _fetch(self, key, request):
+        # Після недавнього збою не чекаємо повторних спроб, а одразу віддаємо знімок
+        if self._clock() < self._unavailable_until:
+            return self._snapshot(key, SheetsUnavailableError("Sheets API недоступний після недавнього збою"))
+        try:
+            result = self._execute(request)
+        except HttpError as e:
+            if e.resp.status in RETRYABLE_STATUSES:
+                self._unavailable_until = self._clock() + UNAVAILABLE_COOLDOWN
+            return self._snapshot(key, e)
+        except (OSError, httplib2.HttpLib2Error) as e:
+            self._unavailable_until = self._clock() + UNAVAILABLE_COOLDOWN
+            return self._snapshot(key, e)
+
+        with self._snapshots_lock:
+            self._snapshots[key] = (time.time(), result)
+        return result
+
+    def _snapshot(self, key, error):
+        with self._snapshots_lock:
+            snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            raise SheetsUnavailableError(str(error)) from error
+        fetched_at, result = snapshot
+        result = copy.copy(result)
+        result["snapshot_time"] = fetched_at
+        return result
+
+
+# ---------------------------
+# Спільний для всіх сесій і сторінок клієнт
+# ---------------------------
+@st.cache_resource
+def get_sheets_client():
+    """
+    Створює один клієнт на процес. Якщо задано SHEETS_API_ENDPOINT, клієнт
+    працює з локальним фейковим сервером (tools/fake_sheets_server.py) без авторизації.
+    """
+    api_endpoint = os.environ.get("SHEETS_API_ENDPOINT")
+    if api_endpoint:
+        credentials = AnonymousCredentials()
+    else:
+        credentials = service_account.Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"], scopes=SCOPES
+        )
+    return SheetsClient(credentials, api_endpoint=api_endpoint)
+
+
+def snapshot_notice(fetched_at):
+    """Текст попередження для UI, якщо дані взято зі знімка (fetched_at не None), інакше None."""
+    if fetched_at is None:
+        return None
+    fetched = time.strftime("%d.%m.%Y %H:%M", time.localtime(fetched_at))
+    return f"Google Sheets тимчасово недоступний. Показано дані станом на {fetched}."
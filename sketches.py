@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kernels import group_index
+
+# ---------------------------
+# Зливні скетчі квантилів (t-digest) для боксплотів
+# ---------------------------
+# Розподіл значень групи (наприклад, % браку продукту за день) стискається у
+# t-digest: відсортовані центроїди (середнє, вага), дрібні біля хвостів і великі
+# в середині. Скетчі кількох груп зливаються в один (усі дні періоду), тож
+# квартилі, медіана та вуса боксплоту для будь-якого діапазону рахуються з
+# центроїдів, а не з усіх рядків. Щоб показати викиди, скетч зберігає ще до
+# TAIL найменших і найбільших значень.
+#
+# Усі скетчі таблиці зберігаються разом у плоских масивах і будуються та
+# зливаються векторно, без циклу по групах.
+
+# Параметр стиснення t-digest: до ~COMPRESSION / 2 центроїдів на скетч
+COMPRESSION = 100
+# Скільки крайніх значень з кожного боку зберігати (і скільки викидів показувати)
+TAIL = 25
+# Множник міжквартильного розмаху для вусів, як у Plotly
+WHISKER_IQR = 1.5
+
+
+@dataclass(frozen=True)
+class SketchTable:
+    """
+    Скетчі груп keys (DataFrame значень ключів, як у kernels.GroupIndex).
+    group/mean/weight - центроїди всіх скетчів, відсортовані за (група, mean);
+    tail_group/tail_value - до TAIL найменших і найбільших значень кожної групи.
+    """
+    keys: pd.DataFrame
+    group: np.ndarray
+    mean: np.ndarray
+    weight: np.ndarray
+    tail_group: np.ndarray
+    tail_value: np.ndarray
+
+    @property
+    def size(self):
+        return len(self.keys)
+
+    def counts(self):
+        """Кількість значень у кожному скетчі."""
+        return np.bincount(self.group, weights=self.weight, minlength=self.size).astype(np.int64)
+
+
+def _segments(group):
+    """Номер відрізка однакових сусідніх значень group та початок кожного відрізка."""
+    starts = np.flatnonzero(np.diff(group, prepend=-1) != 0) if len(group) else np.array([], dtype=np.int64)
+    segment = np.cumsum(np.diff(group, prepend=-1) != 0) - 1
+    return segment, starts
+
+
+def _compress(group, mean, weight, size, compression=COMPRESSION):
+    """
+    Стискає центроїди, відсортовані за (group, mean): сусідні центроїди групи
+    зливаються, якщо потрапляють в один інтервал шкали k1 t-digest
+    (k = δ/2π * asin(2q - 1)), тож біля хвостів центроїди лишаються дрібними.
+    """
+    if not len(group):
+        return group, mean, weight
+    totals = np.bincount(group, weights=weight, minlength=size)
+    before = np.concatenate([[0.0], np.cumsum(totals)])[group]
+    q = (np.cumsum(weight) - weight / 2 - before) / totals[group]
+    bucket = np.floor(compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)) + compression / 4)
+    # Номери інтервалів зростають усередині групи - відрізки однакових ключів і є новими центроїдами
+    segment, starts = _segments(group * (compression + 1) + bucket.astype(np.int64))
+    new_weight = np.bincount(segment, weights=weight)
+    new_mean = np.bincount(segment, weights=weight * mean) / new_weight
+    return group[starts], new_mean, new_weight
+
+
+def _tails(group, value, tail=TAIL):
+    """До tail найменших і найбільших значень кожної групи; вхід відсортований за (group, value)."""
+    if not len(group):
+        return group, value
+    segment, starts = _segments(group)
+    ends = np.append(starts[1:], len(group))
+    rank = np.arange(len(group)) - starts[segment]
+    keep = (rank < tail) | (rank >= (ends - starts)[segment] - tail)
+    return group[keep], value[keep]
+
+
+def build(df, keys, column, compression=COMPRESSION, tail=TAIL):
+    """Скетчі значень column (без NaN) для груп df за keys (див. kernels.group_index)."""
+    groups = group_index(df, keys)
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    valid = (groups.codes >= 0) & ~np.isnan(values)
+    codes, values = groups.codes[valid], values[valid]
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    centroids = _compress(codes, values, np.ones(len(values)), groups.size, compression)
+    return SketchTable(groups.keys, *centroids, *_tails(codes, values, tail))
+
+
+def merge(table, selected, by, compression=COMPRESSION, tail=TAIL):
+    """
+    Зливає скетчі груп table, для яких selected (булева маска рядків table.keys),
+    у групи за колонкою або колонками by таблиці ключів.
+    """
+    selected = np.asarray(selected, dtype=bool)
+    merged = group_index(table.keys[selected].reset_index(drop=True), by)
+    remap = np.full(table.size, -1, dtype=np.int64)
+    remap[selected] = merged.codes
+
+    group = remap[table.group]
+    keep = group >= 0
+    order = np.lexsort((table.mean[keep], group[keep]))
+    centroids = _compress(
+        group[keep][order], table.mean[keep][order], table.weight[keep][order], merged.size, compression
+    )
+
+    tail_group = remap[table.tail_group]
+    keep = tail_group >= 0
+    order = np.lexsort((table.tail_value[keep], tail_group[keep]))
+    tails = _tails(tail_group[keep][order], table.tail_value[keep][order], tail)
+    return SketchTable(merged.keys, *centroids, *tails)
+
+
+def quantiles(table, qs, tail=TAIL):
+    """
+    Квантилі qs кожного скетча (масив групи x qs; NaN для порожнього скетча).
+    Якщо всі значення групи є в хвостах (не більше 2 * tail), квантилі точні.
+    """
+    qs = np.asarray(qs, dtype=float)
+    result = np.full((table.size, len(qs)), np.nan)
+    _, centroid_starts = _segments(table.group)
+    _, tail_starts = _segments(table.tail_group)
+    centroid_ends = np.append(centroid_starts[1:], len(table.group))
+    tail_ends = np.append(tail_starts[1:], len(table.tail_group))
+    counts = table.counts()
+    for start, end, tail_start, tail_end in zip(centroid_starts, centroid_ends, tail_starts, tail_ends):
+        group = table.group[start]
+        values = table.tail_value[tail_start:tail_end]
+        if counts[group] <= 2 * tail:
+            result[group] = np.quantile(values, qs)
+            continue
+        # Інтерполяція між центрами центроїдів; мінімум і максимум - точні
+        weight = table.weight[start:end]
+        positions = np.cumsum(weight) - weight / 2
+        result[group] = np.interp(
+            qs * (counts[group] - 1) + 0.5,
+            np.concatenate([[0.5], positions, [counts[group] - 0.5]]),
+            np.concatenate([[values[0]], table.mean[start:end], [values[-1]]]),
+        )
+    return result
+
+
+def box_stats(table, tail=TAIL):
+    """
+    Статистики боксплоту кожного скетча (як у Plotly: вуса - найдальші значення
+    в межах WHISKER_IQR * IQR від квартилів) та викиди - не більше tail з
+    кожного боку групи. Повертає (stats, outliers): stats - ключі, "Кількість",
+    mean, min, max, q1, median, q3, lowerfence, upperfence; outliers - ключі та value.
+    """
+    counts = table.counts()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.bincount(table.group, weights=table.weight * table.mean, minlength=table.size) / counts
+    q1, median, q3 = quantiles(table, [0.25, 0.5, 0.75], tail).T
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - WHISKER_IQR * iqr, q3 + WHISKER_IQR * iqr
+
+    values, group = table.tail_value, table.tail_group
+    segment, starts = _segments(group)
+    rank = np.arange(len(group)) - starts[segment]
+    stored = np.diff(np.append(starts, len(group)))[segment]
+    complete = counts[group] <= 2 * tail
+    minimum = np.full(table.size, np.nan)
+    maximum = np.full(table.size, np.nan)
+    np.fmin.at(minimum, group, values)
+    np.fmax.at(maximum, group, values)
+    # Вус - крайнє значення всередині меж серед свого хвоста; якщо весь хвіст - викиди, то сама межа
+    inside = (values >= low_fence[group]) & (values <= high_fence[group])
+    low = inside & ((rank < tail) | complete)
+    high = inside & ((rank >= stored - tail) | complete)
+    lower = np.full(table.size, np.nan)
+    upper = np.full(table.size, np.nan)
+    np.fmin.at(lower, group[low], values[low])
+    np.fmax.at(upper, group[high], values[high])
+    lower = np.where(np.isnan(lower), np.fmax(low_fence, minimum), np.fmin(lower, q1))
+    upper = np.where(np.isnan(upper), np.fmin(high_fence, maximum), np.fmax(upper, q3))
+
+    stats = table.keys.copy()
+    stats["Кількість"] = counts
+    for name, column in (("mean", means), ("min", minimum), ("max", maximum), ("q1", q1), ("median", median),
+                         ("q3", q3), ("lowerfence", lower), ("upperfence", upper)):
+        stats[name] = column
+    outside = ~inside
+    outliers = table.keys.iloc[group[outside]].reset_index(drop=True)
+    outliers["value"] = values[outside]
+    return stats, outliers
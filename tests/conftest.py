@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--perf", action="store_true", help="запустити тести бюджетів продуктивності")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: бюджети часу та пам'яті сторінок (запуск з --perf)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf"):
+        return
+    skip = pytest.mark.skip(reason="тести продуктивності запускаються з --perf")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
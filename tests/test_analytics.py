@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+from analytics import FilterSpec
+from generate_production_data import generate_frame
+
+END = date(2024, 6, 30)
+
+
+@pytest.fixture(scope="module")
+def varka():
+    return generate_frame("варка", 3000, days=200, end=END)
+
+
+@pytest.fixture(scope="module")
+def facovka():
+    return generate_frame("ФАСОВКА", 3000, days=200, end=END)
+
+
+def test_count_working_days():
+    assert analytics.count_working_days(date(2024, 1, 1), date(2024, 1, 31)) == 23
+    assert analytics.count_working_days(date(2024, 1, 6), date(2024, 1, 7)) == 0
+    assert analytics.count_working_days(date(2024, 1, 8), date(2024, 1, 1)) == 0
+
+
+def test_apply_filters(varka):
+    spec = FilterSpec(date(2024, 3, 1), date(2024, 3, 31), products=("Шампунь",), employee="Мороз М.")
+    result = analytics.apply_filters(varka, spec)
+    assert len(result) > 0
+    assert result["Дата"].between(pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-31")).all()
+    assert set(result["Тип продукту"]) == {"Шампунь"}
+    assert set(result["ПІБ"]) == {"Мороз М."}
+    assert analytics.apply_filters(varka, FilterSpec(date(2024, 3, 2), date(2024, 3, 1))).empty
+    assert analytics.apply_filters(varka, FilterSpec(products=())).empty
+
+
+def test_summary(varka):
+    kpi = analytics.summary(varka, ("Час на операцію", "Відсоток втрат"))
+    assert kpi["Кількість операцій"] == len(varka)
+    assert kpi["Час на операцію"] == pytest.approx(varka["Час на операцію"].mean())
+    assert kpi["Операцій на співробітника"] == pytest.approx(len(varka) / varka["ПІБ"].nunique())
+    empty = analytics.summary(varka.iloc[0:0], ("Відсоток втрат",))
+    assert empty == {"Кількість операцій": 0, "Відсоток втрат": 0, "Операцій на співробітника": 0}
+
+
+def test_operator_stats(facovka):
+    metrics = ("Час на операцію", "Продуктивність за годину", "Відсоток браку")
+    stats = analytics.operator_stats(facovka, metrics).set_index("ПІБ")
+    assert list(stats.columns) == ["Кількість операцій", *metrics]
+    expected = facovka.groupby("ПІБ")["Продуктивність за годину"].mean()
+    pd.testing.assert_series_equal(stats["Продуктивність за годину"], expected)
+    assert stats["Кількість операцій"].sum() == len(facovka)
+
+
+def test_equipment_utilization(varka):
+    spec = FilterSpec(date(2024, 4, 1), date(2024, 4, 30))
+    df = analytics.apply_filters(varka, spec)
+    result = analytics.equipment_utilization(df, spec)
+    stats = result["stats"].set_index("Тип обладнання")
+
+    group = df[df["Тип обладнання"] == "Котел 1"]
+    days = group["Дата"].dt.date.nunique()
+    row = stats.loc["Котел 1"]
+    assert result["working_days"] == 22
+    assert row["Реальні дні роботи"] == days
+    assert row["Завантаженість (дні), %"] == pytest.approx(days / 22 * 100)
+    assert row["Завантаженість (години), %"] == pytest.approx(group["Час на операцію"].sum() / (22 * 480) * 100)
+    assert result["daily"]["Котел 1"].sum() == len(group)
+
+
+def test_production_extremes(facovka):
+    details = ("ПІБ", "Тип обладнання", "Продуктивність за годину")
+    extremes = analytics.production_extremes(facovka, details)
+    products = facovka["Тип продукту"].unique().tolist()
+    assert extremes["Тип продукту"].tolist() == [p for p in products for _ in range(2)]
+    assert extremes["Категорія"].tolist() == ["Найшвидша", "Найповільніша"] * len(products)
+    times = facovka.groupby("Тип продукту")["Час на операцію"]
+    fastest = extremes[extremes["Категорія"] == "Найшвидша"].set_index("Тип продукту")["Час на операцію"]
+    pd.testing.assert_series_equal(fastest.sort_index(), times.min(), check_names=False)
+    assert list(extremes.columns) == ["Тип продукту", "Категорія", "Час на операцію", "Дата", *details]
+
+
+def test_productivity(facovka):
+    spec = FilterSpec(date(2024, 6, 1), date(2024, 6, 30))
+    result = analytics.productivity(analytics.apply_filters(facovka, spec), spec)
+    assert (result["days"], result["working_days"]) == (30, 20)
+    assert list(result["daily"].columns) == [
+        "Дата", "Кількість операцій", "Продуктивність за годину", "Час на операцію", "Об'єм_число",
+    ]
+    assert isinstance(result["daily"]["Дата"].iloc[0], date)
+
+
+def test_quality_report_deviation(varka):
+    spec = FilterSpec(products=("Шампунь",))
+    df = analytics.apply_filters(varka, spec)
+    result = analytics.quality_report(df, spec, "Відсоток втрат")
+    by_product = result["by"]["Тип продукту"]
+    assert by_product["Відсоток втрат"].is_monotonic_decreasing
+    deviation = result["deviation"]
+    assert deviation["mean"] == pytest.approx(df["Час на операцію"].mean())
+    assert deviation["lower"] >= 0
+    assert deviation["fastest"]["Час на операцію"] == df["Час на операцію"].min()
+    assert analytics.quality_report(varka, FilterSpec(), "Відсоток втрат")["deviation"] is None
+
+
+@pytest.mark.parametrize("interval, periods", [("День", None), ("Тиждень", "W-MON"), ("Місяць", "M")])
+def test_period_trends(varka, interval, periods):
+    stats = analytics.period_trends(varka, interval)["stats"]
+    assert stats["Кількість операцій"].sum() == len(varka)
+    assert not stats.duplicated(["Період", "Тип обладнання"]).any()
+
+    # Робочі дні періоду - від першого до останнього дня періоду включно
+    first = stats.iloc[0]
+    last_day = first["Період"].end_time.date()
+    assert first["Робочі дні у періоді"] == analytics.count_working_days(first["Дата"].date(), last_day)
+    if interval == "Тиждень":
+        assert last_day - first["Дата"].date() == timedelta(days=6)
+
+    group = varka[
+        (varka["Дата"].dt.to_period(periods or "D") == first["Період"])
+        & (varka["Тип обладнання"] == first["Тип обладнання"])
+    ]
+    expected = group["Продуктивність за годину"].mean() * group["Час на операцію"].sum() / 60
+    assert first["Виробіток (шт)"] == pytest.approx(expected)
+    assert np.isfinite(stats["Завантаженість (дні), %"]).all()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pytest
+
+import charts
+from generate_production_data import generate_frame
+
+
+@pytest.fixture(scope="module")
+def facovka():
+    return generate_frame("ФАСОВКА", 3000, days=120)
+
+
+def test_scatter_mode():
+    assert charts.scatter_mode(charts.SVG_POINTS) == "svg"
+    assert charts.scatter_mode(charts.SVG_POINTS + 1) == "webgl"
+    assert charts.scatter_mode(charts.WEBGL_POINTS + 1) == "density"
+
+
+def test_small_scatter_keeps_all_points(facovka):
+    fig = charts.scatter_figure(facovka, x="Час на операцію", y="Продуктивність за годину", title="t",
+                                color="Тип продукту")
+    assert {trace.type for trace in fig.data} == {"scattergl"}
+    assert sum(len(trace.x) for trace in fig.data) == len(facovka)
+
+
+def test_density_scatter_is_bounded(facovka, monkeypatch):
+    monkeypatch.setattr(charts, "WEBGL_POINTS", 100)
+    monkeypatch.setattr(charts, "HIGHLIGHT_POINTS", 20)
+    fig = charts.scatter_figure(facovka, x="Час на операцію", y="Продуктивність за годину", title="t",
+                                hover_data=["ПІБ"], color="Тип продукту")
+    density, points = fig.data
+    assert density.type == "heatmap" and points.type == "scattergl"
+    assert np.nansum(np.asarray(density.z, dtype=float)) == len(facovka)
+    assert np.shape(density.z) == (charts.DENSITY_BINS, charts.DENSITY_BINS)
+    assert len(points.x) == 20
+    assert np.shape(points.customdata) == (20, 1)
+
+
+def test_density_scatter_highlight(facovka, monkeypatch):
+    monkeypatch.setattr(charts, "WEBGL_POINTS", 100)
+    highlight = facovka["Час на операцію"] > facovka["Час на операцію"].quantile(0.99)
+    fig = charts.scatter_figure(facovka, x="Дата", y="Час на операцію", title="t", highlight=highlight)
+    density, points = fig.data
+    assert np.asarray(density.x).dtype.kind == "M"
+    assert len(points.x) == highlight.sum()
+    assert min(points.y) > facovka["Час на операцію"].quantile(0.99)
+
+
+def test_value_labels_are_thinned():
+    days = pd.date_range("2024-01-01", periods=365)
+    df = pd.DataFrame({"Дата": np.tile(days, 4), "Тип обладнання": np.repeat(list("абвг"), len(days)),
+                       "Виробіток (шт)": np.arange(4 * len(days), dtype=float)})
+    fig = charts.value_labels(px.line(df, x="Дата", y="Виробіток (шт)", color="Тип обладнання", markers=True))
+    labels = [label for trace in fig.data for label in trace.text if label]
+    assert len(labels) <= charts.LABEL_POINTS + len(fig.data)
+    # Максимум кожної лінії підписаний завжди
+    assert all(trace.text[-1] == str(int(trace.y[-1])) for trace in fig.data)
+    assert not fig.layout.annotations
+    assert all("text" in trace.mode for trace in fig.data)
+
+
+def test_compact_figure_data():
+    df = pd.DataFrame({
+        "Дата": pd.to_datetime(["2024-03-01", "2024-03-02", "2024-03-02"]),
+        "Кількість операцій": [3.0, 12.0, 7.0],
+        "Час на операцію": [41.23456789, 3.14159265, 120.5],
+        "ПІБ": ["Іваненко І."] * 3,
+        "Тип обладнання": ["Котел 1", "Котел 2", "Котел 1"],
+    })
+    fig = px.bar(df, x="Дата", y="Кількість операцій", hover_data=["ПІБ", "Час на операцію", "Тип обладнання"])
+    before = charts.payload_bytes(fig)
+    trace = charts.compact(fig).data[0]
+    assert list(trace.x) == ["2024-03-01", "2024-03-02", "2024-03-02"]
+    assert trace.y.dtype.kind == "u" and list(trace.y) == [3, 12, 7]
+    # Однакове для всіх точок ім'я - текстом підказки, решта колонок зсувається; 4 значущі цифри максимуму
+    assert "ПІБ=Іваненко І." in trace.hovertemplate
+    assert "Тип обладнання=%{customdata[1]}" in trace.hovertemplate
+    assert [list(row) for row in trace.customdata] == [[41.2, "Котел 1"], [3.1, "Котел 2"], [120.5, "Котел 1"]]
+    assert charts.payload_bytes(fig) < before
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from data_loader import (
+    MAX_DATE_SERIAL, build_frame, department_frame, freeze_frame, load_fact_table, load_sheets, merge_plant_tables,
+    parts_to_datetime, serial_to_datetime,
+)
+from departments import DEPARTMENT_COLUMN, Department, get_department, load_registry
+from fake_sheets_server import FakeSheetsServer
+from plants import PLANT_COLUMN
+from sheets_client import SheetsClient, TokenBucket
+
+
+def test_serial_to_datetime():
+    series = pd.Series([45356, 45356.75, "05.03.2024", None, "x"], dtype=object)
+    result = serial_to_datetime(series)
+    assert result.tolist()[:3] == [pd.Timestamp("2024-03-05")] * 3
+    assert result[3:].isna().all()
+
+
+@pytest.mark.parametrize("serial", [20240305, 1e9, -1e12, float("inf"), MAX_DATE_SERIAL + 1])
+def test_serial_out_of_range_is_nat(serial):
+    assert serial_to_datetime(pd.Series([serial], dtype=object)).isna().all()
+
+
+def test_parts_to_datetime():
+    result = parts_to_datetime(pd.Series([5, "5"]), pd.Series([3, "3"]), pd.Series([2024, "2024"]))
+    assert result.tolist() == [pd.Timestamp("2024-03-05")] * 2
+
+
+@pytest.mark.parametrize("day, month, year", [
+    ("inf", 3, 2024),
+    ("Infinity", 3, 2024),
+    (5.7, 3, 2024),
+    (31, 2, 2024),
+    (5, 13, 2024),
+    (5, 3, 1e12),
+])
+def test_invalid_parts_are_nat(day, month, year):
+    result = parts_to_datetime(pd.Series([day, 5]), pd.Series([month, 3]), pd.Series([year, 2024]))
+    assert pd.isna(result[0])
+    assert result[1] == pd.Timestamp("2024-03-05")
+
+
+def test_build_frame_types_columns():
+    header = ["ПІБ", "Час на операцію", "Відсоток браку ", "Об'єм", "День", "Місяць", "Рік"]
+    rows = [
+        ["Іваненко І.", 12.5, 1, "50мл", 5, 3, 2024],
+        [],
+        [101, "7,5", "0,5", 250, 6, 3, 2024, "зайве"],
+    ]
+    df = build_frame(header, rows)
+    assert len(df) == 2
+    assert df["ПІБ"].tolist() == ["Іваненко І.", "101"]
+    assert df["Час на операцію"].tolist() == [12.5, 7.5]
+    assert df["Відсоток браку"].tolist() == [1.0, 0.5]
+    assert df["Об'єм_число"].tolist() == [50.0, 250.0]
+    assert df["Дата"].tolist() == [pd.Timestamp("2024-03-05"), pd.Timestamp("2024-03-06")]
+
+
+VARKA = [
+    ["Дата", "ПІБ", "Тип обладнання", "Відсоток втрат"],
+    [45356, "Іваненко І.", "Котел 1", 1.5],
+    [45357, "Петренко П.", "Котел 2", "2,5"],
+]
+FACOVKA = [
+    ["Номер", "", "ПІБ", "Тип обладнання", "Час на операцію", "Продуктивність за годину", "Відсоток браку",
+     "Кількість операторів", "Тип продукту", "Об'єм", "День", "Місяць", "Рік", "Примітка"],
+] + [[i, f"P{i}", "Сидоренко С.", "Лінія 1", 30, 600, 0.5, 2, "Крем", "50мл", 5, 3, 2024, "x"] for i in range(1, 8)]
+
+REGISTRY = [
+    Department(key="варка", title="Варка", sheet="варка", quality="втрат"),
+    Department(key="фасовка", title="Фасовка", sheet="ФАСОВКА", columns="A:M",
+               column_labels={"B": "Позиція"}, quality="браку"),
+    Department(key="змішування", title="Змішування", sheet="Змішування"),
+]
+
+
+@pytest.fixture
+def sheets_server():
+    with FakeSheetsServer({"варка": VARKA, "ФАСОВКА": FACOVKA}, grid_rows={"ФАСОВКА": 40}) as server:
+        yield server
+
+
+@pytest.fixture
+def sheets(sheets_server):
+    return SheetsClient(AnonymousCredentials(), api_endpoint=sheets_server.endpoint,
+                        rate_limiter=TokenBucket(60000))
+
+
+def test_registry_file_is_valid():
+    departments = load_registry()
+    assert [d.sheet for d in departments] == ["варка", "ФАСОВКА"]
+    assert get_department("фасовка").quality_column == "Відсоток браку"
+
+
+def test_load_sheets_batches_first_blocks(sheets_server, sheets):
+    frames, snapshot_time = load_sheets(sheets, "id", REGISTRY, chunk_rows=5, parse_in_processes=False)
+    assert snapshot_time is None
+    # Метадані + один batchGet для перших блоків + решта блоків фасовки (40 рядків сітки)
+    assert sheets_server.request_count == 2 + 7
+    assert frames["змішування"].empty
+    assert len(frames["варка"]) == 2
+    assert frames["варка"]["Відсоток втрат"].tolist() == [1.5, 2.5]
+    facovka = frames["фасовка"]
+    assert len(facovka) == 7
+    assert facovka.columns[1] == "Позиція"
+    assert "Примітка" not in facovka.columns
+
+
+def test_fact_table_has_department_dimension(sheets):
+    fact, _ = load_fact_table(sheets, "id", REGISTRY, chunk_rows=1000, parse_in_processes=False)
+    assert fact[DEPARTMENT_COLUMN].value_counts().to_dict() == {"Фасовка": 7, "Варка": 2, "Змішування": 0}
+    assert fact.attrs["partitions"] == {"Варка": (0, 2), "Фасовка": (2, 9), "Змішування": (9, 9)}
+
+    merged = merge_plant_tables({"Завод 1": fact})
+    varka = department_frame(merged, REGISTRY[0])
+    assert list(varka.columns) == ["Дата", "ПІБ", "Тип обладнання", "Відсоток втрат"]
+    assert len(varka) == 2
+    assert department_frame(merged, REGISTRY[2]).empty
+
+
+def test_merged_plants_table():
+    with FakeSheetsServer({}, spreadsheets={"plant-1": {"варка": VARKA}, "plant-2": {"варка": VARKA[:2]}}) as server:
+        client = SheetsClient(AnonymousCredentials(), api_endpoint=server.endpoint, rate_limiter=TokenBucket(60000))
+        tables = {
+            title: load_fact_table(client, spreadsheet_id, REGISTRY[:1], parse_in_processes=False)[0]
+            for title, spreadsheet_id in [("Завод 1", "plant-1"), ("Завод 2", "plant-2")]
+        }
+
+    merged = merge_plant_tables(tables)
+    assert merged.attrs["partitions"] == {("Завод 1", "Варка"): (0, 2), ("Завод 2", "Варка"): (2, 3)}
+
+    both = department_frame(merged, REGISTRY[0])
+    assert both.columns[0] == PLANT_COLUMN
+    assert both[PLANT_COLUMN].tolist() == ["Завод 1", "Завод 1", "Завод 2"]
+
+    second = department_frame(merged, REGISTRY[0], plants=["Завод 2"])
+    assert PLANT_COLUMN not in second.columns
+    assert second["ПІБ"].tolist() == ["Іваненко І."]
+
+
+def test_freeze_frame():
+    df = freeze_frame(pd.DataFrame({
+        "Дата": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+        "ПІБ": pd.Categorical(["Іваненко І.", "Петренко П."]),
+        "Час на операцію": [10.0, 20.0],
+    }))
+    with pytest.raises(ValueError, match="read-only"):
+        df.loc[0, "Час на операцію"] = 0.0
+    with pytest.raises(ValueError, match="read-only"):
+        df["Дата"].to_numpy()[0] = np.datetime64("2000-01-01")
+
+    # Поверхнева копія ділить дані, але нові колонки не потрапляють у спільну таблицю
+    view = df.copy(deep=False)
+    view["Хвилини"] = view["Час на операцію"] * 2
+    assert "Хвилини" not in df.columns
+    assert np.shares_memory(view["Час на операцію"].to_numpy(), df["Час на операцію"].to_numpy())
@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+from departments import Department
+from generate_production_data import generate_frame
+
+VARKA = Department(key="варка", title="Варка", sheet="варка")
+EMPTY = Department(key="змішування", title="Змішування", sheet="Змішування")
+
+
+@pytest.fixture(scope="module")
+def varka():
+    frame = generate_frame("варка", 300)
+    frame.loc[3, "Дата"] = pd.NaT
+    frame.loc[4, "Час на операцію"] = np.nan
+    return frame
+
+
+def test_round_trip(tmp_path, varka):
+    revision = data_store.write_revision(str(tmp_path), "plant-1", {"варка": varka})
+    assert data_store.current_revision(str(tmp_path), "plant-1") == revision
+
+    stored = data_store.read_department(str(tmp_path), "plant-1", revision, VARKA)
+    pd.testing.assert_frame_equal(stored, varka)
+    assert stored.attrs["partitions"] == {"Варка": (0, 300)}
+
+    # Числа та дати відображені з файлу: не копіюються і лише для читання
+    for column in ("Дата", "Час на операцію"):
+        assert not stored[column].to_numpy().flags.writeable, column
+
+    missing = data_store.read_department(str(tmp_path), "plant-1", revision, EMPTY)
+    assert missing.empty
+    assert missing.attrs["partitions"] == {"Змішування": (0, 0)}
+
+
+def test_mixed_columns_are_stored_as_text(tmp_path):
+    frame = pd.DataFrame({"Номер замовлення": [101, "A-7", None], "Об'єм": [50.0, "50мл", 3]})
+    revision = data_store.write_revision(str(tmp_path), "plant-1", {"варка": frame})
+    stored = data_store.read_department(str(tmp_path), "plant-1", revision, VARKA)
+    assert stored["Номер замовлення"].tolist() == ["101", "A-7", None]
+    assert stored["Об'єм"].tolist() == ["50", "50мл", "3"]
+
+
+def test_old_revisions_are_pruned(tmp_path, varka):
+    root = str(tmp_path)
+    assert data_store.current_revision(root, "plant-1") is None
+    for revision in ("1000", "2000", "3000"):
+        data_store.write_revision(root, "plant-1", {"варка": varka}, revision=revision)
+    assert data_store.current_revision(root, "plant-1") == "3000"
+    assert sorted(os.listdir(tmp_path / "plant-1")) == ["2000", "3000", "CURRENT"]
+    assert data_store.revision_time("3000") == 3.0
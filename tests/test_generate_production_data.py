@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from data_loader import build_frame, sheet_header
+from departments import DEPARTMENTS
+from generate_production_data import HEADERS, generate_frame, generate_sheet
+
+
+@pytest.mark.parametrize("department", DEPARTMENTS, ids=lambda d: d.key)
+def test_frame_matches_parsed_sheet(department):
+    sheet = generate_sheet(department.sheet, 3000, seed=7)
+    assert sheet[0] == HEADERS[department.sheet]
+    # Серед значень є числа, збережені текстом, і порожні рядки
+    minutes = sheet[0].index("Час на операцію")
+    assert any(isinstance(row[minutes], str) for row in sheet[1:] if row)
+    assert any(row == [] for row in sheet[1:])
+
+    parsed = build_frame(sheet_header(department, sheet[0]), sheet[1:], department.metrics, (department.quality,))
+    pd.testing.assert_frame_equal(parsed, generate_frame(department.sheet, 3000, seed=7), check_dtype=False)
+
+
+def test_dates_cover_requested_period():
+    end = pd.Timestamp("2024-03-31")
+    df = generate_frame("варка", 5000, days=90, end=end.date())
+    assert df["Дата"].max() <= end
+    assert df["Дата"].min() >= end - pd.Timedelta(days=89)
+    assert (df["Дата"].dt.weekday < 5).mean() > 0.8
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import kernels
+from generate_production_data import generate_frame
+
+
+@pytest.fixture(scope="module")
+def facovka():
+    df = generate_frame("ФАСОВКА", 3000, days=120)
+    # Порожні ключі та значення мають пропускатися, як у groupby
+    df.loc[df.index[::50], "Тип обладнання"] = None
+    df.loc[df.index[::7], "Продуктивність за годину"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("keys", ["ПІБ", ["Тип продукту", "Тип обладнання"]])
+def test_aggregates_match_groupby(facovka, keys):
+    groups = kernels.group_index(facovka, keys)
+    grouped = facovka.groupby(keys)
+    expected_keys = grouped.size().reset_index()
+    pd.testing.assert_frame_equal(groups.keys, expected_keys.drop(columns=0))
+    np.testing.assert_array_equal(kernels.group_count(groups), grouped.size().to_numpy())
+
+    values = facovka["Продуктивність за годину"]
+    np.testing.assert_allclose(kernels.group_sum(groups, values), grouped[values.name].sum())
+    np.testing.assert_allclose(kernels.group_mean(groups, values), grouped[values.name].mean())
+    np.testing.assert_array_equal(kernels.group_min(groups, values), grouped[values.name].min())
+    np.testing.assert_array_equal(kernels.group_max(groups, values), grouped[values.name].max())
+    days = facovka["Дата"].dt.normalize()
+    np.testing.assert_array_equal(kernels.group_nunique(groups, days), days.groupby(
+        [facovka[key] for key in np.atleast_1d(keys)]).nunique())
+
+
+@pytest.mark.parametrize("dense_limit", [kernels.MAX_DENSE_GROUPS, 0])
+def test_group_index_series_keys(facovka, monkeypatch, dense_limit):
+    monkeypatch.setattr(kernels, "MAX_DENSE_GROUPS", dense_limit)
+    periods = facovka["Дата"].dt.to_period("W-MON").rename("Період")
+    groups = kernels.group_index(facovka, [periods, "Тип обладнання"])
+    expected = facovka.groupby([periods, "Тип обладнання"]).size()
+    pd.testing.assert_frame_equal(groups.keys, expected.reset_index().drop(columns=0))
+    assert groups.keys["Період"].dtype == periods.dtype
+    assert (groups.codes == -1).sum() == facovka["Тип обладнання"].isna().sum()
+    days = facovka["Дата"].dt.normalize()
+    np.testing.assert_array_equal(
+        kernels.group_nunique(groups, days), days.groupby([periods, facovka["Тип обладнання"]]).nunique()
+    )
+
+
+def test_empty_groups():
+    df = pd.DataFrame({"ключ": ["а", "б", "а", None], "значення": [1.0, np.nan, 3.0, 4.0]})
+    groups = kernels.group_index(df, "ключ")
+    assert list(groups.keys["ключ"]) == ["а", "б"]
+    np.testing.assert_array_equal(kernels.group_sum(groups, df["значення"]), [4.0, 0.0])
+    np.testing.assert_array_equal(kernels.group_mean(groups, df["значення"]), [2.0, np.nan])
+    np.testing.assert_array_equal(kernels.group_min(groups, df["значення"]), [1.0, np.nan])
+    assert kernels.group_index(df.iloc[:0], ["ключ", "значення"]).size == 0
+
+
+def test_crosstab(facovka):
+    days = facovka["Дата"].dt.date.rename("Дата")
+    expected = facovka.groupby([days, "Тип обладнання"]).size().unstack(fill_value=0)
+    pd.testing.assert_frame_equal(kernels.crosstab(facovka, days, "Тип обладнання"), expected)
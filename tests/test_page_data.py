@@ -0,0 +1,132 @@
+import os
+import time
+
+import numpy as np
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import data_store
+from fake_sheets_server import FakeSheetsServer
+from generate_production_data import generate_frame, generate_sheets
+from plants import PLANTS
+from sheets_client import snapshot_notice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    yield
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+
+@pytest.fixture
+def sheets_server(monkeypatch):
+    with FakeSheetsServer(generate_sheets(200)) as server:
+        monkeypatch.setenv("SHEETS_API_ENDPOINT", server.endpoint)
+        yield server
+
+
+def department_page():
+    import streamlit as st
+
+    from page_data import load_department_data
+
+    st.session_state["frame"] = load_department_data("варка")
+
+
+def open_session(warnings=()):
+    at = AppTest.from_function(department_page, default_timeout=60)
+    at.run()
+    assert not at.exception
+    assert [w.value for w in at.warning] == list(warnings)
+    return at.session_state["frame"]
+
+
+def test_sessions_share_department_data(sheets_server):
+    first, second = open_session(), open_session()
+    assert sheets_server.request_count == 2
+    assert first is not second
+    for column in first.columns:
+        assert np.shares_memory(first[column].to_numpy(), second[column].to_numpy()), column
+
+    # Сесія може додати колонку у свою копію, не змінивши спільну таблицю
+    first["Хвилини"] = first["Час на операцію"] * 60
+    assert "Хвилини" not in open_session().columns
+    with pytest.raises(ValueError, match="read-only"):
+        second.loc[0, "Час на операцію"] = 0.0
+
+
+def source_page():
+    import streamlit as st
+
+    from page_data import load_department_source
+
+    st.session_state["source"] = load_department_source("варка")
+
+
+def test_sessions_share_daily_sketches(sheets_server):
+    sources = []
+    for _ in range(2):
+        at = AppTest.from_function(source_page, default_timeout=60)
+        at.run()
+        assert not at.exception
+        sources.append(at.session_state["source"])
+    first, second = sources
+    # Скетчі будуються один раз для ревізії даних і спільні для сесій
+    assert list(first.sketches) == ["Відсоток втрат"]
+    assert first.sketches["Відсоток втрат"] is second.sketches["Відсоток втрат"]
+    assert first.sketches["Відсоток втрат"].counts().sum() == first.df["Відсоток втрат"].notna().sum()
+
+
+def test_store_mode_maps_current_revision(tmp_path, monkeypatch):
+    # Без Sheets API: сторінки читають лише сховище
+    monkeypatch.setenv("SHEETS_API_ENDPOINT", "http://127.0.0.1:9/")
+    monkeypatch.setenv(data_store.STORE_DIR_ENV, str(tmp_path))
+    spreadsheet_id = PLANTS[0].spreadsheet_id
+    assert open_session(["дані ще не записані у сховище."]) is None
+
+    varka = generate_frame("варка", 200)
+    data_store.write_revision(str(tmp_path), spreadsheet_id, {"варка": varka})
+    first, second = open_session(), open_session()
+    assert len(first) == 200
+    assert np.shares_memory(first["Час на операцію"].to_numpy(), second["Час на операцію"].to_numpy())
+
+    # Нова ревізія підхоплюється без перезапуску процесу
+    data_store.write_revision(str(tmp_path), spreadsheet_id, {"варка": varka.iloc[:50]})
+    assert len(open_session()) == 50
+
+
+def test_store_mode_warns_about_old_revision(tmp_path, monkeypatch):
+    monkeypatch.setenv(data_store.STORE_DIR_ENV, str(tmp_path))
+    old = str(int((time.time() - data_store.MAX_REVISION_AGE - 60) * 1000))
+    frames = {"варка": generate_frame("варка", 20)}
+    data_store.write_revision(str(tmp_path), PLANTS[0].spreadsheet_id, frames, revision=old)
+    assert len(open_session([snapshot_notice(data_store.revision_time(old))])) == 20
+
+
+def test_fragment_falls_back_to_plain_function(monkeypatch):
+    import page_data
+
+    for name in ("fragment", "experimental_fragment"):
+        monkeypatch.delattr(st, name, raising=False)
+    render = lambda: None  # noqa: E731
+    assert page_data.fragment(render) is render
+    monkeypatch.setattr(st, "experimental_fragment", lambda func: ("фрагмент", func), raising=False)
+    assert page_data.fragment(render) == ("фрагмент", render)
+
+
+def test_deviant_product_selector(sheets_server):
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.run()
+    at.sidebar.radio[0].set_value("Користувацький")
+    next(s for s in at.sidebar.selectbox if s.label == "Тип звіту").set_value("Аналіз якості та втрат").run()
+    selector = next(s for s in at.selectbox if s.label == "Продукт для аналізу дивіантності")
+    product = selector.options[-1]
+    selector.set_value(product).run()
+    assert not at.exception
+    assert f"Дивіантність варок для продукту: {product}" in [h.value for h in at.subheader]
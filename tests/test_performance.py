@@ -0,0 +1,131 @@
+"""
+Бюджети часу та пам'яті для кожного звіту сторінок на синтетичних даних.
+
+Запуск (тести позначені perf і без --perf пропускаються):
+    python -m pytest --perf -q tests/test_performance.py
+
+Сторінки працюють через streamlit AppTest з фейковим Sheets API; кожен звіт
+вимірюється за період "Користувацький" (весь журнал) після запуску, що заповнює
+кеш даних. Час - найкращий з PERF_REPEAT запусків, пам'ять - пік виділень
+tracemalloc за окремий запуск. На повільнішій машині бюджети можна пропорційно
+збільшити змінною PERF_BUDGET_SCALE.
+"""
+import os
+import time
+import tracemalloc
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from fake_sheets_server import FakeSheetsServer
+from generate_production_data import generate_sheets
+
+pytestmark = pytest.mark.perf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROWS = 500  # рядків на лист
+REPEAT = int(os.environ.get("PERF_REPEAT", "3"))
+BUDGET_SCALE = float(os.environ.get("PERF_BUDGET_SCALE", "1"))
+
+# (секунди, МБ) на один перезапуск сторінки
+REPORT_BUDGET = (1.5, 32)
+BUDGETS = {
+    "app.py": {
+        "Загальний огляд": REPORT_BUDGET,
+        "Аналіз ефективності операторів": REPORT_BUDGET,
+        "Завантаження обладнання": REPORT_BUDGET,
+        "Продуктивність виробництва": REPORT_BUDGET,
+        "Аналіз якості та втрат": REPORT_BUDGET,
+        "Тренд завантаження обладнання": REPORT_BUDGET,
+    },
+    "pages/facovka_dashboard.py": {
+        "Загальний огляд": REPORT_BUDGET,
+        "Аналіз ефективності операторів": REPORT_BUDGET,
+        "Завантаження обладнання": REPORT_BUDGET,
+        "Продуктивність виробництва": REPORT_BUDGET,
+        "Аналіз якості та браку": REPORT_BUDGET,
+    },
+}
+# Підписи виробітку - текст трас, а не анотація на точку, тож день не дорожчий за місяць
+TREND_BUDGETS = {
+    "День": REPORT_BUDGET,
+    "Тиждень": REPORT_BUDGET,
+    "Місяць": REPORT_BUDGET,
+}
+
+
+@pytest.fixture(scope="module")
+def sheets_server():
+    with FakeSheetsServer(generate_sheets(ROWS)) as server, pytest.MonkeyPatch.context() as mp:
+        mp.setenv("SHEETS_API_ENDPOINT", server.endpoint)
+        # Клієнт і дані з інших тестів прив'язані до іншого сервера
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        yield server
+        st.cache_resource.clear()
+        st.cache_data.clear()
+
+
+def open_page(page):
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+    at.run()
+    assert not at.exception, at.exception[0].value
+    return at
+
+
+def measure(at):
+    """Найкращий час перезапуску сторінки (с) та пік пам'яті за перезапуск (МБ)."""
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - started)
+    assert not at.exception, at.exception[0].value
+
+    tracemalloc.start()
+    try:
+        at.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 2 ** 20
+
+
+def check_budget(name, elapsed, peak_mb, budget):
+    seconds, megabytes = budget
+    assert elapsed <= seconds * BUDGET_SCALE, f"{name}: {elapsed:.2f} с > бюджету {seconds * BUDGET_SCALE:.2f} с"
+    assert peak_mb <= megabytes * BUDGET_SCALE, f"{name}: {peak_mb:.1f} МБ > бюджету {megabytes * BUDGET_SCALE:.1f} МБ"
+
+
+@pytest.mark.parametrize("page, report", [(page, report) for page, reports in BUDGETS.items() for report in reports])
+def test_report_budget(sheets_server, page, report):
+    at = open_page(page)
+    at.sidebar.radio[0].set_value("Користувацький")
+    report_select = next(s for s in at.sidebar.selectbox if s.label == "Тип звіту")
+    assert report in report_select.options
+    report_select.set_value(report)
+
+    elapsed, peak_mb = measure(at)
+    check_budget(f"{page} / {report}", elapsed, peak_mb, BUDGETS[page][report])
+
+
+@pytest.mark.parametrize("department", ["Варка", "Фасовка"])
+@pytest.mark.parametrize("interval", list(TREND_BUDGETS))
+def test_trend_budget(sheets_server, department, interval):
+    at = open_page("pages/equipment_loading_trends.py")
+    department_radio, interval_radio = at.radio[0], at.radio[1]
+    department_radio.set_value(department)
+    interval_radio.set_value(interval)
+
+    elapsed, peak_mb = measure(at)
+    check_budget(f"тренди / {department} / {interval}", elapsed, peak_mb, TREND_BUDGETS[interval])
+
+
+def test_budgets_cover_all_reports(sheets_server):
+    # Новий тип звіту без бюджету - теж помилка: додайте його в BUDGETS
+    for page, reports in BUDGETS.items():
+        at = open_page(page)
+        report_select = next(s for s in at.sidebar.selectbox if s.label == "Тип звіту")
+        assert set(report_select.options) == set(reports), page
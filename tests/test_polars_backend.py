@@ -0,0 +1,68 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+from analytics import FilterSpec
+from generate_production_data import generate_frame
+
+pytest.importorskip("polars")
+import polars_backend  # noqa: E402
+
+END = date(2024, 6, 30)
+SPEC = FilterSpec(date(2024, 1, 1), END, products=("Шампунь",))
+
+
+def _frame(sheet):
+    df = generate_frame(sheet, 3000, days=200, end=END)
+    # Порожні ключі та значення обидва рушії пропускають однаково
+    df.loc[df.index[::37], "Тип обладнання"] = None
+    df.loc[df.index[::11], "Час на операцію"] = np.nan
+    return df
+
+
+@pytest.fixture(scope="module", params=["варка", "ФАСОВКА"])
+def department(request):
+    metrics = {"варка": ("Час на операцію", "Відсоток втрат"),
+               "ФАСОВКА": ("Час на операцію", "Продуктивність за годину", "Відсоток браку")}[request.param]
+    return _frame(request.param), metrics
+
+
+def assert_same(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            assert_same(actual[key], expected[key])
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(actual, expected, rtol=1e-9)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(actual, expected, rtol=1e-9)
+    else:
+        assert actual == pytest.approx(expected, nan_ok=True)
+
+
+@pytest.mark.parametrize("rows", [None, 40, 0])
+def test_reports_match_pandas(department, rows):
+    df, metrics = department
+    df = df if rows is None else df.iloc[:rows]
+    quality = metrics[-1]
+    assert_same(polars_backend.operator_stats(df, metrics), analytics.operator_stats(df, metrics))
+    assert_same(polars_backend.equipment_utilization(df, SPEC, metrics),
+                analytics.equipment_utilization(df, SPEC, metrics))
+    assert_same(polars_backend.quality_report(df, SPEC, quality), analytics.quality_report(df, SPEC, quality))
+    for interval in analytics.PERIOD_FREQ:
+        assert_same(polars_backend.period_groups(df, interval), analytics.period_groups(df, interval))
+
+
+def test_backend_switch(department, monkeypatch):
+    df, metrics = department
+    calls = []
+    monkeypatch.setitem(polars_backend.REPORTS, "operator_stats", lambda *args: calls.append(args) or "polars")
+    assert isinstance(analytics.operator_stats(df, metrics), pd.DataFrame)
+    monkeypatch.setenv(analytics.BACKEND_ENV, "polars")
+    assert analytics.operator_stats(df, metrics) == "polars"
+    assert len(calls) == 1
+    # Звіти без реалізації на Polars рахує pandas
+    assert analytics.summary(df, metrics)["Кількість операцій"] == len(df)
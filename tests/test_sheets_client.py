@@ -0,0 +1,137 @@
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+import sheets_client
+from fake_sheets_server import FakeSheetsServer
+from sheets_client import MAX_DELAY, SheetsClient, SheetsUnavailableError, TokenBucket
+
+SHEET = [["Дата", "ПІБ"], ["05.03.2024", "Іваненко І."], ["06.03.2024", "Петренко П."]]
+RANGE = "'ВАРКА'!A1:B3"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def server():
+    with FakeSheetsServer({"ВАРКА": SHEET}) as server:
+        yield server
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def client(server, clock):
+    return SheetsClient(
+        AnonymousCredentials(),
+        api_endpoint=server.endpoint,
+        rate_limiter=TokenBucket(60000, clock=clock, sleep=clock.sleep),
+        max_retries=3,
+        sleep=clock.sleep,
+        clock=clock,
+    )
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_transient_errors(server, client, clock, status):
+    server.fail_next(2, status=status)
+    assert client.get_values("id", RANGE)["values"] == SHEET
+    assert server.request_count == 3
+    assert len(clock.sleeps) == 2
+
+
+def test_honours_retry_after(server, client, clock):
+    server.fail_next(1, status=429, retry_after=7)
+    client.get_values("id", RANGE)
+    assert clock.sleeps == [7.0]
+
+
+def test_caps_retry_after(server, client, clock):
+    server.fail_next(1, status=429, retry_after=3600)
+    client.get_values("id", RANGE)
+    assert clock.sleeps == [MAX_DELAY]
+
+
+def test_gives_up_after_max_retries(server, client):
+    server.fail_next(10)
+    with pytest.raises(SheetsUnavailableError):
+        client.get_values("id", RANGE)
+    assert server.request_count == client.max_retries + 1
+
+
+def test_does_not_retry_client_errors(server, client, clock):
+    with pytest.raises(SheetsUnavailableError):
+        client.get_values("id", "'ВАРКА'!A1:B100")
+    assert server.request_count == 1
+    assert clock.sleeps == []
+
+
+def test_returns_snapshot_when_unavailable(server, client):
+    fresh = client.get_values("id", RANGE)
+    assert "snapshot_time" not in fresh
+
+    server.fail_next(10)
+    stale = client.get_values("id", RANGE)
+    assert stale["values"] == SHEET
+    assert stale["snapshot_time"] is not None
+    # Знімок у клієнті не змінюється ключем snapshot_time
+    assert "snapshot_time" not in fresh
+
+
+def test_serves_snapshots_during_cooldown(server, client, clock):
+    client.get_values("id", RANGE)
+    server.fail_next(10)
+    client.get_values("id", RANGE)
+    requests_after_failure = server.request_count
+
+    assert "snapshot_time" in client.get_values("id", RANGE)
+    assert server.request_count == requests_after_failure
+
+    clock.now += sheets_client.UNAVAILABLE_COOLDOWN
+    server._failures.clear()
+    assert "snapshot_time" not in client.get_values("id", RANGE)
+
+
+def test_row_count_from_metadata(client):
+    assert client.get_row_count("id", "ВАРКА") == len(SHEET)
+    assert client.get_row_count("id", "Немає") == 0
+
+
+def test_token_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(60, capacity=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+    for _ in range(5):
+        bucket.acquire()
+    # 60 запитів на хвилину - не частіше одного на секунду
+    assert clock.now == pytest.approx(6.0)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(60, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 100
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
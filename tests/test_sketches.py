@@ -0,0 +1,81 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import sketches
+from analytics import FilterSpec, FrameSource
+from generate_production_data import generate_frame
+
+END = date(2024, 6, 30)
+COLUMN = "Відсоток браку"
+
+
+@pytest.fixture(scope="module")
+def facovka():
+    df = generate_frame("ФАСОВКА", 20000, days=200, end=END)
+    df.loc[df.index[::13], COLUMN] = np.nan
+    return df
+
+
+def whiskers(values):
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    inside = values[(values >= q1 - 1.5 * (q3 - q1)) & (values <= q3 + 1.5 * (q3 - q1))]
+    return inside.min(), inside.max()
+
+
+def test_merged_daily_sketches_match_rows(facovka):
+    spec = FilterSpec(date(2024, 2, 1), date(2024, 5, 31), products=("Шампунь", "Бальзам", "Крем для обличчя", "Скраб"))
+    stats, outliers = FrameSource(facovka, {COLUMN: analytics.daily_sketches(facovka, COLUMN)}).distribution(
+        COLUMN, spec)
+    rows = analytics.apply_filters(facovka, spec).dropna(subset=[COLUMN])
+    grouped = rows.groupby("Тип продукту")[COLUMN]
+
+    stats = stats.set_index("Тип продукту")
+    assert list(stats.index) == sorted(spec.products)
+    # Кількість, середнє та межі точні, квантилі - з точністю скетча
+    pd.testing.assert_series_equal(stats["Кількість"], grouped.count(), check_names=False)
+    pd.testing.assert_series_equal(stats["mean"], grouped.mean(), check_names=False)
+    pd.testing.assert_series_equal(stats["min"], grouped.min(), check_names=False)
+    pd.testing.assert_series_equal(stats["max"], grouped.max(), check_names=False)
+    spread = rows[COLUMN].std()
+    for q, name in ((0.25, "q1"), (0.5, "median"), (0.75, "q3")):
+        assert np.abs(stats[name] - grouped.quantile(q)).max() < 0.02 * spread
+    for product, values in grouped:
+        low, high = whiskers(values.to_numpy())
+        assert stats.loc[product, "lowerfence"] == pytest.approx(low, abs=0.02 * spread)
+        assert stats.loc[product, "upperfence"] == pytest.approx(high, abs=0.02 * spread)
+
+    # Викиди - справжні значення поза вусами, не більше TAIL з кожного боку продукту
+    assert outliers.groupby("Тип продукту").size().max() <= 2 * sketches.TAIL
+    fences = stats.loc[outliers["Тип продукту"]]
+    assert ((outliers["value"].to_numpy() < fences["lowerfence"].to_numpy())
+            | (outliers["value"].to_numpy() > fences["upperfence"].to_numpy())).all()
+    assert outliers["value"].isin(rows[COLUMN]).all()
+
+
+def test_small_groups_are_exact():
+    df = pd.DataFrame({
+        "Тип продукту": ["а"] * 9 + ["б"] * 3 + [None],
+        COLUMN: [1.0, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 40.0, 7.0, np.nan, 9.0, 1.0],
+    })
+    stats, outliers = analytics.distribution(df, COLUMN)
+    assert list(stats["Тип продукту"]) == ["а", "б"]
+    np.testing.assert_allclose(stats[["q1", "median", "q3"]].to_numpy(),
+                               [np.quantile(df[COLUMN][:9], [0.25, 0.5, 0.75]), [7.5, 8.0, 8.5]])
+    assert stats["upperfence"].tolist() == [5.0, 9.0]
+    assert outliers.to_dict("list") == {"Тип продукту": ["а"], "value": [40.0]}
+
+
+def test_merge_selects_groups(facovka):
+    table = analytics.daily_sketches(facovka, COLUMN)
+    selected = (table.keys["Дата"] >= pd.Timestamp("2024-06-01")).to_numpy()
+    merged = sketches.merge(table, selected, "Тип продукту")
+    direct = sketches.build(facovka[facovka["Дата"] >= pd.Timestamp("2024-06-01")], "Тип продукту", COLUMN)
+    pd.testing.assert_frame_equal(merged.keys, direct.keys)
+    np.testing.assert_array_equal(merged.counts(), direct.counts())
+    assert len(merged.mean) <= merged.size * sketches.COMPRESSION
+    empty = sketches.merge(table, np.zeros(table.size, dtype=bool), "Тип продукту")
+    assert empty.size == 0 and sketches.box_stats(empty)[0].empty
@@ -0,0 +1,95 @@
+from contextlib import closing
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import warehouse
+from analytics import FilterSpec, FrameSource
+from departments import Department
+from generate_production_data import generate_frame
+from plants import PLANT_COLUMN
+
+VARKA = Department(key="варка", title="Варка", sheet="варка")
+END = date(2024, 6, 30)
+
+
+@pytest.fixture(scope="module")
+def varka():
+    frame = generate_frame("варка", 2000, days=200, end=END)
+    frame.loc[5, "Дата"] = pd.NaT
+    frame.loc[6, "Тип обладнання"] = None
+    frame.loc[7, "Час на операцію"] = np.nan
+    return frame
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "warehouse.sqlite")
+
+
+def sync(db, plant, frame):
+    with closing(warehouse.connect(db)) as conn, conn:
+        return warehouse.sync_partition(conn, plant, "Варка", frame)
+
+
+def everything(frame):
+    return FrameSource(frame).period(date(2000, 1, 1), END).reset_index(drop=True)
+
+
+SPECS = [
+    FilterSpec(date(2024, 3, 1), date(2024, 4, 15)),
+    FilterSpec(date(2024, 1, 1), END, products=("Шампунь", "Гель"), employee="Мороз М."),
+    FilterSpec(date(2024, 5, 1), date(2024, 4, 1)),
+]
+
+
+def test_queries_match_frame_source(db, varka):
+    sync(db, "Завод 1", varka)
+    stored, frame = warehouse.WarehouseSource(db, VARKA), FrameSource(varka)
+    assert not stored.empty
+    assert stored.date_range() == frame.date_range()
+
+    pd.testing.assert_frame_equal(stored.period(date(2024, 3, 1), date(2024, 4, 15)),
+                                  frame.period(date(2024, 3, 1), date(2024, 4, 15)).reset_index(drop=True))
+    for spec in SPECS:
+        assert stored.options("ПІБ", spec) == frame.options("ПІБ", spec)
+        for interval in ("День", "Тиждень", "Місяць"):
+            expected = frame.period_trends(spec, interval)
+            for key, result in stored.period_trends(spec, interval).items():
+                pd.testing.assert_frame_equal(result, expected[key], check_index_type=False)
+        for result, expected in zip(stored.distribution("Відсоток втрат", spec),
+                                    frame.distribution("Відсоток втрат", spec)):
+            pd.testing.assert_frame_equal(result, expected, check_index_type=False)
+
+
+def test_sync_is_incremental(db, varka):
+    rows = len(varka)
+    assert sync(db, "Завод 1", varka.iloc[:1500]) == (0, 1500, 0)
+    assert sync(db, "Завод 1", varka) == (1500, rows - 1500, 0)
+    assert sync(db, "Завод 1", varka) == (rows, 0, 0)
+
+    edited = varka.copy()
+    edited.loc[1800, "Час на операцію"] += 1
+    assert sync(db, "Завод 1", edited.iloc[:1900]) == (1800, 100, rows - 1800)
+    pd.testing.assert_frame_equal(warehouse.WarehouseSource(db, VARKA).period(date(2000, 1, 1), END),
+                                  everything(edited.iloc[:1900]))
+
+    # Нова колонка - відділ переписується повністю
+    assert sync(db, "Завод 1", varka.assign(**{"Примітка": "-"})) == (0, rows, 1900)
+
+
+def test_plants(db, varka):
+    sync(db, "Завод 2", varka.iloc[:10])
+    sync(db, "Завод 1", varka.iloc[10:30])
+    both = warehouse.WarehouseSource(db, VARKA).period(date(2000, 1, 1), END)
+    assert both.columns[0] == PLANT_COLUMN
+    # Заводів немає в реєстрі - порядок, у якому їх синхронізовано; рядок без дати не потрапляє в період
+    assert both[PLANT_COLUMN].tolist() == ["Завод 2"] * 9 + ["Завод 1"] * 20
+
+    second = warehouse.WarehouseSource(db, VARKA, plants=["Завод 2"]).period(date(2000, 1, 1), END)
+    assert PLANT_COLUMN not in second.columns
+    assert len(second) == 9
+    assert warehouse.last_sync(db, ["Завод 2"]) is not None
+    assert warehouse.WarehouseSource(db, VARKA, plants=["Завод 3"]).empty
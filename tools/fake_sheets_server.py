@@ -0,0 +1,247 @@
+"""
+Локальний фейковий сервер Sheets API v4 для перевірки клієнта без доступу до Google.
+
+Запуск:
+    python tools/fake_sheets_server.py --data sheets.json --port 8765
+    SHEETS_API_ENDPOINT=http://127.0.0.1:8765/ streamlit run app.py
+
+sheets.json: {"<назва листа>": [["заголовок", ...], ["значення", ...], ...]}
+Значення зберігаються типізованими (числа - числами). Без valueRenderOption=UNFORMATTED_VALUE
+сервер повертає їх рядками з десятковою комою, як це робить таблиця з українською локаллю.
+"""
+import argparse
+import json
+import multiprocessing
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+A1_RANGE = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def _column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+class GridLimitError(ValueError):
+    """Діапазон виходить за межі сітки листа (реальний API повертає 400)."""
+
+
+def slice_a1(values, a1, row_count=None):
+    """
+    Вирізає з листа прямокутник за A1-нотацією (A:M, A2:M100, 2:100).
+    Як і реальний API, відхиляє рядки за межами сітки з row_count рядків
+    та обрізає порожні рядки в кінці відповіді.
+    """
+    match = A1_RANGE.match(a1)
+    if not match:
+        raise ValueError(a1)
+    col_start, row_start, col_end, row_end = match.groups()
+    if col_end is None and row_end is None:
+        col_end, row_end = col_start, row_start
+    row_count = len(values) if row_count is None else row_count
+    first_row = int(row_start) - 1 if row_start else 0
+    last_row = int(row_end) if row_end else row_count
+    if last_row > row_count or first_row >= row_count:
+        raise GridLimitError(f"Range ({a1}) exceeds grid limits. Max rows: {row_count}")
+    first_col = _column_index(col_start) if col_start else 0
+    last_col = _column_index(col_end) + 1 if col_end else None
+    rows = [row[first_col:last_col] for row in values[first_row:last_row]]
+    while rows and not any(cell not in (None, "") for cell in rows[-1]):
+        rows.pop()
+    return rows
+
+
+def format_value(value):
+    """Імітує FORMATTED_VALUE: числа стають рядками з десятковою комою."""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float):
+        return (str(int(value)) if value.is_integer() else repr(value)).replace(".", ",")
+    if isinstance(value, int):
+        return str(value)
+    return value
+
+
+class FakeSheetsServer:
+    """
+    Відповідає на GET /v4/spreadsheets/<id>/values/<range>, /values:batchGet
+    та GET /v4/spreadsheets/<id> (метадані) даними з пам'яті.
+    fail_next() дозволяє змоделювати 429/5xx для наступних N запитів.
+    spreadsheets ({ID таблиці: листи}) задає окремі дані для кількох таблиць (заводів),
+    решта ID отримують sheets; delays ({ID таблиці: секунди}) моделює повільну таблицю.
+    """
+
+    def __init__(self, sheets, host="127.0.0.1", port=0, grid_rows=None, spreadsheets=None, delays=None):
+        self.sheets = sheets
+        self.spreadsheets = spreadsheets or {}
+        self.delays = delays or {}
+        # Розмір сітки листа може бути більшим за кількість заповнених рядків
+        self.grid_rows = grid_rows or {}
+        self.request_count = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def sheets_for(self, spreadsheet_id):
+        return self.spreadsheets.get(spreadsheet_id, self.sheets)
+
+    def row_count(self, sheet_name, sheets=None):
+        sheets = self.sheets if sheets is None else sheets
+        return self.grid_rows.get(sheet_name, len(sheets[sheet_name]))
+
+    def fail_next(self, count, status=503, retry_after=None):
+        """Наступні count запитів завершаться помилкою зі статусом status."""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * count)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _next_failure(self):
+        with self._lock:
+            self.request_count += 1
+            return self._failures.pop(0) if self._failures else None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _value_range(self, sheets, range_name, query):
+                """Повертає (статус, ValueRange або тіло помилки) для одного діапазону."""
+                sheet_name, _, a1 = range_name.partition("!")
+                sheet_name = sheet_name.strip("'")
+                try:
+                    values = slice_a1(sheets[sheet_name], a1, server.row_count(sheet_name, sheets)) if a1 \
+                        else sheets[sheet_name]
+                except GridLimitError as e:
+                    return 400, {"error": {"code": 400, "message": str(e)}}
+                except (KeyError, ValueError):
+                    return 400, {"error": {"code": 400, "message": f"Unable to parse range: {range_name}"}}
+
+                if query.get("valueRenderOption", ["FORMATTED_VALUE"])[0] != "UNFORMATTED_VALUE":
+                    values = [[format_value(v) for v in row] for row in values]
+                return 200, {"range": range_name, "majorDimension": "ROWS", "values": values}
+
+            def do_GET(self):
+                failure = server._next_failure()
+                if failure is not None:
+                    status, retry_after = failure
+                    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+                    self._send_json(status, {"error": {"code": status, "message": "injected failure"}}, headers)
+                    return
+
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.strip("/").split("/")
+                spreadsheet_id = parts[2] if len(parts) > 2 else None
+                sheets = server.sheets_for(spreadsheet_id)
+                if spreadsheet_id in server.delays:
+                    time.sleep(server.delays[spreadsheet_id])
+
+                # v4 / spreadsheets / <id> - метадані листів (кількість рядків сітки)
+                if len(parts) == 3 and parts[:2] == ["v4", "spreadsheets"]:
+                    self._send_json(200, {"sheets": [
+                        {"properties": {"title": title, "gridProperties": {"rowCount": server.row_count(title, sheets)}}}
+                        for title in sheets
+                    ]})
+                    return
+
+                # v4 / spreadsheets / <id> / values:batchGet?ranges=...&ranges=...
+                if len(parts) == 4 and parts[:2] == ["v4", "spreadsheets"] and parts[3] == "values:batchGet":
+                    value_ranges = []
+                    for range_name in query.get("ranges", []):
+                        status, payload = self._value_range(sheets, range_name, query)
+                        if status != 200:
+                            self._send_json(status, payload)
+                            return
+                        value_ranges.append(payload)
+                    self._send_json(200, {"spreadsheetId": parts[2], "valueRanges": value_ranges})
+                    return
+
+                # v4 / spreadsheets / <id> / values / <range>
+                if len(parts) != 5 or parts[:2] != ["v4", "spreadsheets"] or parts[3] != "values":
+                    self._send_json(404, {"error": {"code": 404, "message": "not found"}})
+                    return
+
+                self._send_json(*self._value_range(sheets, unquote(parts[4]), query))
+
+        return Handler
+
+
+def _serve(sheets, kwargs, endpoints):
+    server = FakeSheetsServer(sheets, **kwargs)
+    endpoints.put(server.endpoint)
+    server._httpd.serve_forever()
+
+
+def start_in_process(sheets, **kwargs):
+    """
+    Запускає сервер в окремому процесі, щоб серіалізація JSON не конкурувала
+    за GIL з клієнтом у бенчмарках. Повертає (процес, endpoint); зупинка - process.terminate().
+    """
+    ctx = multiprocessing.get_context("spawn")
+    endpoints = ctx.Queue()
+    process = ctx.Process(target=_serve, args=(sheets, kwargs, endpoints), daemon=True)
+    process.start()
+    return process, endpoints.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Фейковий сервер Google Sheets API v4")
+    parser.add_argument("--data", required=True, help="JSON-файл з даними листів")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with open(args.data, encoding="utf-8") as f:
+        sheets = json.load(f)
+
+    server = FakeSheetsServer(sheets, host=args.host, port=args.port)
+    print(f"Fake Sheets API: {server.endpoint}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
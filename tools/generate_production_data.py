@@ -0,0 +1,207 @@
+"""
+Генератор синтетичних виробничих журналів для листів "варка" та "ФАСОВКА".
+
+Запуск:
+    python tools/generate_production_data.py --rows 100000 --out sheets.json
+    python tools/fake_sheets_server.py --data sheets.json
+
+Значення генеруються так, як їх повертає API з valueRenderOption=UNFORMATTED_VALUE:
+числа - числами, дата варки - серійним номером. Як і в реальній таблиці, частина
+чисел збережена текстом з десятковою комою, а частина рядків порожня.
+generate_frame повертає ті самі дані одразу у вигляді, який будує data_loader.build_frame,
+тож аналітику можна перевіряти на мільйонах рядків без JSON і HTTP.
+"""
+import argparse
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+SERIAL_DATE_ORIGIN = date(1899, 12, 30)
+
+HEADERS = {
+    "варка": [
+        "Номер замовлення", "Дата", "ПІБ", "Тип обладнання", "Тип продукту", "Час на операцію",
+        "Продуктивність за годину", "Відсоток втрат", "Кількість операторів",
+    ],
+    "ФАСОВКА": [
+        "Номер", "Позиція", "ПІБ", "Тип обладнання", "Час на операцію", "Продуктивність за годину",
+        "Відсоток браку", "Кількість операторів", "Тип продукту", "Об'єм", "День", "Місяць", "Рік",
+    ],
+}
+
+OPERATORS = [
+    "Іваненко І.", "Петренко П.", "Сидоренко С.", "Коваленко К.", "Бондаренко Б.", "Ткаченко Т.",
+    "Шевченко Ш.", "Кравченко К.", "Олійник О.", "Мельник М.", "Лисенко Л.", "Мороз М.",
+    "Павленко П.", "Руденко Р.", "Савченко С.", "Гончаренко Г.", "Кузьменко К.", "Литвин Л.",
+]
+EQUIPMENT = {
+    "варка": ["Котел 1", "Котел 2", "Котел 3", "Реактор 500", "Реактор 1000", "Гомогенізатор"],
+    "ФАСОВКА": ["Лінія 1", "Лінія 2", "Лінія 3", "Автомат туб", "Напівавтомат", "Ручна фасовка"],
+}
+PRODUCTS = [
+    "Крем для рук", "Крем для обличчя", "Шампунь", "Бальзам", "Гель для душу", "Лосьйон",
+    "Маска", "Скраб", "Сироватка", "Тонік", "Міцелярна вода", "Дезодорант",
+]
+VOLUMES = ["30мл", "50мл", "75мл", "100мл", "150 мл", "250мл", "500мл", "1л"]
+VOLUME_VALUES = [30.0, 50.0, 75.0, 100.0, 150.0, 250.0, 500.0, 1.0]
+
+# Частка комірок з числом, збереженим як текст "12,5", та повністю порожніх рядків
+TEXT_NUMBER_SHARE = 0.02
+BLANK_ROW_SHARE = 0.001
+
+
+def _columns(sheet, rows, seed, days, end):
+    """Типізовані колонки листа (numpy-масиви) без текстових особливостей таблиці."""
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+
+    # Робочі дні частіше за вихідні
+    offsets = rng.integers(0, days, rows)
+    weekday = (start.weekday() + offsets) % 7
+    weekend = weekday >= 5
+    offsets[weekend] = np.maximum(offsets[weekend] - rng.integers(1, 3, weekend.sum()), 0)
+    dates = np.datetime64(start) + offsets.astype("timedelta64[D]")
+
+    # Кожен оператор працює на "своєму" обладнанні частіше, ніж на чужому
+    operator = rng.integers(0, len(OPERATORS), rows)
+    equipment = np.where(
+        rng.random(rows) < 0.7,
+        operator % len(EQUIPMENT[sheet]),
+        rng.integers(0, len(EQUIPMENT[sheet]), rows),
+    )
+    product = rng.zipf(1.6, rows) % len(PRODUCTS)
+
+    minutes = np.round(rng.lognormal(3.6 + 0.08 * equipment, 0.35), 1)
+    productivity = np.round(rng.normal(600 - 40 * equipment, 80).clip(50), 0)
+    quality = np.round(rng.gamma(1.5, 0.8, rows) + 0.3 * (product % 3), 2)
+    operators = rng.integers(1, 4, rows).astype(float)
+
+    return {
+        "number": np.arange(1, rows + 1),
+        "dates": dates,
+        "operator": operator,
+        "equipment": equipment,
+        "product": product,
+        "minutes": minutes,
+        "productivity": productivity,
+        "quality": quality,
+        "operators": operators,
+        "volume": rng.integers(0, len(VOLUMES), rows),
+    }
+
+
+def _text_numbers(rng, values):
+    """Частину значень перетворює на текст з десятковою комою, як у реальній таблиці."""
+    values = values.astype(object)
+    mask = rng.random(len(values)) < TEXT_NUMBER_SHARE
+    values[mask] = [str(v).replace(".", ",") for v in values[mask]]
+    return values
+
+
+def generate_sheet(sheet, rows, seed=0, days=730, end=None):
+    """
+    Повертає лист як список рядків (перший - заголовок) у форматі відповіді
+    values().get з UNFORMATTED_VALUE. sheet - "варка" або "ФАСОВКА".
+    """
+    cols = _columns(sheet, rows, seed, days, end)
+    rng = np.random.default_rng(seed + 1)
+    operator = np.array(OPERATORS, dtype=object)[cols["operator"]]
+    equipment = np.array(EQUIPMENT[sheet], dtype=object)[cols["equipment"]]
+    product = np.array(PRODUCTS, dtype=object)[cols["product"]]
+    minutes = _text_numbers(rng, cols["minutes"])
+    quality = _text_numbers(rng, cols["quality"])
+    productivity = cols["productivity"].astype(int)
+    operators = cols["operators"].astype(int)
+
+    if sheet == "варка":
+        serial = (cols["dates"] - np.datetime64(SERIAL_DATE_ORIGIN)).astype(int)
+        table = [
+            cols["number"], serial, operator, equipment, product, minutes, productivity, quality, operators,
+        ]
+    else:
+        parts = pd.DatetimeIndex(cols["dates"])
+        volume = np.array(VOLUMES, dtype=object)[cols["volume"]]
+        table = [
+            cols["number"], cols["number"], operator, equipment, minutes, productivity, quality, operators,
+            product, volume, parts.day.to_numpy(), parts.month.to_numpy(), parts.year.to_numpy(),
+        ]
+
+    body = np.empty((rows, len(table)), dtype=object)
+    for i, column in enumerate(table):
+        body[:, i] = column
+    values = body.tolist()
+    for i in np.flatnonzero(rng.random(rows) < BLANK_ROW_SHARE):
+        values[i] = []
+    return [list(HEADERS[sheet])] + values
+
+
+def generate_frame(sheet, rows, seed=0, days=730, end=None):
+    """
+    Ті самі дані, що й generate_sheet, одразу у вигляді результату build_frame
+    (без порожніх рядків): "Дата" - datetime64, числа - float64, довідники - рядки.
+    """
+    cols = _columns(sheet, rows, seed, days, end)
+    keep = np.random.default_rng(seed + 1)
+    # Повторюємо ті самі виклики генератора, що й generate_sheet, щоб збігся вибір порожніх рядків
+    keep.random(rows)
+    keep.random(rows)
+    blank = keep.random(rows) < BLANK_ROW_SHARE
+
+    operator = np.array(OPERATORS, dtype=object)[cols["operator"]]
+    equipment = np.array(EQUIPMENT[sheet], dtype=object)[cols["equipment"]]
+    product = np.array(PRODUCTS, dtype=object)[cols["product"]]
+    dates = cols["dates"].astype("datetime64[ns]")
+    columns = {
+        "Номер замовлення": cols["number"],
+        "Номер": cols["number"],
+        "Позиція": cols["number"],
+        "Дата": dates,
+        "ПІБ": operator,
+        "Тип обладнання": equipment,
+        "Тип продукту": product,
+        "Час на операцію": cols["minutes"],
+        "Продуктивність за годину": cols["productivity"],
+        "Відсоток втрат": cols["quality"],
+        "Відсоток браку": cols["quality"],
+        "Кількість операторів": cols["operators"],
+        "Об'єм": np.array(VOLUMES, dtype=object)[cols["volume"]],
+    }
+    if sheet == "ФАСОВКА":
+        parts = pd.DatetimeIndex(dates)
+        columns.update({"День": parts.day.to_numpy(), "Місяць": parts.month.to_numpy(), "Рік": parts.year.to_numpy()})
+
+    # Порядок колонок як у build_frame: колонки листа, далі похідні
+    df = pd.DataFrame({col: columns[col] for col in HEADERS[sheet]})
+    if sheet == "ФАСОВКА":
+        df["Дата"] = dates
+        df["Об'єм_число"] = np.array(VOLUME_VALUES)[cols["volume"]]
+    return df[~blank].reset_index(drop=True)
+
+
+def generate_sheets(rows, seed=0, days=730, end=None):
+    """Обидва листи для FakeSheetsServer: {"варка": [...], "ФАСОВКА": [...]}."""
+    return {
+        sheet: generate_sheet(sheet, rows, seed=seed + i, days=days, end=end)
+        for i, sheet in enumerate(HEADERS)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор синтетичних виробничих журналів")
+    parser.add_argument("--rows", type=int, default=10000, help="кількість рядків на лист")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=730, help="глибина журналу в днях")
+    parser.add_argument("--out", required=True, help="JSON-файл для fake_sheets_server.py --data")
+    args = parser.parse_args()
+
+    sheets = generate_sheets(args.rows, seed=args.seed, days=args.days)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(sheets, f, ensure_ascii=False)
+    print(f"{args.out}: {', '.join(f'{name} - {len(rows) - 1} рядків' for name, rows in sheets.items())}")
+
+
+if __name__ == "__main__":
+    main()
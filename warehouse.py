@@ -0,0 +1,357 @@
+"""
+Локальне сховище історії операцій у SQLite з індексами за датою та вимірами.
+
+Процес синхронізації періодично завантажує таблиці заводів із Google Sheets і
+оновлює сховище інкрементально: для кожного рядка зберігається хеш, тож
+дописані в кінець листа рядки лише додаються, а при зміні рядка переписується
+хвіст, починаючи з нього. Сторінки із заданою змінною WAREHOUSE_PATH не
+тримають усю історію в пам'яті: фільтри періоду та вимірів виконуються в SQL
+за індексами, тренди за періодами групуються в SQL, а в процес потрапляють
+лише рядки вибраного періоду.
+
+Запуск синхронізації (кожні DATA_TTL секунд):
+    python warehouse.py --db /var/lib/dashboard/warehouse.sqlite
+    WAREHOUSE_PATH=/var/lib/dashboard/warehouse.sqlite streamlit run app.py
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import urllib.parse
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from analytics import (
+    DATE, EMPLOYEE, EQUIPMENT, OPERATIONS, PERIOD_FREQ, PRODUCT, PRODUCTIVITY, TIME, TOTAL_MINUTES, WORKING_DAYS,
+    FilterSpec, distribution, period_stats,
+)
+from data_loader import DATA_TTL, load_sheets
+from departments import DEPARTMENT_COLUMN
+from plants import PLANT_COLUMN, PLANTS
+
+# Файл сховища для сторінок; якщо не задано, дані тримаються в пам'яті процесу
+WAREHOUSE_ENV = "WAREHOUSE_PATH"
+# Після скількох секунд без синхронізації сторінки попереджають про застарілі дані
+MAX_SYNC_AGE = 3 * DATA_TTL
+
+TABLE = "operations"
+POSITION = "Позиція"
+ROW_HASH = "Хеш рядка"
+# Дати зберігаються текстом, що при порівнянні рядків впорядковується як час
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# Ключ періоду тренду в SQL: день, понеділок-кінець тижня (W-MON), перше число місяця
+PERIOD_SQL = {
+    "День": 'date("Дата")',
+    "Тиждень": "date(\"Дата\", 'weekday 1')",
+    "Місяць": "strftime('%Y-%m-01', \"Дата\")",
+}
+
+
+def warehouse_path():
+    """Шлях до файлу сховища з WAREHOUSE_PATH або None, якщо сховище не використовується."""
+    return os.environ.get(WAREHOUSE_ENV) or None
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_date(value):
+    return pd.Timestamp(value).strftime(DATE_FORMAT)
+
+
+def _plants_clause(plants):
+    """Умова WHERE та параметри для вибраних заводів (None - усі)."""
+    if plants is None:
+        return "1", []
+    return f"{_quote(PLANT_COLUMN)} IN ({', '.join('?' * len(plants))})", list(plants)
+
+
+def connect(path, readonly=False):
+    """
+    З'єднання зі сховищем. Для запису створює схему та вмикає WAL, щоб
+    сторінки читали дані під час синхронізації.
+    """
+    if readonly:
+        return sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro", uri=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TABLE} (
+                {_quote(PLANT_COLUMN)} TEXT NOT NULL,
+                {_quote(DEPARTMENT_COLUMN)} TEXT NOT NULL,
+                {_quote(POSITION)} INTEGER NOT NULL,
+                {_quote(ROW_HASH)} INTEGER NOT NULL,
+                {_quote(DATE)}, {_quote(EQUIPMENT)}, {_quote(EMPLOYEE)}, {_quote(PRODUCT)},
+                PRIMARY KEY ({_quote(PLANT_COLUMN)}, {_quote(DEPARTMENT_COLUMN)}, {_quote(POSITION)})
+            )""")
+        # Звіти завжди фільтрують за відділом і періодом, часто - за одним із вимірів
+        for name, columns in (
+            ("date", (DEPARTMENT_COLUMN, DATE)),
+            ("equipment", (DEPARTMENT_COLUMN, EQUIPMENT, DATE)),
+            ("employee", (DEPARTMENT_COLUMN, EMPLOYEE, DATE)),
+            ("product", (DEPARTMENT_COLUMN, PRODUCT, DATE)),
+        ):
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {TABLE}_{name} ON {TABLE} ({', '.join(map(_quote, columns))})"
+            )
+        # Колонки та їх типи для кожного (завод, відділ)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS partitions (
+                {_quote(PLANT_COLUMN)} TEXT NOT NULL,
+                {_quote(DEPARTMENT_COLUMN)} TEXT NOT NULL,
+                columns TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY ({_quote(PLANT_COLUMN)}, {_quote(DEPARTMENT_COLUMN)})
+            )""")
+    return conn
+
+
+# ---------------------------
+# Синхронізація
+# ---------------------------
+def _sql_column(series):
+    # Колонки без оголошеного типу: SQLite зберігає числа й текст як є,
+    # тож змішані колонки (номери замовлень, об'єм) читаються без змін
+    if series.dtype.kind == "M":
+        series = series.dt.strftime(DATE_FORMAT)
+    return series.astype(object).where(series.notna(), None).to_numpy()
+
+
+def sync_partition(conn, plant, department, frame, synced_at=None):
+    """
+    Оновлює рядки відділу department заводу plant до frame. Рядки до першого
+    зміненого (за хешем) лишаються, решта переписуються. Повертає
+    (залишено, додано, видалено) рядків. Викликається всередині транзакції.
+    """
+    columns = [[name, str(dtype)] for name, dtype in frame.dtypes.items()]
+    key = (plant, department)
+    where = f"{_quote(PLANT_COLUMN)} = ? AND {_quote(DEPARTMENT_COLUMN)} = ?"
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy().view(np.int64)
+
+    keep = 0
+    row = conn.execute(f"SELECT columns FROM partitions WHERE {where}", key).fetchone()
+    if row is not None and json.loads(row[0]) == columns:
+        stored = np.fromiter(
+            (h for (h,) in conn.execute(
+                f"SELECT {_quote(ROW_HASH)} FROM {TABLE} WHERE {where} ORDER BY {_quote(POSITION)}", key
+            )),
+            dtype=np.int64,
+        )
+        common = min(len(stored), len(hashes))
+        changed = np.flatnonzero(stored[:common] != hashes[:common])
+        keep = int(changed[0]) if len(changed) else common
+
+    deleted = conn.execute(f"DELETE FROM {TABLE} WHERE {where} AND {_quote(POSITION)} >= ?", (*key, keep)).rowcount
+
+    existing = {info[1] for info in conn.execute(f"PRAGMA table_info({TABLE})")}
+    for name in frame.columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_quote(name)}")
+    tail = frame.iloc[keep:]
+    names = [PLANT_COLUMN, DEPARTMENT_COLUMN, POSITION, ROW_HASH, *frame.columns]
+    conn.executemany(
+        f"INSERT INTO {TABLE} ({', '.join(map(_quote, names))}) VALUES ({', '.join('?' * len(names))})",
+        zip(
+            [plant] * len(tail), [department] * len(tail), range(keep, len(frame)), hashes[keep:].tolist(),
+            *(_sql_column(tail[name]) for name in frame.columns),
+        ),
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?)",
+        (*key, json.dumps(columns, ensure_ascii=False), synced_at or time.time()),
+    )
+    return keep, len(tail), deleted
+
+
+def refresh(path, plants, departments, client):
+    """
+    Синхронізує всі заводи зі сховищем (кожен завод - одна транзакція). Якщо
+    Google Sheets недоступний або завод повернув помилку, його дані не змінюються.
+    """
+    with closing(connect(path)) as conn:
+        for plant in plants:
+            try:
+                frames, snapshot_time = load_sheets(client, plant.spreadsheet_id, departments)
+            except Exception as e:
+                print(f"{plant.title}: помилка завантаження: {e}", file=sys.stderr)
+                continue
+            if snapshot_time is not None:
+                print(f"{plant.title}: Google Sheets недоступний, дані не оновлені", file=sys.stderr)
+                continue
+            with conn:
+                for department in departments:
+                    kept, added, deleted = sync_partition(conn, plant.title, department.title, frames[department.key])
+                    print(f"{plant.title} / {department.title}: +{added} -{deleted} (без змін {kept})", flush=True)
+
+
+def last_sync(path, plants=None):
+    """Час найстарішої синхронізації вибраних заводів або None, якщо даних немає."""
+    where, params = _plants_clause(plants)
+    with closing(connect(path, readonly=True)) as conn:
+        return conn.execute(f"SELECT MIN(synced_at) FROM partitions WHERE {where}", params).fetchone()[0]
+
+
+# ---------------------------
+# Запити сторінок
+# ---------------------------
+class WarehouseSource:
+    """
+    Дані відділу department заводів plants (усіх, якщо None) у сховищі. Має ті самі методи, що й analytics.FrameSource, але фільтрує й
+    групує в SQLite.
+    """
+
+    def __init__(self, path, department, plants=None):
+        self.path = path
+        self.department = department.title
+        self.plants = tuple(plants) if plants is not None else None
+
+    def _query(self, sql, params=()):
+        # Окреме з'єднання на запит: сесії Streamlit працюють у різних потоках
+        with closing(connect(self.path, readonly=True)) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _where(self, spec=None):
+        plants, params = _plants_clause(self.plants)
+        clauses = [f"{_quote(DEPARTMENT_COLUMN)} = ?", plants]
+        params = [self.department, *params]
+        if spec is not None:
+            if spec.start is not None and spec.end is not None:
+                clauses.append(f"{_quote(DATE)} BETWEEN ? AND ?")
+                params += [_sql_date(spec.start), _sql_date(spec.end)]
+            for column, selected in ((PRODUCT, spec.products), (EQUIPMENT, spec.equipment)):
+                if selected is not None:
+                    clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(selected))})")
+                    params += list(selected)
+            if spec.employee is not None:
+                clauses.append(f"{_quote(EMPLOYEE)} = ?")
+                params.append(spec.employee)
+        return " AND ".join(clauses), params
+
+    def _columns(self):
+        """(заводи з даними, [(колонка, dtype)]) у порядку заводів у реєстрі."""
+        plants, params = _plants_clause(self.plants)
+        rows = self._query(
+            f"SELECT {_quote(PLANT_COLUMN)}, columns FROM partitions "
+            f"WHERE {_quote(DEPARTMENT_COLUMN)} = ? AND {plants} ORDER BY rowid",
+            [self.department, *params],
+        )
+        order = {plant.title: i for i, plant in enumerate(PLANTS)}
+        rows.sort(key=lambda row: order.get(row[0], len(order)))
+        columns = {}
+        for _, plant_columns in rows:
+            for name, dtype in json.loads(plant_columns):
+                columns.setdefault(name, dtype)
+        return [plant for plant, _ in rows], list(columns.items())
+
+    @property
+    def empty(self):
+        where, params = self._where()
+        return not self._query(f"SELECT 1 FROM {TABLE} WHERE {where} LIMIT 1", params)
+
+    def date_range(self):
+        where, params = self._where()
+        first, last = self._query(f"SELECT MIN({_quote(DATE)}), MAX({_quote(DATE)}) FROM {TABLE} WHERE {where}",
+                                  params)[0]
+        return pd.Timestamp(first) if first else pd.NaT, pd.Timestamp(last) if last else pd.NaT
+
+    def period(self, start, end):
+        """Рядки за start..end у колонках і типах таблиці відділу (див. department_frame)."""
+        plants, columns = self._columns()
+        if not columns:
+            return pd.DataFrame()
+        names = [name for name, _ in columns]
+        if len(plants) > 1:
+            names.insert(0, PLANT_COLUMN)
+        where, params = self._where(FilterSpec(start, end))
+        rows = self._query(
+            f"SELECT {', '.join(map(_quote, names))} FROM {TABLE} WHERE {where} "
+            f"ORDER BY {_quote(PLANT_COLUMN)}, {_quote(POSITION)}",
+            params,
+        )
+        df = pd.DataFrame.from_records(rows, columns=names)
+        for name, dtype in columns:
+            if dtype.startswith("datetime64"):
+                df[name] = pd.to_datetime(df[name], format="ISO8601")
+            elif dtype != "object":
+                df[name] = df[name].astype(dtype)
+        if len(plants) > 1:
+            # Порядок заводів - як у реєстрі, а не за абеткою
+            df[PLANT_COLUMN] = pd.Categorical(df[PLANT_COLUMN], categories=plants)
+            df = df.sort_values(PLANT_COLUMN, kind="stable", ignore_index=True)
+        return df
+
+    def options(self, column, spec):
+        if column not in dict(self._columns()[1]):
+            return []
+        where, params = self._where(spec)
+        rows = self._query(
+            f"SELECT DISTINCT {_quote(column)} FROM {TABLE} "
+            f"WHERE {where} AND {_quote(column)} IS NOT NULL ORDER BY 1",
+            params,
+        )
+        return [value for (value,) in rows]
+
+    def period_trends(self, spec, interval):
+        """analytics.period_trends, згрупований у SQL: у процес потрапляють лише агрегати."""
+        columns = dict(self._columns()[1])
+        where, params = self._where(spec)
+        minutes = f"TOTAL({_quote(TIME)})" if TIME in columns else "0.0"
+        productivity = f", AVG({_quote(PRODUCTIVITY)})" if PRODUCTIVITY in columns else ""
+        rows = self._query(
+            f"SELECT {PERIOD_SQL[interval]} AS period, {_quote(EQUIPMENT)}, COUNT(*), "
+            f"COUNT(DISTINCT date({_quote(DATE)})), {minutes}{productivity} FROM {TABLE} "
+            f"WHERE {where} AND {_quote(DATE)} IS NOT NULL AND {_quote(EQUIPMENT)} IS NOT NULL "
+            f"GROUP BY period, {_quote(EQUIPMENT)} ORDER BY period, {_quote(EQUIPMENT)}",
+            params,
+        )
+        names = ["Період", EQUIPMENT, OPERATIONS, WORKING_DAYS, TOTAL_MINUTES]
+        groups = pd.DataFrame.from_records(rows, columns=names + ([PRODUCTIVITY] if productivity else []))
+        groups["Період"] = pd.to_datetime(groups["Період"]).dt.to_period(PERIOD_FREQ[interval])
+        groups = groups.astype({OPERATIONS: "int64", WORKING_DAYS: "int64", TOTAL_MINUTES: "float64"})
+        if productivity:
+            groups[PRODUCTIVITY] = groups[PRODUCTIVITY].astype("float64")
+        return period_stats(groups)
+
+    def distribution(self, column, spec):
+        """analytics.distribution за типами продукту: з SQLite читаються лише дві колонки."""
+        columns = dict(self._columns()[1])
+        if column not in columns or PRODUCT not in columns:
+            return distribution(pd.DataFrame(columns=[PRODUCT, column], dtype=float), column)
+        where, params = self._where(spec)
+        rows = self._query(
+            f"SELECT {_quote(PRODUCT)}, {_quote(column)} FROM {TABLE} "
+            f"WHERE {where} AND {_quote(column)} IS NOT NULL",
+            params,
+        )
+        return distribution(pd.DataFrame.from_records(rows, columns=[PRODUCT, column]), column)
+
+
+def main():
+    from departments import DEPARTMENTS
+    from plants import PLANTS
+    from sheets_client import get_sheets_client
+
+    parser = argparse.ArgumentParser(description="Синхронізація сховища історії операцій")
+    parser.add_argument("--db", default=warehouse_path(), help=f"файл SQLite (типово ${WAREHOUSE_ENV})")
+    parser.add_argument("--interval", type=float, default=DATA_TTL, help="секунд між синхронізаціями")
+    parser.add_argument("--once", action="store_true", help="синхронізувати один раз і вийти")
+    args = parser.parse_args()
+    if not args.db:
+        parser.error(f"вкажіть --db або {WAREHOUSE_ENV}")
+
+    client = get_sheets_client()
+    while True:
+        refresh(args.db, PLANTS, DEPARTMENTS, client)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()